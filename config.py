@@ -1,7 +1,44 @@
 import os
-from dotenv import load_dotenv
 
-load_dotenv()
+_dotenv_loaded = False
+
+
+def _load_dotenv():
+    global _dotenv_loaded
+    if not _dotenv_loaded:
+        _dotenv_loaded = True
+        from dotenv import load_dotenv
+        load_dotenv()
+
+
+def _flag(value):
+    return value.lower() in ("1", "true", "yes")
+
+
+class env:
+    """
+    Config attribute read from the environment on first access
+
+    ``.env`` is loaded only when the first such attribute is read, and the
+    value then replaces the descriptor, so later reads are plain attribute
+    lookups and assignments (e.g. from conftest) override it as before.
+    """
+
+    def __init__(self, name, default=None, cast=str):
+        self.name = name
+        self.default = default
+        self.cast = cast
+
+    def __set_name__(self, owner, attr):
+        self.attr = attr
+
+    def __get__(self, instance, owner):
+        _load_dotenv()
+        raw = os.getenv(self.name)
+        value = self.default if raw is None else self.cast(raw)
+        setattr(owner, self.attr, value)
+        return value
+
 
 class Config:
     BASE_URL = "https://restful-booker.herokuapp.com"
@@ -12,9 +49,95 @@ class Config:
     BOOKING_ENDPOINT = "/booking"
 
     # Credentials
-    USERNAME = os.getenv("API_USERNAME", "admin")
-    PASSWORD = os.getenv("API_PASSWORD", "password123")
+    USERNAME = env("API_USERNAME", "admin")
+    PASSWORD = env("API_PASSWORD", "password123")
+
+    # Auth token cache
+    TOKEN_TTL = env("API_TOKEN_TTL", 600, int)
+    TOKEN_CACHE_FILE = env("API_TOKEN_CACHE_FILE")   # shared across processes when set
 
     # Test settings
-    TIMEOUT = 10
-    VERIFY_SSL = True
\ No newline at end of file
+    TIMEOUT = 10   # deadline for endpoints missing from ENDPOINT_TIMEOUTS
+    VERIFY_SSL = True
+    ASYNC_MAX_CONCURRENCY = env("API_ASYNC_CONCURRENCY", 100, int)
+
+    # Connection pool / transport
+    POOL_CONNECTIONS = env("API_POOL_CONNECTIONS", 10, int)   # hosts kept in the pool manager
+    POOL_MAXSIZE = env("API_POOL_MAXSIZE", 32, int)           # keep-alive connections per host
+    POOL_BLOCK = True                                        # wait for a free connection instead of discarding
+    MAX_RETRIES = env("API_MAX_RETRIES", 2, int)
+    RETRY_BACKOFF = 0.3
+    TCP_KEEPALIVE = True
+    SESSION_PER_THREAD = env("API_SESSION_PER_THREAD", False, _flag)
+    TRANSPORT = env("API_TRANSPORT", "requests")   # requests | urllib3 | asyncio (utils/transport.py)
+
+    # Request scheduling (utils/scheduler.py), per endpoint template
+    ENDPOINT_TIMEOUTS = {   # seconds, including time spent throttled and retrying
+        "/ping": 5,
+        "/auth": 10,
+        "/booking": 30,
+        "/booking/{id}": 10,
+    }
+    RATE_LIMIT = env("API_RATE_LIMIT", None, float)   # requests/s per endpoint; unset = no cap
+    RATE_BURST = env("API_RATE_BURST", 10, int)
+    MAX_CONCURRENCY_PER_ENDPOINT = env("API_MAX_CONCURRENCY_PER_ENDPOINT", 64, int)   # AIMD ceiling
+    THROTTLE_RETRIES = env("API_THROTTLE_RETRIES", 0, int)   # retries of 429/503 responses; 0 returns them to the caller
+
+    # Session booking pool
+    BOOKING_POOL_SIZE = env("API_BOOKING_POOL_SIZE", 20, int)
+    BOOKING_POOL_BATCH_SIZE = 50
+    BOOKING_POOL_WORKERS = env("API_BOOKING_POOL_WORKERS", 8, int)
+
+    # Streaming booking lists
+    STREAM_CHUNK_SIZE = 64 * 1024
+    DETAIL_FETCH_WINDOW = env("API_DETAIL_FETCH_WINDOW", 16, int)   # keep below POOL_MAXSIZE
+
+    # GET response cache (utils/response_cache.py): off | test | module | session
+    RESPONSE_CACHE = env("API_RESPONSE_CACHE", "off")
+
+    # Payload matrices (utils/payload_matrix.py)
+    PAYLOAD_MATRIX_WORKERS = env("API_PAYLOAD_MATRIX_WORKERS", 16, int)
+
+    # Per-request phase timings (utils/request_profiler.py)
+    PROFILE_REQUESTS = env("API_PROFILE_REQUESTS", False, _flag)
+    PROFILE_SLOWEST = env("API_PROFILE_SLOWEST", 0, int)   # keep cProfile stacks of the N slowest requests
+
+    # Test order (utils/test_history.py): history | file
+    TEST_ORDER = env("API_TEST_ORDER", "history")
+
+    # Concurrent update histories (utils/linearizability.py)
+    LINEARIZABILITY_OPERATIONS = env("API_LINEARIZABILITY_OPERATIONS", 400, int)
+    LINEARIZABILITY_WORKERS = env("API_LINEARIZABILITY_WORKERS", 8, int)
+
+    # Load tests
+    SOAK_DURATION = env("API_SOAK_DURATION", 3, int)   # seconds; use 1800+ for real endurance runs
+    SOAK_SAMPLES = env("API_SOAK_SAMPLES", 600, int)   # samples kept per monitored series
+    SOAK_SAMPLE_INTERVAL = env("API_SOAK_SAMPLE_INTERVAL", 0.0, float)   # seconds; 0 spreads the samples over the run
+    SOAK_TOP_ALLOCATORS = env("API_SOAK_TOP_ALLOCATORS", 10, int)   # tracemalloc lines per snapshot; 0 = tracemalloc off
+    SOAK_ALLOCATOR_INTERVAL = env("API_SOAK_ALLOCATOR_INTERVAL", 60.0, float)   # seconds between tracemalloc snapshots
+    LOAD_PROCESSES = env("API_LOAD_PROCESSES", 1, int)   # load driver processes; 0 = one per CPU core
+
+    # Record/replay: off | record | replay | auto
+    CASSETTE_MODE = env("API_CASSETTE_MODE", "off")
+    CASSETTE_DIR = env("API_CASSETTE_DIR", "cassettes")
+    DATA_SEED = env("API_DATA_SEED")   # seeds generated payloads per test; set automatically for cassettes
+
+    # Run-over-run latency baselines (utils/baseline.py); disabled unless a path is set
+    BASELINE_DB = env("API_BASELINE_DB")
+    BASELINE_WINDOW = env("API_BASELINE_WINDOW", 20, int)   # previous runs merged into a baseline
+    BASELINE_ALPHA = 0.01
+    BASELINE_MIN_EFFECT = 0.1   # relative p90 change below this is never flagged
+
+    # Startup budget for --startup-profile (utils/startup_profile.py); 0 disables the check
+    STARTUP_BUDGET_MS = env("API_STARTUP_BUDGET_MS", 0, float)
+
+    # Client-overhead microbenchmark budgets (utils/microbenchmark.py)
+    MICROBENCH_BUDGETS = env(
+        "API_MICROBENCH_BUDGETS",
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), "tests", "data", "microbenchmark_budgets.json"),
+    )
+    MICROBENCH_TIME_FACTOR = env("API_MICROBENCH_TIME_FACTOR", 1.0, float)   # scales time budgets on noisy runners
+    MICROBENCH_UPDATE = env("API_MICROBENCH_UPDATE", False, _flag)          # re-record budgets instead of checking
+
+    # Run against the in-process stand-in server (utils/stub_server.py)
+    USE_STUB_SERVER = env("API_STUB_SERVER", False, _flag)
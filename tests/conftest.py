@@ -1,33 +1,552 @@
+from utils import startup_profile
+
+# Installed before the imports below so --startup-profile can attribute them
+startup_profile.install()
+
+import html
+import os
+import shutil
+import tempfile
+
 import pytest
 
 from config import Config
-from utils.api_client import APIClient
-from utils.data_generator import generate_booking_data
+from utils import parallel
+
+# Everything else is imported by the hook or fixture that uses it, and only when
+# its option is enabled, so collection and smoke runs do not pay for the rest
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--stub-server",
+        action="store_true",
+        default=False,
+        help="Run against the in-process Restful-Booker stand-in instead of Config.BASE_URL",
+    )
+    parser.addoption(
+        "--cassette-mode",
+        choices=("off", "record", "replay", "auto"),   # utils.cassette.MODES
+        default=None,
+        help="Record/replay API interactions (default: Config.CASSETTE_MODE)",
+    )
+    parser.addoption(
+        "--cassette-dir",
+        default=None,
+        help="Directory holding recorded interactions (default: Config.CASSETTE_DIR)",
+    )
+    parser.addoption(
+        "--jsonl-report",
+        default=None,
+        help="Append one JSON line per finished test to this file and render an HTML summary "
+             "next to it at the end of the run",
+    )
+    parser.addoption(
+        "--startup-profile",
+        action="store_true",
+        default=False,
+        help="Report import and collection time by module",
+    )
+    parser.addoption(
+        "--startup-budget",
+        type=float,
+        default=None,
+        help="With --startup-profile, fail when conftest imports plus collection exceed this many ms "
+             "(default: Config.STARTUP_BUDGET_MS)",
+    )
+    parser.addoption(
+        "--profile-requests",
+        action="store_true",
+        default=False,
+        help="Time DNS, connect, TLS, time-to-first-byte and body download of every request "
+             "and report them by endpoint",
+    )
+    parser.addoption(
+        "--profile-slowest",
+        type=int,
+        default=None,
+        help="With --profile-requests, keep client-side cProfile stacks of the N slowest requests "
+             "(default: Config.PROFILE_SLOWEST)",
+    )
+    parser.addoption(
+        "--response-cache",
+        choices=("off", "test", "module", "session"),   # utils.response_cache.SCOPES
+        default=None,
+        help="Serve repeated GETs from a cache emptied after every test, module or the session; "
+             "writes invalidate what they touch (default: Config.RESPONSE_CACHE)",
+    )
+    parser.addoption(
+        "--test-order",
+        choices=("history", "file"),
+        default=None,
+        help="history: run fast and recently failing tests first and balance xdist workers by "
+             "predicted duration (needs the pytest cache); file: collection order "
+             "(default: Config.TEST_ORDER)",
+    )
+    parser.addoption(
+        "--baseline-db",
+        default=None,
+        help="SQLite file of per-case latency baselines to compare against and extend "
+             "(default: Config.BASELINE_DB)",
+    )
+
+
+cleanup_failures_key = pytest.StashKey()
+request_metrics_key = pytest.StashKey()
+shared_dir_key = pytest.StashKey()
+controller_stub_key = pytest.StashKey()
+payload_results_key = pytest.StashKey()
+history_plugin_key = pytest.StashKey()
+
+BOOKING_POOL_FILE = "booking_pool.json"
+
+# Per-endpoint latency histograms merged from every test report of the session
+session_request_metrics = None
+# Per-endpoint phase timings merged from every test report under --profile-requests
+session_request_profile = None
+
+LATENCY_COLUMNS = ("p50", "p90", "p99", "max")
+
+
+def pytest_configure(config):
+    global session_request_metrics, session_request_profile
+    if config.getoption("--startup-profile"):
+        budget = config.getoption("--startup-budget")
+        config.pluginmanager.register(
+            startup_profile.StartupProfilePlugin(
+                startup_profile.profiler, Config.STARTUP_BUDGET_MS if budget is None else budget
+            ),
+            "startup-profile",
+        )
+    else:
+        startup_profile.profiler.uninstall()
+
+    if config.getoption("--stub-server"):
+        Config.USE_STUB_SERVER = True
+    if config.getoption("--cassette-mode"):
+        Config.CASSETTE_MODE = config.getoption("--cassette-mode")
+    if config.getoption("--cassette-dir"):
+        Config.CASSETTE_DIR = config.getoption("--cassette-dir")
+    if config.getoption("--profile-slowest") is not None:
+        Config.PROFILE_SLOWEST = config.getoption("--profile-slowest")
+    if config.getoption("--profile-requests"):
+        Config.PROFILE_REQUESTS = True
+    from utils.request_metrics import RequestMetrics
+    session_request_metrics = RequestMetrics()
+    if Config.PROFILE_REQUESTS:
+        from utils.request_profiler import RequestProfile
+        session_request_profile = RequestProfile(Config.PROFILE_SLOWEST)
+    if config.getoption("--response-cache"):
+        Config.RESPONSE_CACHE = config.getoption("--response-cache")
+    if Config.RESPONSE_CACHE != "off":
+        from utils.response_cache import ResponseCache, ResponseCachePlugin
+        config.pluginmanager.register(
+            ResponseCachePlugin(ResponseCache.shared(), Config.RESPONSE_CACHE), "response-cache"
+        )
+    if Config.CASSETTE_MODE != "off":
+        from utils.cassette import Cassette, CassettePlugin
+        if Config.DATA_SEED is None:
+            # Recorded interactions only match on rerun if generated payloads repeat
+            Config.DATA_SEED = "cassette"
+        config.pluginmanager.register(CassettePlugin(Cassette.from_config()), "cassette")
+    config.stash[cleanup_failures_key] = []
+
+    # Under xdist the controller owns run-wide resources and shares them with workers
+    shared_dir = parallel.worker_input(config, "shared_dir")
+    if parallel.is_controller(config):
+        shared_dir = tempfile.mkdtemp(prefix="restful-booker-")
+        if Config.USE_STUB_SERVER:
+            from utils.stub_server import StubServer
+            server = StubServer().start()
+            config.stash[controller_stub_key] = server
+            Config.BASE_URL = server.url
+    config.stash[shared_dir_key] = shared_dir
+    if shared_dir and not Config.TOKEN_CACHE_FILE:
+        Config.TOKEN_CACHE_FILE = os.path.join(shared_dir, "auth_token.json")
+
+    jsonl_report = config.getoption("--jsonl-report")
+    if jsonl_report and not parallel.is_worker(config):
+        from utils.report_file import JsonlReporter
+        config.pluginmanager.register(
+            JsonlReporter(
+                jsonl_report,
+                os.path.splitext(jsonl_report)[0] + ".html",
+                session_request_metrics,
+                session_request_profile,
+            ),
+            "jsonl-report",
+        )
+
+    # Durations and failure rates live in the pytest cache (absent with -p no:cacheprovider)
+    cache = getattr(config, "cache", None)
+    if cache is not None:
+        from utils.test_history import HistoryOrderPlugin
+        plugin = HistoryOrderPlugin(
+            cache,
+            reorder=(config.getoption("--test-order") or Config.TEST_ORDER) == "history",
+            record=not parallel.is_worker(config),
+        )
+        config.stash[history_plugin_key] = plugin
+        config.pluginmanager.register(plugin, "test-history")
+
+    # Latency baselines are kept by the process that receives every report;
+    # replayed responses carry no real timing, so cassette runs are left out
+    baseline_db = config.getoption("--baseline-db") or Config.BASELINE_DB
+    if baseline_db and not parallel.is_worker(config) and Config.CASSETTE_MODE == "off":
+        from utils.baseline import BaselinePlugin, BaselineStore
+        target = "stub" if Config.USE_STUB_SERVER else Config.BASE_URL
+        store = BaselineStore(baseline_db, target, Config.BASELINE_WINDOW)
+        config.pluginmanager.register(
+            BaselinePlugin(store, Config.BASELINE_ALPHA, Config.BASELINE_MIN_EFFECT), "latency-baseline"
+        )
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_configure_node(node):
+    node.workerinput["shared_dir"] = node.config.stash[shared_dir_key]
+    if controller_stub_key in node.config.stash:
+        node.workerinput["stub_server_url"] = node.config.stash[controller_stub_key].url
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_xdist_make_scheduler(config, log):
+    plugin = config.stash.get(history_plugin_key, None)
+    if plugin is None or not plugin.reorder or config.getvalue("dist") != "loadgroup":
+        return None
+    from utils.duration_scheduling import DurationGroupScheduling
+    return DurationGroupScheduling(config, log, lambda nodeid: plugin.history.duration(nodeid=nodeid))
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_collection_modifyitems(config, items):
+    # Keep stateful marker groups on one worker each (used by --dist loadgroup);
+    # runs before xdist turns xdist_group markers into "@group" nodeid suffixes
+    for item in items:
+        group = parallel.xdist_group_for(item)
+        if group:
+            item.add_marker(pytest.mark.xdist_group(group))
+
+
+def pytest_sessionfinish(session):
+    config = session.config
+    shared_dir = config.stash.get(shared_dir_key, None)
+    if not shared_dir or not parallel.is_controller(config):
+        return
+    # Workers share one booking pool; clean it up once, from the controller
+    bookings = parallel.read_shared(os.path.join(shared_dir, BOOKING_POOL_FILE), [])
+    if bookings:
+        from utils.api_client import APIClient
+        from utils.booking_pool import bulk_delete
+        client = APIClient()
+        if client.cassette is not None:
+            from utils.cassette import fixture_scope
+            # Numbered like the booking_pool teardown of a run without xdist
+            client.cassette.scope = fixture_scope("booking_pool")
+        config.stash[cleanup_failures_key].extend(
+            bulk_delete(client, (booking_id for booking_id, _ in bookings))
+        )
+        client.close()
+
+
+def pytest_unconfigure(config):
+    server = config.stash.get(controller_stub_key, None)
+    if server is not None:
+        server.stop()
+    shared_dir = config.stash.get(shared_dir_key, None)
+    if shared_dir and parallel.is_controller(config):
+        shutil.rmtree(shared_dir, ignore_errors=True)
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    if Config.CASSETTE_MODE != "off":
+        from utils.cassette import Cassette
+        cassette = Cassette.from_config()
+        terminalreporter.line(
+            f"cassette ({cassette.mode}): {cassette.hits} replayed, {cassette.misses} not found, "
+            f"{len(cassette.store)} stored in {cassette.store.directory}"
+        )
+    from utils.scheduler import RequestScheduler
+    totals = RequestScheduler.shared().totals()
+    # Lock hand-offs add microseconds of "throttled" time; only report real throttling
+    if totals["throttled_responses"] or totals["throttled_seconds"] >= 0.5:
+        terminalreporter.section("request scheduler")
+        for template, stats in RequestScheduler.shared().stats().items():
+            terminalreporter.line(
+                f"{template}: {stats['requests']} requests, {stats['throttled_responses']} throttled "
+                f"responses, {stats['retries']} retries, {stats['throttled_seconds']:.2f}s throttled / "
+                f"{stats['in_flight_seconds']:.2f}s in flight, concurrency limit {stats['concurrency_limit']}"
+            )
+    if session_request_profile is not None and session_request_profile.phases:
+        from utils import request_profiler
+        terminalreporter.section("request timing breakdown (ms)")
+        width = max(len(key) for key in session_request_profile.phases)
+        terminalreporter.line(
+            "endpoint".ljust(width) + "".join(label.rjust(11) for label, _ in request_profiler.COLUMNS)
+        )
+        for key, row in session_request_profile.summary().items():
+            terminalreporter.line(
+                key.ljust(width)
+                + "".join(request_profiler.format_cell(row[field]).rjust(11) for _, field in request_profiler.COLUMNS)
+            )
+        for entry in session_request_profile.slowest:
+            phases = ", ".join(f"{phase} {ms:.1f}" for phase, ms in entry["phases_ms"].items())
+            terminalreporter.section(f"slow request: {entry['endpoint']} {entry['total_ms']:.1f} ms", sep="-")
+            terminalreporter.line(f"{entry['test']}: {phases}")
+            terminalreporter.line(entry["stats"])
+    failures = config.stash.get(cleanup_failures_key, [])
+    if failures:
+        terminalreporter.section("booking cleanup failures")
+        for booking_id, reason in failures:
+            terminalreporter.line(f"booking {booking_id}: {reason}")
+
+
+    """REPORT HOOKS"""
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_runtest_setup(item):
+    # Per-test seed keeps payloads identical across reruns regardless of test order
+    if Config.DATA_SEED is not None:
+        from utils.data_generator import seed_generators
+        seed_generators(f"{Config.DATA_SEED}:{parallel.stable_nodeid(item)}")
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_protocol(item):
+    from utils.request_metrics import collecting
+    # Collect every request the test (and its fixtures) makes
+    with collecting() as metrics:
+        item.stash[request_metrics_key] = metrics
+        yield
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_makereport(item):
+    outcome = yield
+    report = outcome.get_result()
+
+    # Add custom markers and request latency stats to the report
+    if report.when == 'call':
+        case_id = item.get_closest_marker('case_id')
+        title = item.get_closest_marker('title')
+
+        if case_id:
+            report.case_id = case_id.args[0] if case_id.args else 'N/A'
+        if title:
+            report.title = title.args[0] if title.args else 'N/A'
+
+        metrics = item.stash.get(request_metrics_key, None)
+        if metrics:
+            report.latency = metrics.total().summary()
+            report.latency_histograms = metrics.to_dict()
+
+        payload_results = item.stash.get(payload_results_key, None)
+        if payload_results:
+            report.payload_results = [result.to_dict() for result in payload_results]
+
+    # Phase timings of everything since the previous test, fixtures included
+    if report.when == 'teardown' and Config.PROFILE_REQUESTS:
+        from utils.request_profiler import RequestProfiler
+        report.request_profile = RequestProfiler.shared().profile.drain()
+
+
+def pytest_runtest_logreport(report):
+    histograms = getattr(report, 'latency_histograms', None)
+    if histograms:
+        from utils.request_metrics import RequestMetrics
+        session_request_metrics.merge(RequestMetrics.from_dict(histograms).histograms)
+    request_profile = getattr(report, 'request_profile', None)
+    if request_profile:
+        session_request_profile.merge(request_profile)
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_html_results_table_header(cells):
+    cells.insert(1, '<th>Test Case ID</th>')
+    cells.insert(2, '<th>Title</th>')
+    for offset, column in enumerate(LATENCY_COLUMNS):
+        cells.insert(3 + offset, f'<th>{column} (ms)</th>')
+    cells.insert(3 + len(LATENCY_COLUMNS), '<th>Baseline</th>')
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_html_results_table_row(report, cells):
+    case_id = getattr(report, 'case_id', 'N/A')
+    title = getattr(report, 'title', 'N/A')
+    latency = getattr(report, 'latency', None)
+
+    cells.insert(1, f'<td>{case_id}</td>')
+    cells.insert(2, f'<td>{title}</td>')
+    for offset, column in enumerate(LATENCY_COLUMNS):
+        value = f"{latency[column]:.1f}" if latency else '-'
+        cells.insert(3 + offset, f'<td>{value}</td>')
+    cells.insert(3 + len(LATENCY_COLUMNS), f"<td>{getattr(report, 'baseline', '-')}</td>")
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_html_results_table_html(report, data):
+    payload_results = getattr(report, 'payload_results', None)
+    if not payload_results:
+        return
+    rows = []
+    for result in payload_results:
+        elapsed = f"{result['elapsed_ms']:.1f}" if result['elapsed_ms'] is not None else '-'
+        outcome = 'passed' if result['passed'] else 'FAILED'
+        if result['shared']:
+            outcome += ' (shared request)'
+        rows.append(
+            f"<tr><td>{html.escape(result['payload'])}</td><td>{result['status'] or '-'}</td>"
+            f"<td>{elapsed}</td><td>{outcome}</td><td>{html.escape(result['error'] or '')}</td></tr>"
+        )
+    data.append(
+        "<table><tr><th>Payload</th><th>Status</th><th>ms</th><th>Outcome</th><th>Error</th></tr>"
+        f"{''.join(rows)}</table>"
+    )
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_html_results_summary(postfix):
+    if not session_request_metrics.histograms:
+        return
+    rows = []
+    for key, histogram in sorted(session_request_metrics.histograms.items()):
+        stats = histogram.summary()
+        rows.append(
+            f"<tr><td>{key}</td><td>{stats['count']}</td>"
+            + "".join(f"<td>{stats[column]:.1f}</td>" for column in LATENCY_COLUMNS)
+            + "</tr>"
+        )
+    header = "".join(f"<th>{column} (ms)</th>" for column in LATENCY_COLUMNS)
+    postfix.append(
+        "<h2>Request latency by endpoint</h2>"
+        f"<table><tr><th>Endpoint</th><th>Requests</th>{header}</tr>{''.join(rows)}</table>"
+    )
+    if session_request_profile is not None and session_request_profile.phases:
+        from utils.request_profiler import html_table
+        postfix.append(html_table(session_request_profile.summary()))
+
+
+@pytest.fixture(scope="session")
+def stub_server(pytestconfig):
+    """Start the in-process stand-in API and point Config.BASE_URL at it"""
+    if not Config.USE_STUB_SERVER:
+        yield None
+        return
+
+    shared_url = parallel.worker_input(pytestconfig, "stub_server_url")
+    if shared_url:
+        # xdist worker: the controller already runs the server
+        Config.BASE_URL = shared_url
+        yield None
+        return
+
+    from utils.stub_server import StubServer
+    original_base_url = Config.BASE_URL
+    with StubServer() as server:
+        Config.BASE_URL = server.url
+        yield server
+    Config.BASE_URL = original_base_url
 
 
 @pytest.fixture(scope="session")
-def api_client():
+def api_client(stub_server):
     """Create API client instance"""
-    return APIClient()
+    from utils.api_client import APIClient
+    client = APIClient()
+    yield client
+    client.close()
+
+
+@pytest.fixture
+def live_api_client(stub_server):
+    """API client that bypasses the cassette, for tests observing the server's concurrent behaviour"""
+    from utils.api_client import APIClient
+    client = APIClient(cassette=False)
+    yield client
+    client.close()
+
+
+@pytest.fixture
+def async_api_client(stub_server):
+    """Create an asyncio API client; enter it with ``async with`` inside the test's event loop"""
+    from utils.async_api_client import AsyncAPIClient
+    return AsyncAPIClient()
+
+
+@pytest.fixture
+def stub_api_client():
+    """Create API clients answered in memory by a StubTransport, for measuring client overhead"""
+    from utils.api_client import APIClient
+    from utils.transport import StubTransport
+
+    def _create(status_code=200, body=b""):
+        client = APIClient(response_cache=False, transport=StubTransport(status_code, body))
+        client.profiler = None   # nothing to time without a connection
+        return client
+
+    return _create
 
     """PING FIXTURES"""
 
 @pytest.fixture(scope="module")
-def ping_response(api_client):
+def shared_ping(api_client):
+    """Ping response shared by the module, with the latency of its request"""
+    from utils.request_metrics import isolated
+    with isolated() as metrics:
+        response = api_client.get(Config.PING_ENDPOINT)
+    return response, metrics
+
+
+@pytest.fixture
+def ping_response(shared_ping, request):
     """Get ping/health check response"""
-    return api_client.get(Config.PING_ENDPOINT)
+    response, metrics = shared_ping
+    # Every test using the shared response reports its latency, so each gets a baseline sample
+    request.node.stash[request_metrics_key].merge(metrics.histograms)
+    return response
+
+    """AUTH FIXTURES"""
+
+@pytest.fixture
+def payload_matrix(api_client, request):
+    """PayloadMatrix whose per-payload results are added to the test's report"""
+    from utils.payload_matrix import PayloadMatrix
+    matrix = PayloadMatrix(api_client)
+    request.node.stash[payload_results_key] = matrix.results
+    return matrix
 
     """BOOKING FIXTURES"""
 
 @pytest.fixture
 def booking_data():
     """Generate test booking data"""
+    from utils.data_generator import generate_booking_data
     return generate_booking_data()
 
 
+@pytest.fixture(scope="session")
+def booking_pool(api_client, pytestconfig):
+    """Pre-created bookings shared by read-only tests"""
+    from utils.booking_pool import BookingPool
+    shared_dir = pytestconfig.stash[shared_dir_key]
+    if shared_dir:
+        # xdist: the first worker builds the pool for the whole run; the controller cleans it up
+        bookings = parallel.run_once(
+            os.path.join(shared_dir, BOOKING_POOL_FILE),
+            lambda: BookingPool(api_client).fill().bookings,
+        )
+        yield BookingPool.from_bookings(api_client, bookings)
+        return
+
+    pool = BookingPool(api_client).fill()
+    yield pool
+    pytestconfig.stash[cleanup_failures_key].extend(pool.cleanup())
+
+
 @pytest.fixture
-def create_booking(api_client):
+def create_booking(api_client, pytestconfig):
     """Create a booking and return booking ID"""
+    from utils.booking_pool import bulk_delete
+    from utils.data_generator import generate_booking_data
     created_bookings = []
 
     def _create(data=None):
@@ -46,7 +565,17 @@ def create_booking(api_client):
 
     yield _create
 
-    # Cleanup: delete created bookings
-    api_client.get_auth_token()
-    for booking_id in created_bookings:
-        api_client.delete(f"/booking/{booking_id}")
\ No newline at end of file
+    # Cleanup: delete created bookings concurrently
+    pytestconfig.stash[cleanup_failures_key].extend(bulk_delete(api_client, created_bookings))
+
+
+    """LOAD FIXTURES"""
+
+@pytest.fixture
+def load_result(request, api_client):
+    """Run the test's ``load_profile`` marker and return its LoadResult"""
+    marker = request.node.get_closest_marker("load_profile")
+    if marker is None:
+        pytest.fail("load_result fixture requires a @pytest.mark.load_profile(...) marker")
+    from utils.load import LoadProfile, run_load
+    return run_load(LoadProfile(*marker.args, **marker.kwargs))
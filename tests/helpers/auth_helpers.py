@@ -1,4 +1,6 @@
 """AUTH HELPERS"""
+from utils.schema import AUTH_TOKEN, BAD_CREDENTIALS, response_json
+
 
 def assert_bad_credentials_response(response, message=""):
     """
@@ -14,17 +16,23 @@ def assert_bad_credentials_response(response, message=""):
     assert response.status_code in (200, 401), (
         f"{message}Expected 200/401, got: {response.status_code}"
     )
+    BAD_CREDENTIALS.assert_response(response, message)
 
-    try:
-        response_json = response.json()
-    except ValueError:
-        raise AssertionError(f"{message}Response is not valid JSON")
 
-    assert "reason" in response_json, (
-        f"{message}Response missing 'reason' field. Got: {response_json}"
-    )
-    assert response_json["reason"] == "Bad credentials", (
-        f"{message}Unexpected reason: {response_json['reason']}"
+def assert_rejected_without_token(response, message=""):
+    """
+    Helper to validate that a hostile payload was rejected without issuing a token
+
+    Args:
+        response: API response object
+        message: Optional prefix for assertion messages
+
+    Raises:
+        AssertionError: If the payload was not rejected or a token came back
+    """
+    assert_bad_credentials_response(response, message)
+    assert response_json(response).get("token") is None, (
+        f"{message}Security issue: payload returned a valid token!"
     )
 
 
@@ -45,19 +53,4 @@ def assert_successful_auth_response(response, message=""):
     assert response.status_code in (200, 201), (
         f"{message}Unexpected status code: {response.status_code}"
     )
-
-    try:
-        response_json = response.json()
-    except ValueError:
-        raise AssertionError(f"{message}Response is not valid JSON")
-
-    assert "token" in response_json, (
-        f"{message}Response missing 'token' field. Got: {response_json}"
-    )
-    token = response_json["token"]
-    assert isinstance(token, str), (
-        f"{message}Token is not a string: {type(token)}"
-    )
-    assert len(token) > 0, f"{message}Token is empty"
-
-    return token
\ No newline at end of file
+    return AUTH_TOKEN.assert_response(response, message)["token"]
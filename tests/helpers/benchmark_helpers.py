@@ -0,0 +1,26 @@
+"""BENCHMARK HELPERS"""
+from config import Config
+from utils.microbenchmark import Budgets
+
+
+def assert_within_budget(name, measurement, message=""):
+    """
+    Helper to check a microbenchmark measurement against its stored budget
+
+    With Config.MICROBENCH_UPDATE set, the budget is re-recorded from the
+    measurement instead of checked.
+
+    Args:
+        name: Budget name, e.g. ``api_client.get``
+        measurement: Measurement returned by utils.microbenchmark.measure()
+        message: Optional prefix for assertion messages
+
+    Raises:
+        AssertionError: If ns/op or KiB/op is over budget, or no budget is stored
+    """
+    budgets = Budgets(Config.MICROBENCH_BUDGETS, Config.MICROBENCH_TIME_FACTOR)
+    if Config.MICROBENCH_UPDATE:
+        budgets.record(name, measurement)
+        return
+    failures = budgets.check(name, measurement)
+    assert not failures, f"{message}{'; '.join(failures)}"
@@ -0,0 +1,70 @@
+"""LOAD HELPERS"""
+
+def assert_load_slo(result, min_throughput=None, max_p99_ms=None, max_p90_ms=None,
+                    min_success_rate=None, message=""):
+    """
+    Helper to validate a load run against throughput and latency SLOs
+
+    Args:
+        result: LoadResult returned by the load_result fixture
+        min_throughput: Minimum completed requests per second
+        max_p99_ms: Maximum p99 latency in milliseconds
+        max_p90_ms: Maximum p90 latency in milliseconds
+        min_success_rate: Minimum fraction of requests with status < 400
+        message: Optional prefix for assertion messages
+
+    Raises:
+        AssertionError: If any SLO is breached
+    """
+    assert result.requests > 0, f"{message}Load run completed no requests"
+
+    if min_success_rate is not None:
+        assert result.success_rate >= min_success_rate, (
+            f"{message}Success rate {result.success_rate:.1%} below {min_success_rate:.1%}. "
+            f"Errors per operation: {result.errors}"
+        )
+    if min_throughput is not None:
+        assert result.throughput >= min_throughput, (
+            f"{message}Throughput {result.throughput:.1f} req/s below {min_throughput} req/s"
+        )
+    if max_p90_ms is not None:
+        p90 = result.percentile(90)
+        assert p90 <= max_p90_ms, f"{message}p90 latency {p90:.1f}ms exceeds {max_p90_ms}ms"
+    if max_p99_ms is not None:
+        p99 = result.percentile(99)
+        assert p99 <= max_p99_ms, f"{message}p99 latency {p99:.1f}ms exceeds {max_p99_ms}ms"
+
+
+def assert_soak_stable(report, max_rss_growth_mb=None, max_traced_growth_mb=None,
+                       max_connection_growth=None, max_p99_increase_ms=None, message=""):
+    """
+    Helper to validate the resource and latency trends of a monitored soak run
+
+    Growth is the change along the least-squares trend line from the first
+    sample after warm-up to the last, so a single spike does not fail the run
+    but a steady climb does.
+
+    Args:
+        report: SoakReport from ``load_result.soak`` (profile with ``monitor=True``)
+        max_rss_growth_mb: Maximum client RSS growth in MB
+        max_traced_growth_mb: Maximum growth of memory traced by tracemalloc in MB
+        max_connection_growth: Maximum growth in open pooled connections
+        max_p99_increase_ms: Maximum p99 increase of any operation in milliseconds
+        message: Optional prefix for assertion messages
+
+    Raises:
+        AssertionError: If any series grows more than allowed
+    """
+    assert report is not None, f"{message}Load run was not monitored; use load_profile(..., monitor=True)"
+
+    limits = {"rss_mb": max_rss_growth_mb, "traced_mb": max_traced_growth_mb, "open_connections": max_connection_growth}
+    for name, trend in report.trends().items():
+        limit = max_p99_increase_ms if name.startswith("p99_ms:") else limits.get(name)
+        if limit is None or trend is None:
+            continue
+        detail = ""
+        if name == "traced_mb":
+            detail = "; top allocators (KiB now, KiB grown): " + ", ".join(
+                f"{site} ({size}, {grown:+})" for site, size, grown in report.allocator_growth()[:5]
+            )
+        assert trend.change <= limit, f"{message}{name} trends up by {trend.change:.2f} (limit {limit}): {trend!r}{detail}"
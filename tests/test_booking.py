@@ -0,0 +1,69 @@
+import pytest
+from config import Config
+from utils.schema import BOOKING, BOOKING_ID_LIST
+
+
+@pytest.mark.booking
+class TestBooking:
+
+    @pytest.mark.case_id("GET-001")
+    @pytest.mark.title("Get all booking IDs without filters")
+    def test_get_all_booking_ids(self, api_client, booking_pool):
+        response = api_client.get(Config.BOOKING_ENDPOINT)
+        assert response.status_code == 200, f"Unexpected status code: {response.status_code}"
+
+        booking_ids = {booking["bookingid"] for booking in BOOKING_ID_LIST.assert_response(response)}
+        booking_id, _ = booking_pool.acquire()
+        assert booking_id in booking_ids, f"Booking {booking_id} missing from booking list"
+
+    @pytest.mark.case_id("GET-002")
+    @pytest.mark.title("Filter by firstname")
+    def test_filter_by_firstname(self, api_client, booking_pool):
+        booking_id, data = booking_pool.acquire()
+        # A set drains the stream; "in" on the generator would leave it suspended with the response open
+        booking_ids = set(api_client.iter_booking_ids(params={"firstname": data["firstname"]}))
+        assert booking_id in booking_ids, (
+            f"Booking {booking_id} not returned for firstname {data['firstname']!r}"
+        )
+
+    @pytest.mark.case_id("GET-ID-001")
+    @pytest.mark.title("Get existing booking with valid ID")
+    def test_get_booking_by_id(self, api_client, booking_pool):
+        booking_id, data = booking_pool.acquire()
+        response = api_client.get(f"{Config.BOOKING_ENDPOINT}/{booking_id}")
+        assert response.status_code == 200, f"Unexpected status code: {response.status_code}"
+
+        booking = BOOKING.assert_response(response)
+        for field in ("firstname", "lastname", "totalprice", "depositpaid", "bookingdates"):
+            assert booking[field] == data[field], (
+                f"Field '{field}' mismatch: {booking[field]!r} != {data[field]!r}"
+            )
+
+    @pytest.mark.case_id("GET-ID-009")
+    @pytest.mark.title("Non-existent booking ID")
+    def test_get_non_existent_booking(self, api_client):
+        response = api_client.get(f"{Config.BOOKING_ENDPOINT}/999999999")
+        assert response.status_code == 404, f"Unexpected status code: {response.status_code}"
+        assert response.text == "Not Found", f"Unexpected response body: {response.text!r}"
+
+    @pytest.mark.case_id("POST-003")
+    @pytest.mark.title("Verify created booking can be retrieved")
+    def test_created_booking_can_be_retrieved(self, api_client, create_booking, booking_data):
+        booking_id, data = create_booking(booking_data)
+        assert booking_id is not None, "Booking was not created"
+
+        response = api_client.get(f"{Config.BOOKING_ENDPOINT}/{booking_id}")
+        assert response.status_code == 200, f"Unexpected status code: {response.status_code}"
+        assert response.json()["firstname"] == data["firstname"], "Retrieved booking differs from created one"
+
+    @pytest.mark.case_id("DEL-001")
+    @pytest.mark.title("Delete existing booking with valid token")
+    def test_delete_booking(self, api_client, create_booking):
+        booking_id, _ = create_booking()
+        api_client.get_auth_token()
+
+        response = api_client.delete(f"{Config.BOOKING_ENDPOINT}/{booking_id}")
+        assert response.status_code == 201, f"Unexpected status code: {response.status_code}"
+
+        response = api_client.get(f"{Config.BOOKING_ENDPOINT}/{booking_id}")
+        assert response.status_code == 404, "Deleted booking is still retrievable"
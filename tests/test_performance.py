@@ -0,0 +1,206 @@
+import asyncio
+import time
+import pytest
+from config import Config
+from tests.helpers.auth_helpers import assert_successful_auth_response
+from tests.helpers.load_helpers import assert_load_slo, assert_soak_stable
+from utils.api_client import APIClient
+from utils.booking_pool import bulk_create, bulk_delete, iter_booking_details
+from utils.data_generator import generate_booking_data, generate_bookings
+from utils.linearizability import check_linearizable, record_booking_history
+from utils.load import LoadProfile, constant, run_load_processes, soak, spike, stress
+from utils.schema import BOOKING, response_json
+from utils.transport import TRANSPORTS
+from utils.transport_benchmark import benchmark_transport, format_table
+
+
+@pytest.mark.performance
+class TestPerformance:
+
+    @pytest.mark.case_id("PERF-007")
+    @pytest.mark.title("Load test - 50 concurrent users")
+    def test_load_50_concurrent_users(self, async_api_client):
+        async def scenario():
+            async with async_api_client as client:
+                created = await client.create_bookings(50, concurrency=50)
+                booking_ids = [booking_id for booking_id, _ in created if booking_id is not None]
+                details = await client.get_bookings(booking_ids, concurrency=50)
+                await client.delete_bookings(booking_ids, concurrency=50)
+                return created, details
+
+        created, details = asyncio.run(scenario())
+
+        successes = [response for response in details.values() if response.status_code == 200]
+        success_rate = len(successes) / len(created)
+        assert success_rate >= 0.9, f"Success rate {success_rate:.0%} below 90%"
+
+        invalid = BOOKING.validate_responses(successes)
+        assert not invalid, f"{len(invalid)} booking responses failed schema validation: {invalid}"
+
+        for booking_id, data in created:
+            if booking_id in details and details[booking_id].status_code == 200:
+                assert response_json(details[booking_id])["firstname"] == data["firstname"], (
+                    f"Booking {booking_id} returned data for a different user"
+                )
+
+    @pytest.mark.case_id("PERF-008")
+    @pytest.mark.title("Load test - 100 concurrent users")
+    def test_load_100_concurrent_users(self, async_api_client):
+        form_data = {
+            "username": Config.USERNAME,
+            "password": Config.PASSWORD
+        }
+
+        async def scenario():
+            async with async_api_client as client:
+                start_time = time.perf_counter()
+                responses = await client.gather(
+                    [lambda: client.post(Config.AUTH_ENDPOINT, data=form_data)
+                     for _ in range(100)],
+                    concurrency=100,
+                )
+                return responses, time.perf_counter() - start_time
+
+        responses, elapsed = asyncio.run(scenario())
+
+        for idx, response in enumerate(responses):
+            assert_successful_auth_response(response, f"User {idx}: ")
+
+        print(f"\n100 concurrent auth requests completed in {elapsed * 1000:.2f}ms")
+
+    @pytest.mark.case_id("PERF-013")
+    @pytest.mark.title("Rapid successive creates")
+    def test_rapid_successive_creates(self, async_api_client):
+        payloads = generate_bookings(200, seed=13)
+
+        async def scenario():
+            async with async_api_client as client:
+                created = await client.create_bookings(payloads, concurrency=50)
+                await client.delete_bookings(
+                    [booking_id for booking_id, _ in created if booking_id is not None]
+                )
+                return created
+
+        created = asyncio.run(scenario())
+        booking_ids = [booking_id for booking_id, _ in created]
+
+        assert None not in booking_ids, f"{booking_ids.count(None)} of {len(payloads)} creates failed"
+        assert len(set(booking_ids)) == len(booking_ids), "Duplicate booking IDs generated under load"
+
+    @pytest.mark.case_id("PERF-014")
+    @pytest.mark.title("Rapid successive updates to same booking - no data corruption")
+    def test_rapid_successive_updates_same_booking(self, live_api_client):
+        response = live_api_client.post(Config.BOOKING_ENDPOINT, json=generate_booking_data())
+        assert response.status_code == 200, f"Failed to create booking: {response.status_code}"
+        booking_id = response.json()["bookingid"]
+        endpoint = f"{Config.BOOKING_ENDPOINT}/{booking_id}"
+        live_api_client.get_auth_token()
+        try:
+            initial = live_api_client.get(endpoint).json()
+            history = record_booking_history(live_api_client, booking_id, initial, seed=14)
+        finally:
+            live_api_client.delete(endpoint)
+
+        observed = sum(1 for operation in history.operations if operation.observed is not None)
+        assert observed >= len(history) * 0.9, f"Only {observed} of {len(history)} operations succeeded"
+        result = check_linearizable(history, initial)
+        assert result.ok, result.explain()
+        print(f"\n{result.explain()}")
+
+    @pytest.mark.title("Transport backends - same results, benchmarked side by side")
+    @pytest.mark.parametrize("transport", list(TRANSPORTS))
+    def test_transport_backends(self, stub_server, transport):
+        # A cassette would replace the transport under test
+        client = APIClient(response_cache=False, transport=transport, cassette=False)
+        try:
+            client.get_auth_token()
+            data = generate_booking_data()
+            response = client.post(Config.BOOKING_ENDPOINT, json=data)
+            assert response.status_code == 200, f"{transport}: create returned {response.status_code}"
+            booking_id = response.json()["bookingid"]
+            endpoint = f"{Config.BOOKING_ENDPOINT}/{booking_id}"
+            firstname = f"Transport{booking_id}"
+
+            booking = client.get(endpoint).json()
+            assert (booking["firstname"], booking["lastname"]) == (data["firstname"], data["lastname"]), (
+                f"{transport}: booking read back differs"
+            )
+            response = client.patch(endpoint, json={"firstname": firstname})
+            assert response.status_code == 200, f"{transport}: patch returned {response.status_code}"
+            response = client.get(Config.BOOKING_ENDPOINT, params={"firstname": firstname})
+            assert {"bookingid": booking_id} in response.json(), f"{transport}: search missed the booking"
+
+            result = benchmark_transport(transport, requests=50, threads=4, endpoint=endpoint, alloc_requests=10)
+            assert result["errors"] == 0, f"{transport}: {result['errors']} of 50 benchmark requests failed"
+            print(f"\n{format_table([result])}")
+
+            assert client.delete(endpoint).status_code in (200, 201)
+            assert client.get(endpoint).status_code == 404, f"{transport}: deleted booking still readable"
+        finally:
+            client.close()
+
+    @pytest.mark.case_id("PERF-012")
+    @pytest.mark.title("Large dataset - List all bookings (1000+)")
+    def test_list_all_bookings_large_dataset(self, api_client):
+        # Top the server up to 1000 bookings (a fresh stub server starts almost empty)
+        shortfall = 1000 - sum(1 for _ in api_client.iter_booking_ids())
+        created = bulk_create(api_client, generate_bookings(shortfall, seed=12)) if shortfall > 0 else []
+
+        try:
+            start_time = time.perf_counter()
+            statuses = {}
+            for booking_id, response in iter_booking_details(api_client, api_client.iter_booking_ids()):
+                statuses[booking_id] = response.status_code
+            elapsed = time.perf_counter() - start_time
+        finally:
+            bulk_delete(api_client, (booking_id for booking_id, _ in created))
+
+        assert len(statuses) >= 1000, f"Only {len(statuses)} bookings listed"
+        # Other clients may delete bookings between listing and fetching them
+        unexpected = {booking_id: status for booking_id, status in statuses.items() if status not in (200, 404)}
+        assert not unexpected, f"Unexpected detail responses: {dict(list(unexpected.items())[:10])}"
+        print(f"\nListed and fetched {len(statuses)} bookings in {elapsed:.2f}s")
+
+    @pytest.mark.case_id("PERF-009")
+    @pytest.mark.title("Stress test - increasing load")
+    @pytest.mark.load_profile(stress(start=10, step=10, steps=3, step_duration=1), model="open")
+    def test_stress_increasing_load(self, load_result):
+        print(f"\n{load_result}")
+        assert_load_slo(load_result, min_success_rate=0.9, max_p99_ms=2000)
+
+    @pytest.mark.case_id("PERF-010")
+    @pytest.mark.title("Spike test - sudden traffic increase")
+    @pytest.mark.load_profile(
+        spike(base=5, peak=50, duration=3, spike_at=1, spike_duration=0.5, rise=0.1),
+        model="open",
+    )
+    def test_spike_sudden_traffic_increase(self, load_result):
+        assert_load_slo(load_result, min_success_rate=0.9, max_p99_ms=3000)
+
+    @pytest.mark.case_id("PERF-011")
+    @pytest.mark.title("Endurance test - sustained load")
+    @pytest.mark.load_profile(
+        soak(target=5, duration=Config.SOAK_DURATION), model="closed", pacing=0.1, monitor=True
+    )
+    def test_endurance_sustained_load(self, load_result):
+        assert_load_slo(load_result, min_success_rate=0.95, max_p90_ms=2000, min_throughput=10)
+        # No client-side leak and no server-side degradation over the run
+        assert_soak_stable(
+            load_result.soak,
+            max_rss_growth_mb=50,
+            max_traced_growth_mb=20,
+            max_connection_growth=5,
+            max_p99_increase_ms=1000,
+        )
+
+    @pytest.mark.title("Load split across processes - merged result, warmed up before the clock starts")
+    def test_load_across_processes(self, stub_server):
+        profile = LoadProfile(
+            constant(20, duration=1), mix={"ping": 3, "get_booking": 2, "create_booking": 1}, max_workers=4, seed=17
+        )
+        result = run_load_processes(profile, processes=2)
+
+        print(f"\n{result}")
+        assert result.requests >= 15, f"Only {result.requests} of ~20 scheduled requests sent"
+        # Cold, worker start-up (Faker, token fetch, TCP connects) put p99 in the seconds
+        assert_load_slo(result, min_success_rate=0.95, max_p99_ms=500)
@@ -2,6 +2,7 @@ import pytest
 from config import Config
 import logging
 
+@pytest.mark.smoke
 class TestPing:
 
     @pytest.mark.case_id("PING-001")
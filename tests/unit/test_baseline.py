@@ -0,0 +1,76 @@
+import pytest
+from utils.baseline import IMPROVEMENT, INSUFFICIENT, REGRESSION, UNCHANGED, BaselinePlugin, BaselineStore
+from utils.histogram import LatencyHistogram
+
+# p90 (ms) of one request per run, as most cases record
+STORED_RUNS_MS = [20.1, 21.4, 19.8, 22.0, 20.6, 23.1, 19.5, 21.0, 20.3, 22.4]
+
+
+class LogReport:
+    """The parts of a test report BaselinePlugin reads"""
+
+    def __init__(self, case_id, *latencies_ms):
+        histogram = LatencyHistogram()
+        for latency in latencies_ms:
+            histogram.record(latency / 1000)
+        self.case_id = case_id
+        self.latency_histograms = {"GET /booking/{id}": histogram.to_dict()}
+        self.passed = True
+
+
+def baseline_plugin(path, runs_ms):
+    """BaselinePlugin over a store holding one single-request run per entry of ``runs_ms``"""
+    store = BaselineStore(path, "stub")
+    for latency in runs_ms:
+        histogram = LatencyHistogram()
+        histogram.record(latency / 1000)
+        store.save_run({"BOOK-001": ("passed", histogram)})
+    return BaselinePlugin(store)
+
+
+class TestBaseline:
+
+    @pytest.mark.title("Single-request run twice as slow as the stored runs - flagged as regression")
+    def test_single_request_regression_flagged(self, tmp_path):
+        plugin = baseline_plugin(tmp_path / "baseline.db", STORED_RUNS_MS)
+        report = LogReport("BOOK-001", 42.0)
+        plugin.pytest_runtest_logreport(report)
+        plugin.store.close()
+
+        comparison = plugin.comparisons["BOOK-001"]
+        assert comparison.verdict == REGRESSION, report.baseline
+        assert comparison.baseline_runs == len(STORED_RUNS_MS)
+        assert report.baseline.startswith("regression: p90")
+
+    @pytest.mark.title("Single-request runs within the stored spread - unchanged")
+    def test_single_request_within_spread_unchanged(self, tmp_path):
+        plugin = baseline_plugin(tmp_path / "baseline.db", STORED_RUNS_MS)
+        for latency in (19.6, 21.2, 23.0):
+            plugin.pytest_runtest_logreport(LogReport("BOOK-001", latency))
+            assert plugin.comparisons["BOOK-001"].verdict == UNCHANGED, latency
+            plugin.cases.clear()
+        plugin.store.close()
+
+    @pytest.mark.title("Single-request run much faster than the stored runs - flagged as improvement")
+    def test_single_request_improvement_flagged(self, tmp_path):
+        plugin = baseline_plugin(tmp_path / "baseline.db", STORED_RUNS_MS)
+        plugin.pytest_runtest_logreport(LogReport("BOOK-001", 9.0))
+        plugin.store.close()
+        assert plugin.comparisons["BOOK-001"].verdict == IMPROVEMENT
+
+    @pytest.mark.title("Fewer stored runs than needed - insufficient data")
+    def test_few_stored_runs_insufficient(self, tmp_path):
+        plugin = baseline_plugin(tmp_path / "baseline.db", STORED_RUNS_MS[:4])
+        plugin.pytest_runtest_logreport(LogReport("BOOK-001", 42.0))
+        plugin.store.close()
+        assert plugin.comparisons["BOOK-001"].verdict == INSUFFICIENT
+
+    @pytest.mark.title("Many-sample runs - compared sample by sample")
+    def test_many_samples_mann_whitney(self, tmp_path):
+        plugin = baseline_plugin(tmp_path / "baseline.db", STORED_RUNS_MS)
+        plugin.pytest_runtest_logreport(LogReport("BOOK-001", *(latency * 2 for latency in STORED_RUNS_MS)))
+        plugin.store.close()
+
+        comparison = plugin.comparisons["BOOK-001"]
+        assert comparison.verdict == REGRESSION
+        assert comparison.baseline_runs == 0 and comparison.p_value < 0.01
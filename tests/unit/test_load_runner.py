@@ -0,0 +1,22 @@
+import pytest
+from utils.load import LatencyRecorder, LoadProfile, constant
+from utils.load.runner import execute_profile, load_client
+from utils.scheduler import RequestScheduler
+from utils.transport import StubTransport
+
+
+class TestLoadRunner:
+
+    @pytest.mark.title("Throttled requests under load - counted as errors, not retried")
+    def test_load_throttled_requests_are_errors(self):
+        client = load_client()
+        client.transport = StubTransport(429, headers={"Retry-After": "0"})
+        client.scheduler = RequestScheduler(retries=3)   # retries on, so only the load client's own setting stops them
+        profile = LoadProfile(constant(20, duration=0.5), mix={"ping": 1})
+        recorder = LatencyRecorder()
+        result = recorder.result(execute_profile(profile, profile.build_model(), recorder, seed=16, client=client))
+
+        assert result.requests, "No requests sent"
+        assert result.error_count == result.requests, f"{result.error_count} of {result.requests} 429s counted as errors"
+        stats = client.scheduler.totals()
+        assert stats["retries"] == 0, f"Load client retried {stats['retries']} throttled responses"
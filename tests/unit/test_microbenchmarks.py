@@ -0,0 +1,128 @@
+import pytest
+from config import Config
+from tests import conftest
+from tests.helpers.auth_helpers import (
+    assert_bad_credentials_response,
+    assert_rejected_without_token,
+    assert_successful_auth_response
+)
+from tests.helpers.benchmark_helpers import assert_within_budget
+from utils.data_generator import generate_booking_data, seed_generators
+from utils.microbenchmark import measure
+from utils.request_metrics import RequestMetrics, isolated
+from utils.transport import StubTransport
+
+BOOKING = {
+    "firstname": "Jim",
+    "lastname": "Brown",
+    "totalprice": 111,
+    "depositpaid": True,
+    "bookingdates": {"checkin": "2018-01-01", "checkout": "2019-01-01"},
+    "additionalneeds": "Breakfast",
+}
+
+
+REPORTED_TEST = """
+import pytest
+
+
+@pytest.mark.case_id("AUTH-001")
+@pytest.mark.title("Valid credentials")
+def test_auth_status_response():
+    pass
+"""
+
+# The API suite's report hooks, on their own in a pytester session
+REPORT_HOOKS_CONFTEST = """
+from tests.conftest import (
+    pytest_html_results_table_row,
+    pytest_runtest_logreport,
+    pytest_runtest_makereport,
+)
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "case_id(id): Test case ID")
+    config.addinivalue_line("markers", "title: Test Case Summary")
+"""
+
+
+@pytest.mark.microbenchmark
+class TestMicrobenchmarks:
+
+    @pytest.mark.title("APIClient GET overhead per request")
+    def test_api_client_get(self, stub_api_client):
+        client = stub_api_client(body=BOOKING)
+        with isolated():
+            measurement = measure(lambda: client.get(f"{Config.BOOKING_ENDPOINT}/1").json())
+        print(f"\napi_client.get: {measurement}")
+        assert_within_budget("api_client.get", measurement)
+
+    @pytest.mark.title("APIClient POST overhead per request")
+    def test_api_client_post(self, stub_api_client):
+        client = stub_api_client(body={"bookingid": 1, "booking": BOOKING})
+        with isolated():
+            measurement = measure(lambda: client.post(Config.BOOKING_ENDPOINT, json=BOOKING).json())
+        print(f"\napi_client.post: {measurement}")
+        assert_within_budget("api_client.post", measurement)
+
+    @pytest.mark.title("APIClient PUT overhead per request - caller headers left untouched")
+    def test_api_client_put(self, stub_api_client):
+        client = stub_api_client(body=BOOKING)
+        client.token = "abc123"
+        headers = {"Accept": "application/json"}
+        with isolated():
+            measurement = measure(
+                lambda: client.put(f"{Config.BOOKING_ENDPOINT}/1", json=BOOKING, headers=headers).json()
+            )
+        print(f"\napi_client.put: {measurement}")
+        assert headers == {"Accept": "application/json"}, f"put() modified the caller's headers: {headers}"
+        assert_within_budget("api_client.put", measurement)
+
+    @pytest.mark.title("Booking payload generation - Faker names and the load runs' name pool")
+    @pytest.mark.parametrize("name_pool", [False, True], ids=["faker", "name_pool"])
+    def test_generate_booking_data(self, name_pool):
+        seed_generators("microbenchmark")
+        measurement = measure(lambda: generate_booking_data(name_pool=name_pool))
+        name = "data_generator.generate_booking_data" + ("[name_pool]" if name_pool else "")
+        print(f"\n{name}: {measurement}")
+        assert_within_budget(name, measurement)
+
+    @pytest.mark.title("Auth response validators")
+    @pytest.mark.parametrize("validator, status_code, body", [
+        (assert_successful_auth_response, 200, {"token": "abc123"}),
+        (assert_bad_credentials_response, 200, {"reason": "Bad credentials"}),
+        (assert_rejected_without_token, 200, {"reason": "Bad credentials"}),
+    ], ids=lambda value: getattr(value, "__name__", None))
+    def test_auth_validators(self, validator, status_code, body):
+        transport = StubTransport(status_code, body)
+        url = f"{Config.BASE_URL}{Config.AUTH_ENDPOINT}"
+
+        def validate():
+            # A fresh response per call, so its body is parsed each time as in a test
+            validator(transport.request("POST", url))
+
+        measurement = measure(validate)
+        print(f"\nauth_helpers.{validator.__name__}: {measurement}")
+        assert_within_budget(f"auth_helpers.{validator.__name__}", measurement)
+
+    @pytest.mark.title("conftest report hooks per test")
+    def test_report_hooks(self, pytester, monkeypatch):
+        pytester.makeconftest(REPORT_HOOKS_CONFTEST)
+        module = pytester.getmodulecol(REPORTED_TEST, configargs=["-p", "no:terminal"])
+        item, = module.collect()
+        monkeypatch.setattr(conftest, "session_request_metrics", RequestMetrics())
+        metrics = item.stash[conftest.request_metrics_key] = RequestMetrics()
+        for seconds in (0.012, 0.015, 0.021, 0.034, 0.110):
+            metrics.record("POST /auth", seconds)
+            metrics.record("GET /booking/{id}", seconds)
+
+        def report_hooks():
+            call = pytest.CallInfo.from_call(lambda: None, "call")
+            report = item.ihook.pytest_runtest_makereport(item=item, call=call)
+            item.ihook.pytest_runtest_logreport(report=report)
+            item.ihook.pytest_html_results_table_row(report=report, cells=[])
+
+        measurement = measure(report_hooks)
+        print(f"\nconftest.report_hooks: {measurement}")
+        assert_within_budget("conftest.report_hooks", measurement)
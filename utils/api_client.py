@@ -1,56 +1,198 @@
+import time
+
 import requests
+
 from config import Config
+from utils.cassette import Cassette
+from utils.json_stream import iter_json_array
+from utils.request_metrics import record_request
+from utils.request_profiler import RequestProfiler
+from utils.response_cache import ResponseCache
+from utils.scheduler import RequestScheduler
+from utils.token_manager import TokenManager
+from utils.transport import create_transport
+
 
 class APIClient:
-    def __init__(self):
+    """
+    Restful-Booker client
+
+    Args:
+        per_thread_session: Give every calling thread its own session (requests
+            transport); None follows Config.SESSION_PER_THREAD
+        response_cache: None follows Config.RESPONSE_CACHE; False keeps this
+            client's reads uncached
+        transport: Transport name (utils/transport.py) or a transport object;
+            None follows Config.TRANSPORT
+        cassette: None follows Config.CASSETTE_MODE; False sends every request to
+            the server (load and consistency runs, which a cassette would distort)
+        throttle_retries: Retries of 429/503 responses; None follows the scheduler
+            (Config.THROTTLE_RETRIES, 0 by default, so tests see every 429)
+    """
+
+    def __init__(self, per_thread_session=None, response_cache=None, transport=None, cassette=None,
+                 throttle_retries=None):
         self.base_url = Config.BASE_URL
-        self.session = requests.Session()
+        if per_thread_session is None:
+            per_thread_session = Config.SESSION_PER_THREAD
+        self.per_thread_session = per_thread_session
+        if transport is None or isinstance(transport, str):
+            self.cassette = Cassette.from_config() if cassette is None else None
+            # Cassettes store requests' PreparedRequest/Response, so they always use requests
+            transport = "requests" if self.cassette is not None else transport or Config.TRANSPORT
+            self.transport = create_transport(transport, per_thread_session)
+            # One token per server and credentials for the whole process. Cassette clients
+            # keep their own: their token fetch is recorded, and a replayed token is fake
+            self.token_manager = TokenManager.shared(
+                self.base_url, Config.USERNAME, Config.PASSWORD, self.cassette is not None
+            )
+        else:
+            self.cassette = None   # a transport object (e.g. StubTransport) answers every request
+            self.transport = transport
+            self.token_manager = TokenManager(self._fetch_auth_token)
+        self.scheduler = RequestScheduler.shared()
+        self.throttle_retries = throttle_retries
+        self.profiler = RequestProfiler.shared() if Config.PROFILE_REQUESTS else None
+        if response_cache is None:
+            response_cache = Config.RESPONSE_CACHE != "off"
+        self.response_cache = ResponseCache.shared() if response_cache else None
         self.token = None
 
+    @property
+    def session(self):
+        """requests.Session of the requests transport (per thread in per-thread mode)"""
+        return self.transport.session
+
+    def close(self):
+        """Close every session (and pooled connection) opened by this client"""
+        self.transport.close()
+
+    def open_connections(self):
+        """Connections open in this client's pools, idle or in use"""
+        return self.transport.open_connections()
+
     def get_auth_token(self):
-        """Get authentication token"""
+        """Get authentication token (cached by the token manager)"""
+        self.token = self.token_manager.get(self._fetch_auth_token)
+        return self.token
+
+    def _fetch_auth_token(self):
         payload = {
             "username": Config.USERNAME,
             "password": Config.PASSWORD
         }
-        response = self.post(Config.AUTH_ENDPOINT, json=payload)
+        if self.cassette is not None:
+            # Whichever test first needs the (shared, cached) token fetches it
+            with self.cassette.scoped("auth-token"):
+                response = self.post(Config.AUTH_ENDPOINT, json=payload)
+        else:
+            response = self.post(Config.AUTH_ENDPOINT, json=payload)
         if response.status_code == 200:
-            self.token = response.json().get("token")
-        return self.token
+            return response.json().get("token")
+        return None
 
-    def get(self, endpoint, **kwargs):
-        """GET request"""
+    def _request(self, method, endpoint, **kwargs):
         url = f"{self.base_url}{endpoint}"
-        return self.session.get(url, timeout=Config.TIMEOUT, **kwargs)
+        # An explicit timeout replaces the endpoint's deadline budget (Config.ENDPOINT_TIMEOUTS)
+        timeout = kwargs.pop('timeout', None)
+
+        def attempt(attempt_timeout):
+            start_time = time.perf_counter()
+            if self.cassette is not None:
+                response = self._send_through_cassette(method, url, timeout=attempt_timeout, **kwargs)
+            elif self.profiler is not None:
+                response = self.profiler.measure(
+                    method, endpoint,
+                    lambda: self.transport.request(method, url, timeout=attempt_timeout, **dict(kwargs, stream=True)),
+                    read_body=not kwargs.get('stream'),
+                )
+            else:
+                response = self.transport.request(method, url, timeout=attempt_timeout, **kwargs)
+            record_request(method, endpoint, time.perf_counter() - start_time)
+            return response
+
+        cache = self.response_cache if method != "GET" else None
+        if cache is None:
+            return self.scheduler.send(method, endpoint, attempt, timeout, self.throttle_retries)
+        cache.begin_write(method, endpoint)
+        try:
+            return self.scheduler.send(method, endpoint, attempt, timeout, self.throttle_retries)
+        finally:
+            # Also after errors: the write may have been applied
+            cache.end_write(method, endpoint)
+
+    def _send_through_cassette(self, method, url, **kwargs):
+        """Same as Session.request(), with the send step going through the cassette"""
+        session = self.session
+        send_kwargs = {
+            key: kwargs.pop(key) for key in ('timeout', 'allow_redirects') if key in kwargs
+        }
+        proxies, stream, verify, cert = (kwargs.pop(key, None) for key in ('proxies', 'stream', 'verify', 'cert'))
+        prepared = session.prepare_request(requests.Request(method, url, **kwargs))
+        send_kwargs.update(session.merge_environment_settings(prepared.url, proxies or {}, stream, verify, cert))
+        return self.cassette.send(session, prepared, **send_kwargs)
+
+    def iter_booking_ids(self, params=None, chunk_size=None):
+        """
+        Stream ``GET /booking`` and yield booking ids while the array is parsed
+
+        The body is read chunk by chunk, so memory use does not depend on how
+        many bookings the server holds.
+
+        Args:
+            params: Optional filters (firstname, lastname, checkin, checkout)
+            chunk_size: Bytes read from the socket at a time
+
+        Yields:
+            int: Booking ids in response order
+        """
+        response = self.get(Config.BOOKING_ENDPOINT, params=params, stream=True)
+        with response:
+            response.raise_for_status()
+            chunks = response.iter_content(chunk_size or Config.STREAM_CHUNK_SIZE)
+            for booking in iter_json_array(chunks):
+                yield booking["bookingid"]
+
+    def get(self, endpoint, **kwargs):
+        """GET request; repeated reads come from the response cache when one is enabled"""
+        cache = self.response_cache
+        key = cache.key(endpoint, **kwargs) if cache is not None else None
+        if key is None:
+            return self._request("GET", endpoint, **kwargs)
+        response, generation = cache.lookup(key)
+        if response is None:
+            response = self._request("GET", endpoint, **kwargs)
+            cache.store(key, response, generation)
+        return response
 
     def post(self, endpoint, **kwargs):
         """POST request"""
-        url = f"{self.base_url}{endpoint}"
-        return self.session.post(url, timeout=Config.TIMEOUT, **kwargs)
+        return self._request("POST", endpoint, **kwargs)
 
     def put(self, endpoint, **kwargs):
         """PUT request"""
-        url = f"{self.base_url}{endpoint}"
-        headers = kwargs.get('headers', {})
-        if self.token:
-            headers['Cookie'] = f"token={self.token}"
-        kwargs['headers'] = headers
-        return self.session.put(url, timeout=Config.TIMEOUT, **kwargs)
+        return self._authenticated_request("PUT", endpoint, **kwargs)
 
     def patch(self, endpoint, **kwargs):
         """PATCH request"""
-        url = f"{self.base_url}{endpoint}"
-        headers = kwargs.get('headers', {})
-        if self.token:
-            headers['Cookie'] = f"token={self.token}"
-        kwargs['headers'] = headers
-        return self.session.patch(url, timeout=Config.TIMEOUT, **kwargs)
+        return self._authenticated_request("PATCH", endpoint, **kwargs)
 
     def delete(self, endpoint, **kwargs):
         """DELETE request"""
-        url = f"{self.base_url}{endpoint}"
-        headers = kwargs.get('headers', {})
-        if self.token:
-            headers['Cookie'] = f"token={self.token}"
-        kwargs['headers'] = headers
-        return self.session.delete(url, timeout=Config.TIMEOUT, **kwargs)
\ No newline at end of file
+        return self._authenticated_request("DELETE", endpoint, **kwargs)
+
+    def _authenticated_request(self, method, endpoint, **kwargs):
+        """Send with the token cookie; on 403 refresh the token once and retry"""
+        token = self.token
+        if token:
+            # A copy: callers reuse their headers dict across requests
+            kwargs['headers'] = dict(kwargs.get('headers') or (), Cookie=f"token={token}")
+        response = self._request(method, endpoint, **kwargs)
+
+        if response.status_code == 403 and token:
+            self.token_manager.invalidate(token)
+            self.token = self.token_manager.get(self._fetch_auth_token)
+            if self.token and self.token != token:
+                kwargs['headers'] = dict(kwargs['headers'], Cookie=f"token={self.token}")
+                response = self._request(method, endpoint, **kwargs)
+        return response
@@ -0,0 +1,150 @@
+import asyncio
+import time
+
+from config import Config
+from utils.data_generator import generate_bookings
+from utils.request_metrics import record_request
+
+
+class AsyncAPIClient:
+    """
+    Asyncio sibling of APIClient with bounded-concurrency bulk helpers
+
+    Usage:
+        async with AsyncAPIClient(max_concurrency=100) as client:
+            created = await client.create_bookings(50)
+    """
+
+    def __init__(self, max_concurrency=None):
+        self.base_url = Config.BASE_URL
+        self.max_concurrency = max_concurrency or Config.ASYNC_MAX_CONCURRENCY
+        self.client = None
+        self.token = None
+
+    async def __aenter__(self):
+        import httpx  # deferred: heavy, and only async tests need it
+
+        limits = httpx.Limits(
+            max_connections=self.max_concurrency,
+            max_keepalive_connections=self.max_concurrency,
+        )
+        self.client = httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=Config.TIMEOUT,
+            verify=Config.VERIFY_SSL,
+            limits=limits,
+        )
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.client.aclose()
+        self.client = None
+
+    async def get_auth_token(self):
+        """Get authentication token"""
+        payload = {
+            "username": Config.USERNAME,
+            "password": Config.PASSWORD
+        }
+        response = await self.post(Config.AUTH_ENDPOINT, json=payload)
+        if response.status_code == 200:
+            self.token = response.json().get("token")
+        return self.token
+
+    async def get(self, endpoint, **kwargs):
+        """GET request"""
+        return await self._request("GET", endpoint, **kwargs)
+
+    async def post(self, endpoint, **kwargs):
+        """POST request"""
+        return await self._request("POST", endpoint, **kwargs)
+
+    async def put(self, endpoint, **kwargs):
+        """PUT request"""
+        kwargs['headers'] = self._auth_headers(kwargs.get('headers'))
+        return await self._request("PUT", endpoint, **kwargs)
+
+    async def patch(self, endpoint, **kwargs):
+        """PATCH request"""
+        kwargs['headers'] = self._auth_headers(kwargs.get('headers'))
+        return await self._request("PATCH", endpoint, **kwargs)
+
+    async def delete(self, endpoint, **kwargs):
+        """DELETE request"""
+        kwargs['headers'] = self._auth_headers(kwargs.get('headers'))
+        return await self._request("DELETE", endpoint, **kwargs)
+
+    async def _request(self, method, endpoint, **kwargs):
+        start_time = time.perf_counter()
+        response = await self.client.request(method, endpoint, **kwargs)
+        record_request(method, endpoint, time.perf_counter() - start_time)
+        return response
+
+    def _auth_headers(self, headers):
+        headers = dict(headers or {})
+        if self.token:
+            headers['Cookie'] = f"token={self.token}"
+        return headers
+
+    async def gather(self, factories, concurrency=None):
+        """
+        Run coroutine factories with at most ``concurrency`` in flight
+
+        Args:
+            factories: Iterable of zero-argument callables returning awaitables
+            concurrency: In-flight limit, defaults to ``max_concurrency``
+
+        Returns:
+            list: Results in the same order as ``factories``
+        """
+        semaphore = asyncio.Semaphore(concurrency or self.max_concurrency)
+
+        async def run(factory):
+            async with semaphore:
+                return await factory()
+
+        return await asyncio.gather(*(run(factory) for factory in factories))
+
+    async def create_bookings(self, bookings, concurrency=None):
+        """
+        Create bookings concurrently
+
+        Args:
+            bookings: Number of random bookings to create, or a list of payloads
+            concurrency: In-flight limit, defaults to ``max_concurrency``
+
+        Returns:
+            list: ``(booking_id, data)`` tuples; ``booking_id`` is None on failure
+        """
+        if isinstance(bookings, int):
+            bookings = generate_bookings(bookings)
+
+        async def create(data):
+            response = await self.post(Config.BOOKING_ENDPOINT, json=data)
+            if response.status_code == 200:
+                return response.json()["bookingid"], data
+            return None, data
+
+        return await self.gather([lambda data=data: create(data) for data in bookings], concurrency)
+
+    async def get_bookings(self, booking_ids, concurrency=None):
+        """Fetch booking details concurrently; returns ``{booking_id: response}``"""
+        booking_ids = list(booking_ids)
+        responses = await self.gather(
+            [lambda booking_id=booking_id: self.get(f"{Config.BOOKING_ENDPOINT}/{booking_id}")
+             for booking_id in booking_ids],
+            concurrency,
+        )
+        return dict(zip(booking_ids, responses))
+
+    async def delete_bookings(self, booking_ids, concurrency=None):
+        """Delete bookings concurrently; returns ``{booking_id: response}``"""
+        if self.token is None:
+            await self.get_auth_token()
+        booking_ids = list(booking_ids)
+        responses = await self.gather(
+            [lambda booking_id=booking_id: self.delete(f"{Config.BOOKING_ENDPOINT}/{booking_id}")
+             for booking_id in booking_ids],
+            concurrency,
+        )
+        return dict(zip(booking_ids, responses))
@@ -0,0 +1,351 @@
+"""Run-over-run latency baselines per test case.
+
+Every run stores each test's request-latency histogram in a SQLite file,
+keyed by its ``case_id`` marker and the target it ran against. A new run is
+compared with the merged histograms of the previous runs using a two-sided
+Mann-Whitney U test computed straight from the bucket counts. Most cases
+send only a request or two per run, too few for that test; their run's p90
+is checked instead against a prediction interval built from the p90s of the
+previous runs. Either way a case is flagged only when the shift is both
+significant and large enough to matter, so noise on a single slow request
+does not trip it the way a fixed ``elapsed < 1s`` threshold does.
+"""
+import json
+import math
+import os
+import sqlite3
+import statistics
+import time
+
+import pytest
+
+from utils.histogram import BUCKET_COUNT, LatencyHistogram
+
+REGRESSION = "regression"
+IMPROVEMENT = "improvement"
+UNCHANGED = "unchanged"
+INSUFFICIENT = "insufficient data"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    started REAL NOT NULL,
+    target TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS case_latency (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    case_id TEXT NOT NULL,
+    outcome TEXT NOT NULL,
+    histogram TEXT NOT NULL,
+    PRIMARY KEY (run_id, case_id)
+);
+CREATE INDEX IF NOT EXISTS case_latency_case ON case_latency (case_id, outcome);
+"""
+
+
+def mann_whitney(baseline, current):
+    """
+    Two-sided Mann-Whitney U test between two latency histograms
+
+    Samples in the same bucket count as ties, which the tie-corrected normal
+    approximation handles; bucket order is value order, so ranks come from
+    one pass over the bucket counts.
+
+    Returns:
+        tuple: ``(u, p_value)`` where ``u`` is the U statistic of ``current``
+    """
+    n1, n2 = baseline.count, current.count
+    total = n1 + n2
+    if not n1 or not n2:
+        return 0.0, 1.0
+
+    rank_sum = 0.0
+    seen = 0
+    tie_term = 0
+    for index in range(BUCKET_COUNT):
+        ties = baseline.counts[index] + current.counts[index]
+        if not ties:
+            continue
+        # Every sample in the bucket gets the average of the ranks it spans
+        rank_sum += current.counts[index] * (seen + (ties + 1) / 2)
+        tie_term += ties ** 3 - ties
+        seen += ties
+
+    u = rank_sum - n2 * (n2 + 1) / 2
+    mean = n1 * n2 / 2
+    variance = n1 * n2 / 12 * ((total + 1) - tie_term / (total * (total - 1)))
+    if variance <= 0:
+        return u, 1.0
+    z = (abs(u - mean) - 0.5) / math.sqrt(variance)
+    return u, min(1.0, math.erfc(max(z, 0.0) / math.sqrt(2)))
+
+
+def t_quantile(p, dof):
+    """
+    Quantile ``p`` of Student's t distribution with ``dof`` degrees of freedom
+
+    Cornish-Fisher expansion around the normal quantile; within 1.5% of the
+    exact value from 4 degrees of freedom up.
+    """
+    z = statistics.NormalDist().inv_cdf(p)
+    return (
+        z
+        + (z ** 3 + z) / (4 * dof)
+        + (5 * z ** 5 + 16 * z ** 3 + 3 * z) / (96 * dof ** 2)
+        + (3 * z ** 7 + 19 * z ** 5 + 17 * z ** 3 - 15 * z) / (384 * dof ** 3)
+    )
+
+
+class Comparison:
+    """Outcome of comparing one case's latencies with its baseline"""
+
+    def __init__(self, case_id, verdict, p_value=None, change=None, baseline_p90=None,
+                 current_p90=None, baseline_count=0, current_count=0, baseline_runs=0):
+        self.case_id = case_id
+        self.verdict = verdict
+        self.p_value = p_value
+        self.change = change
+        self.baseline_p90 = baseline_p90
+        self.current_p90 = current_p90
+        self.baseline_count = baseline_count
+        self.current_count = current_count
+        # Set when this run's p90 was compared with the p90s of previous runs
+        self.baseline_runs = baseline_runs
+
+    @property
+    def flagged(self):
+        return self.verdict in (REGRESSION, IMPROVEMENT)
+
+    def describe(self):
+        if self.verdict == INSUFFICIENT:
+            return f"{self.verdict} ({self.baseline_count} baseline / {self.current_count} new samples)"
+        if self.baseline_runs:
+            return (
+                f"{self.verdict}: p90 {self.baseline_p90:.1f} -> {self.current_p90:.1f} ms "
+                f"({self.change:+.0%} vs the geometric mean of {self.baseline_runs} runs)"
+            )
+        return (
+            f"{self.verdict}: p90 {self.baseline_p90:.1f} -> {self.current_p90:.1f} ms "
+            f"({self.change:+.0%}, p={self.p_value:.3g})"
+        )
+
+
+def compare(case_id, baseline_runs, current, alpha=0.01, min_effect=0.1, min_samples=5, min_runs=5):
+    """
+    Compare ``current`` latencies of one case with its previous runs
+
+    With at least ``min_samples`` samples on both sides the merged baseline
+    and this run are compared sample by sample (Mann-Whitney). Otherwise,
+    given ``min_runs`` previous runs, this run's p90 is compared with theirs
+    (compare_runs()).
+
+    Args:
+        case_id: Test case id the histograms belong to
+        baseline_runs: LatencyHistogram of each previous run
+        current: LatencyHistogram from this run
+        alpha: Significance level of the Mann-Whitney test and the run comparison
+        min_effect: Smallest relative p90 change worth flagging (0.1 = 10%)
+        min_samples: Fewest samples needed on each side to run the Mann-Whitney test
+        min_runs: Fewest previous runs needed to compare run p90s
+
+    Returns:
+        Comparison
+    """
+    baseline = LatencyHistogram()
+    for run in baseline_runs:
+        baseline.merge(run)
+    if baseline.count < min_samples or current.count < min_samples:
+        runs = [run for run in baseline_runs if run.count]
+        if not current.count or len(runs) < min_runs:
+            return Comparison(case_id, INSUFFICIENT, baseline_count=baseline.count,
+                              current_count=current.count)
+        return compare_runs(case_id, [run.percentile(90) for run in runs], current, alpha, min_effect)
+
+    _, p_value = mann_whitney(baseline, current)
+    baseline_p90 = baseline.percentile(90)
+    current_p90 = current.percentile(90)
+    change = current_p90 / baseline_p90 - 1 if baseline_p90 else 0.0
+
+    verdict = UNCHANGED
+    if p_value < alpha and abs(change) >= min_effect:
+        verdict = REGRESSION if change > 0 else IMPROVEMENT
+    return Comparison(case_id, verdict, p_value, change, baseline_p90, current_p90,
+                      baseline.count, current.count)
+
+
+def compare_runs(case_id, run_p90s, current, alpha=0.01, min_effect=0.1):
+    """
+    Compare this run's p90 with the p90 of each previous run
+
+    The previous runs' p90s give a two-sided prediction interval for one more
+    run, in log space since latencies are skewed; this run is flagged when its
+    p90 falls outside it. Run-to-run spread sets the width, so a case with
+    steady timings is flagged on a smaller change than a noisy one.
+
+    Args:
+        case_id: Test case id the histograms belong to
+        run_p90s: p90 (ms) of each previous run, at least two
+        current: LatencyHistogram from this run
+        alpha: Chance of flagging a run that is no different from the previous ones
+        min_effect: Smallest relative change from the runs' geometric mean worth flagging
+
+    Returns:
+        Comparison
+    """
+    runs = len(run_p90s)
+    # The 1us floor keeps log() defined; p90 is 0 only for an empty histogram
+    logs = [math.log(max(p90, 0.001)) for p90 in run_p90s]
+    mean = statistics.fmean(logs)
+    margin = t_quantile(1 - alpha / 2, runs - 1) * statistics.stdev(logs) * math.sqrt(1 + 1 / runs)
+    baseline_p90 = math.exp(mean)
+    current_p90 = current.percentile(90)
+    deviation = math.log(max(current_p90, 0.001)) - mean
+    change = current_p90 / baseline_p90 - 1
+
+    verdict = UNCHANGED
+    if abs(deviation) > margin and abs(change) >= min_effect:
+        verdict = REGRESSION if change > 0 else IMPROVEMENT
+    return Comparison(case_id, verdict, None, change, baseline_p90, current_p90,
+                      current_count=current.count, baseline_runs=runs)
+
+
+class BaselineStore:
+    """
+    SQLite store of per-case latency histograms, one row per case per run
+
+    Args:
+        path: SQLite file, created on first use
+        target: Environment the timings belong to (e.g. the base URL); only
+            runs against the same target are compared
+        window: Number of most recent runs merged into a case's baseline
+    """
+
+    def __init__(self, path, target, window=20):
+        self.path = str(path)
+        self.target = target
+        self.window = window
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connection = sqlite3.connect(self.path)
+        self._connection.executescript(SCHEMA)
+
+    def close(self):
+        self._connection.close()
+
+    def baseline(self, case_id):
+        """Merged histogram of the passing runs of ``case_id`` in the window"""
+        merged = LatencyHistogram()
+        for run in self.baseline_runs(case_id):
+            merged.merge(run)
+        return merged
+
+    def baseline_runs(self, case_id):
+        """Histogram of each passing run of ``case_id`` in the window, newest first"""
+        rows = self._connection.execute(
+            """
+            SELECT case_latency.histogram FROM case_latency
+            JOIN runs ON runs.id = case_latency.run_id
+            WHERE case_latency.case_id = ? AND case_latency.outcome = 'passed' AND runs.target = ?
+            ORDER BY runs.id DESC LIMIT ?
+            """,
+            (case_id, self.target, self.window),
+        )
+        return [LatencyHistogram.from_dict(json.loads(histogram)) for (histogram,) in rows]
+
+    def save_run(self, cases):
+        """
+        Store one run
+
+        Args:
+            cases: ``{case_id: (outcome, LatencyHistogram)}``
+
+        Returns:
+            int: Id of the stored run
+        """
+        with self._connection:
+            run_id = self._connection.execute(
+                "INSERT INTO runs (started, target) VALUES (?, ?)", (time.time(), self.target)
+            ).lastrowid
+            self._connection.executemany(
+                "INSERT INTO case_latency (run_id, case_id, outcome, histogram) VALUES (?, ?, ?, ?)",
+                [
+                    (run_id, case_id, outcome, json.dumps(histogram.to_dict()))
+                    for case_id, (outcome, histogram) in cases.items()
+                ],
+            )
+        return run_id
+
+
+class BaselinePlugin:
+    """
+    pytest plugin comparing each case with its baseline and storing the run
+
+    Registered by conftest on the process that receives every test report
+    (the controller under xdist). Verdicts are attached to reports as
+    ``report.baseline`` for the HTML row and listed in the terminal summary.
+
+    Args:
+        store: BaselineStore to read baselines from and save this run into
+        alpha: Significance level passed to compare()
+        min_effect: Smallest relative p90 change passed to compare()
+    """
+
+    def __init__(self, store, alpha=0.01, min_effect=0.1):
+        self.store = store
+        self.alpha = alpha
+        self.min_effect = min_effect
+        self.cases = {}
+        self.comparisons = {}
+
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_runtest_logreport(self, report):
+        # tryfirst: the verdict must be on the report before pytest-html renders its row
+        case_id = getattr(report, "case_id", None)
+        histograms = getattr(report, "latency_histograms", None)
+        if not case_id or case_id == "N/A" or not histograms:
+            return
+
+        outcome, current = self.cases.get(case_id, ("passed", LatencyHistogram()))
+        for histogram in histograms.values():
+            current.merge(LatencyHistogram.from_dict(histogram))
+        # Parametrized tests share a case_id; one failure keeps the whole run out of the baseline
+        self.cases[case_id] = ("passed" if outcome == "passed" and report.passed else "failed", current)
+
+        comparison = compare(
+            case_id, self.store.baseline_runs(case_id), current,
+            alpha=self.alpha, min_effect=self.min_effect,
+        )
+        self.comparisons[case_id] = comparison
+        report.baseline = comparison.describe()
+
+    def pytest_sessionfinish(self):
+        if self.cases:
+            self.store.save_run(self.cases)
+        self.store.close()
+
+    def pytest_terminal_summary(self, terminalreporter):
+        if not self.comparisons:
+            return
+        flagged = [comparison for comparison in self.comparisons.values() if comparison.flagged]
+        terminalreporter.section("latency baseline")
+        terminalreporter.line(
+            f"{len(self.comparisons)} cases compared with {self.store.path} ({self.store.target}), "
+            f"{len(flagged)} flagged"
+        )
+        for comparison in flagged:
+            terminalreporter.line(f"{comparison.case_id}: {comparison.describe()}")
+
+    @pytest.hookimpl(optionalhook=True)
+    def pytest_html_results_summary(self, postfix):
+        flagged = [comparison for comparison in self.comparisons.values() if comparison.flagged]
+        if not flagged:
+            return
+        rows = "".join(
+            f"<tr><td>{comparison.case_id}</td><td>{comparison.describe()}</td></tr>"
+            for comparison in flagged
+        )
+        postfix.append(
+            "<h2>Latency changes against baseline</h2>"
+            f"<table><tr><th>Test Case ID</th><th>Change</th></tr>{rows}</table>"
+        )
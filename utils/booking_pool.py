@@ -0,0 +1,189 @@
+import itertools
+import threading
+import zlib
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+
+from config import Config
+from utils.data_generator import generate_bookings
+
+# Statuses meaning the booking no longer exists after a DELETE
+DELETED_STATUSES = (200, 201, 204, 404, 405)
+
+
+def bulk_create(api_client, payloads, workers=None):
+    """
+    Create bookings concurrently
+
+    If a create raises, the bookings already created are deleted before the
+    exception propagates, since the caller never learns their ids.
+
+    Args:
+        api_client: APIClient instance
+        payloads: Iterable of booking payloads
+        workers: Maximum concurrent requests
+
+    Returns:
+        list: ``(booking_id, data)`` tuples for the bookings that were created
+    """
+    def create(data):
+        response = api_client.post(Config.BOOKING_ENDPOINT, json=data)
+        if response.status_code == 200:
+            return response.json()["bookingid"], data
+        return None, data
+
+    workers = workers or Config.BOOKING_POOL_WORKERS
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(create, data) for data in payloads]
+        try:
+            for future in as_completed(futures):
+                future.result()
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            wait(futures)   # creates already in flight still land
+            bulk_delete(api_client, (
+                future.result()[0] for future in futures
+                if not future.cancelled() and future.exception() is None and future.result()[0] is not None
+            ), workers)
+            raise
+    return [future.result() for future in futures if future.result()[0] is not None]
+
+
+def bulk_delete(api_client, booking_ids, workers=None):
+    """
+    Delete bookings concurrently
+
+    Args:
+        api_client: APIClient instance
+        booking_ids: Ids of bookings to delete
+        workers: Maximum concurrent requests
+
+    Returns:
+        list: ``(booking_id, reason)`` tuples for bookings that could not be deleted
+    """
+    booking_ids = list(booking_ids)
+    if not booking_ids:
+        return []
+    api_client.get_auth_token()
+
+    def delete(booking_id):
+        try:
+            response = api_client.delete(f"{Config.BOOKING_ENDPOINT}/{booking_id}")
+        except Exception as exc:
+            return booking_id, repr(exc)
+        if response.status_code in DELETED_STATUSES:
+            return None
+        return booking_id, f"HTTP {response.status_code}"
+
+    with ThreadPoolExecutor(max_workers=workers or Config.BOOKING_POOL_WORKERS) as executor:
+        return [failure for failure in executor.map(delete, booking_ids) if failure]
+
+
+def iter_booking_details(api_client, booking_ids, window=None):
+    """
+    Fetch ``GET /booking/:id`` concurrently, keeping at most ``window`` requests in flight
+
+    ``booking_ids`` is consumed lazily, so it can be APIClient.iter_booking_ids()
+    and memory stays bounded by the window whatever the number of bookings.
+
+    Args:
+        api_client: APIClient instance
+        booking_ids: Iterable of booking ids
+        window: Maximum requests in flight
+
+    Yields:
+        tuple: ``(booking_id, response)`` in completion order
+    """
+    window = window or Config.DETAIL_FETCH_WINDOW
+    booking_ids = iter(booking_ids)
+
+    def fetch(booking_id):
+        return booking_id, api_client.get(f"{Config.BOOKING_ENDPOINT}/{booking_id}")
+
+    with ThreadPoolExecutor(max_workers=window) as executor:
+        in_flight = {executor.submit(fetch, booking_id) for booking_id in itertools.islice(booking_ids, window)}
+        while in_flight:
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                # Refill before yielding so the window stays full while the caller works
+                for booking_id in itertools.islice(booking_ids, 1):
+                    in_flight.add(executor.submit(fetch, booking_id))
+                yield future.result()
+
+
+class BookingPool:
+    """
+    Session-level pool of pre-created bookings for tests that only read them
+
+    Bookings are created up front in parallel batches and handed out round-robin,
+    so read-only tests skip their own POST/DELETE round-trips.
+
+    Args:
+        api_client: APIClient instance
+        size: Number of bookings to pre-create
+        batch_size: Bookings created per parallel batch
+        workers: Maximum concurrent requests
+    """
+
+    def __init__(self, api_client, size=None, batch_size=None, workers=None):
+        self.api_client = api_client
+        self.size = size or Config.BOOKING_POOL_SIZE
+        self.batch_size = batch_size or Config.BOOKING_POOL_BATCH_SIZE
+        self.workers = workers or Config.BOOKING_POOL_WORKERS
+        self.bookings = []
+        self._cycle = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.bookings)
+
+    @classmethod
+    def from_bookings(cls, api_client, bookings):
+        """Build a pool around bookings created elsewhere (e.g. by another xdist worker)"""
+        pool = cls(api_client, size=len(bookings))
+        pool.bookings = [(booking_id, data) for booking_id, data in bookings]
+        pool._cycle = itertools.cycle(pool.bookings)
+        return pool
+
+    def fill(self):
+        """Create bookings until the pool holds ``size`` of them; on failure the partial pool is deleted"""
+        try:
+            self._fill()
+        except BaseException:
+            self.cleanup()
+            raise
+        self._cycle = itertools.cycle(self.bookings)
+        return self
+
+    def _fill(self):
+        while len(self.bookings) < self.size:
+            batch = min(self.batch_size, self.size - len(self.bookings))
+            seed = None
+            if Config.DATA_SEED is not None:
+                seed = zlib.crc32(f"{Config.DATA_SEED}:pool:{len(self.bookings)}".encode())
+            created = bulk_create(
+                self.api_client,
+                generate_bookings(batch, seed=seed),
+                self.workers,
+            )
+            if not created:
+                raise RuntimeError("Booking pool could not create any bookings")
+            self.bookings.extend(created)
+
+    def acquire(self):
+        """Return the next ``(booking_id, data)`` pair; callers must not modify it"""
+        with self._lock:
+            if self._cycle is None:
+                self.fill()
+            return next(self._cycle)
+
+    def cleanup(self):
+        """Delete every pooled booking; returns ``(booking_id, reason)`` failures"""
+        failures = bulk_delete(
+            self.api_client,
+            (booking_id for booking_id, _ in self.bookings),
+            self.workers,
+        )
+        self.bookings = []
+        self._cycle = None
+        return failures
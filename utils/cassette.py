@@ -0,0 +1,377 @@
+"""Record/replay layer for APIClient.
+
+Interactions are stored in two files inside the cassette directory:
+
+* ``interactions.dat`` - append-only records: ``<meta_len><body_len>`` header,
+  compact JSON metadata (status, reason, headers, elapsed) and the raw body.
+* ``interactions.idx`` - open-addressing hash table of
+  ``(16-byte fingerprint, data offset)`` slots, memory-mapped so a lookup is a
+  couple of slot probes and one read, with no cassette parsing per test.
+
+Fingerprints cover the method, endpoint (path and sorted query), normalized
+body and the relevant headers with auth tokens masked. Repeated identical
+requests are told apart by their occurrence number within the running test
+(Cassette.scope, set by CassettePlugin), so e.g. three /auth calls replay three
+different recorded tokens. Numbering per test rather than per process keeps
+keys stable whatever the test order or the xdist worker a test runs on.
+Requests whose timing does not belong to one test are counted under scopes
+of their own: "fixture:<name>" for session fixtures, "auth-token" for the
+shared token.
+"""
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from datetime import timedelta
+from urllib.parse import parse_qsl, urlsplit
+
+import pytest
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from config import Config
+from utils.data_generator import seeded
+from utils.file_lock import FileLock
+from utils.parallel import stable_nodeid
+
+MODES = ("off", "record", "replay", "auto")
+
+INDEX_MAGIC = b"RBCASS01"
+INDEX_HEADER = struct.Struct("<8sQQ")      # magic, capacity, count
+INDEX_SLOT = struct.Struct("<16sQ")        # fingerprint, data offset + 1 (0 = empty)
+RECORD_HEADER = struct.Struct("<II")       # metadata length, body length
+INITIAL_CAPACITY = 1024
+MAX_LOAD = 0.6
+
+FINGERPRINT_HEADERS = ("content-type", "accept")
+
+
+class CassetteMiss(Exception):
+    """Raised in replay mode when no recorded interaction matches a request"""
+
+
+def _normalize_body(body, content_type):
+    if not body:
+        return b""
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    if "json" in content_type:
+        try:
+            return json.dumps(json.loads(body), sort_keys=True, separators=(",", ":")).encode()
+        except ValueError:
+            return body
+    if "x-www-form-urlencoded" in content_type:
+        return repr(sorted(parse_qsl(body.decode("utf-8", "replace"), keep_blank_values=True))).encode()
+    return body
+
+
+def fingerprint(prepared):
+    """16-byte fingerprint of a prepared request, with auth tokens masked"""
+    url = urlsplit(prepared.url)
+    query = sorted(parse_qsl(url.query, keep_blank_values=True))
+    headers = prepared.headers
+    content_type = headers.get("Content-Type", "").lower()
+
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{prepared.method} {url.path} {query!r}\n".encode())
+    for name in FINGERPRINT_HEADERS:
+        digest.update(f"{name}:{headers.get(name, '')}\n".encode())
+    # Whether (and how) the request was authenticated matters; the token value does not
+    cookie = headers.get("Cookie", "")
+    digest.update(b"cookie-token:" + (b"1" if "token=" in cookie else b"0"))
+    digest.update(b"authorization:" + headers.get("Authorization", "").split(" ")[0].encode())
+    digest.update(b"\n" + _normalize_body(prepared.body, content_type))
+    return digest.digest()
+
+
+def occurrence_key(request_fingerprint, occurrence, scope=""):
+    return hashlib.blake2b(
+        request_fingerprint + scope.encode() + occurrence.to_bytes(4, "little"), digest_size=16
+    ).digest()
+
+
+class CassetteStore:
+    """Append-only interaction log with a memory-mapped hash index"""
+
+    def __init__(self, directory, writable=False):
+        self.directory = str(directory)
+        self.writable = writable
+        self.data_path = os.path.join(self.directory, "interactions.dat")
+        self.index_path = os.path.join(self.directory, "interactions.idx")
+        self.lock_path = os.path.join(self.directory, "interactions.lock")
+        self._lock = threading.Lock()
+        self._index = None
+        self._index_stat = None
+        self._data = None
+        if writable:
+            os.makedirs(self.directory, exist_ok=True)
+            with FileLock(self.lock_path):
+                if not os.path.exists(self.index_path):
+                    self._write_empty_index(self.index_path, INITIAL_CAPACITY)
+                open(self.data_path, "ab").close()
+
+    def __len__(self):
+        with self._lock:
+            if not self._map_index():
+                return 0
+            return INDEX_HEADER.unpack_from(self._index, 0)[2]
+
+    def get(self, key):
+        """Return ``(metadata, body)`` stored under ``key``, or None"""
+        with self._lock:
+            if not self._map_index():
+                return None
+            offset = self._find(self._index, key)[1]
+            if not offset:
+                return None
+            return self._read_record(offset - 1)
+
+    def put(self, key, metadata, body):
+        with self._lock, FileLock(self.lock_path):
+            meta = json.dumps(metadata, separators=(",", ":")).encode()
+            with open(self.data_path, "ab") as data:
+                offset = data.tell()
+                data.write(RECORD_HEADER.pack(len(meta), len(body)) + meta + body)
+            if self._data is not None:
+                self._data.close()
+                self._data = None
+
+            self._map_index()
+            _, capacity, count = INDEX_HEADER.unpack_from(self._index, 0)
+            if (count + 1) / capacity > MAX_LOAD:
+                self._grow(capacity * 2)
+                _, capacity, count = INDEX_HEADER.unpack_from(self._index, 0)
+            slot, existing = self._find(self._index, key)
+            INDEX_SLOT.pack_into(self._index, INDEX_HEADER.size + slot * INDEX_SLOT.size, key, offset + 1)
+            if not existing:
+                INDEX_HEADER.pack_into(self._index, 0, INDEX_MAGIC, capacity, count + 1)
+
+    def close(self):
+        with self._lock:
+            for handle in (self._index, self._data):
+                if handle is not None:
+                    handle.close()
+            self._index = self._data = None
+
+    def _map_index(self):
+        """(Re)map the index if it is new or was replaced by another process"""
+        try:
+            stat = os.stat(self.index_path)
+        except OSError:
+            return False
+        identity = (stat.st_ino, stat.st_size)
+        if self._index is not None and identity == self._index_stat:
+            return True
+        if self._index is not None:
+            self._index.close()
+        with open(self.index_path, "r+b" if self.writable else "rb") as index:
+            access = mmap.ACCESS_WRITE if self.writable else mmap.ACCESS_READ
+            self._index = mmap.mmap(index.fileno(), 0, access=access)
+        self._index_stat = identity
+        if INDEX_HEADER.unpack_from(self._index, 0)[0] != INDEX_MAGIC:
+            raise ValueError(f"Not a cassette index: {self.index_path}")
+        return True
+
+    @staticmethod
+    def _find(index, key):
+        """Probe for ``key``; returns ``(slot, offset + 1)`` or ``(free slot, 0)``"""
+        capacity = INDEX_HEADER.unpack_from(index, 0)[1]
+        slot = int.from_bytes(key[:8], "little") % capacity
+        while True:
+            stored_key, offset = INDEX_SLOT.unpack_from(index, INDEX_HEADER.size + slot * INDEX_SLOT.size)
+            if not offset or stored_key == key:
+                return slot, offset
+            slot = (slot + 1) % capacity
+
+    def _grow(self, capacity):
+        tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        self._write_empty_index(tmp_path, capacity)
+        with open(tmp_path, "r+b") as index_file:
+            grown = mmap.mmap(index_file.fileno(), 0)
+            count = 0
+            old_capacity = INDEX_HEADER.unpack_from(self._index, 0)[1]
+            for old_slot in range(old_capacity):
+                key, offset = INDEX_SLOT.unpack_from(self._index, INDEX_HEADER.size + old_slot * INDEX_SLOT.size)
+                if offset:
+                    slot, _ = self._find(grown, key)
+                    INDEX_SLOT.pack_into(grown, INDEX_HEADER.size + slot * INDEX_SLOT.size, key, offset)
+                    count += 1
+            INDEX_HEADER.pack_into(grown, 0, INDEX_MAGIC, capacity, count)
+            grown.flush()
+            grown.close()
+        os.replace(tmp_path, self.index_path)
+        self._map_index()
+
+    @staticmethod
+    def _write_empty_index(path, capacity):
+        with open(path, "wb") as index:
+            index.write(INDEX_HEADER.pack(INDEX_MAGIC, capacity, 0))
+            index.truncate(INDEX_HEADER.size + capacity * INDEX_SLOT.size)
+
+    def _read_record(self, offset):
+        if self._data is None or offset + RECORD_HEADER.size > len(self._data):
+            if self._data is not None:
+                self._data.close()
+            with open(self.data_path, "rb") as data:
+                self._data = mmap.mmap(data.fileno(), 0, access=mmap.ACCESS_READ)
+        meta_len, body_len = RECORD_HEADER.unpack_from(self._data, offset)
+        start = offset + RECORD_HEADER.size
+        metadata = json.loads(self._data[start:start + meta_len])
+        body = self._data[start + meta_len:start + meta_len + body_len]
+        return metadata, body
+
+
+class Cassette:
+    """
+    Records or replays APIClient interactions
+
+    Args:
+        directory: Cassette directory, defaults to Config.CASSETTE_DIR
+        mode: "record", "replay" or "auto" (replay if recorded, else record)
+    """
+
+    _shared = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, directory=None, mode=None):
+        self.mode = mode or Config.CASSETTE_MODE
+        if self.mode not in MODES or self.mode == "off":
+            raise ValueError(f"Invalid cassette mode: {self.mode!r}")
+        self.store = CassetteStore(directory or Config.CASSETTE_DIR, writable=self.mode != "replay")
+        self.hits = 0
+        self.misses = 0
+        self.scope = ""   # the running test; occurrences are counted per scope
+        self._occurrences = Counter()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @classmethod
+    def from_config(cls):
+        """Process-wide cassette for the configured mode/dir, or None when disabled"""
+        if Config.CASSETTE_MODE == "off":
+            return None
+        key = (Config.CASSETTE_MODE, os.path.abspath(Config.CASSETTE_DIR))
+        with cls._shared_lock:
+            if key not in cls._shared:
+                cls._shared[key] = cls()
+            return cls._shared[key]
+
+    @contextmanager
+    def scoped(self, scope):
+        """Count requests this thread (only) sends inside the block under ``scope`` instead of ``self.scope``"""
+        previous = getattr(self._local, "scope", None)
+        self._local.scope = scope
+        try:
+            yield
+        finally:
+            self._local.scope = previous
+
+    def send(self, session, prepared, **send_kwargs):
+        """Replay ``prepared`` from the cassette or send it and record the response"""
+        request_fingerprint = fingerprint(prepared)
+        with self._lock:
+            scope = getattr(self._local, "scope", None) or self.scope
+            self._occurrences[scope, request_fingerprint] += 1
+            occurrence = self._occurrences[scope, request_fingerprint]
+        key = occurrence_key(request_fingerprint, occurrence, scope)
+
+        if self.mode != "record":
+            recorded = self.store.get(key)
+            if recorded is None and occurrence > 1:
+                # Ran more often than when recording: reuse the latest recorded occurrence
+                recorded = self._latest(request_fingerprint, occurrence - 1, scope)
+            if recorded is not None:
+                self.hits += 1
+                return self._build_response(prepared, *recorded)
+            self.misses += 1
+            if self.mode == "replay":
+                raise CassetteMiss(f"No recorded interaction for {prepared.method} {prepared.url}")
+
+        response = session.send(prepared, **send_kwargs)
+        self.store.put(key, {
+            "status": response.status_code,
+            "reason": response.reason,
+            "headers": dict(response.headers),
+            "elapsed": response.elapsed.total_seconds(),
+        }, response.content)
+        return response
+
+    def _latest(self, request_fingerprint, occurrence, scope):
+        while occurrence > 0:
+            recorded = self.store.get(occurrence_key(request_fingerprint, occurrence, scope))
+            if recorded is not None:
+                return recorded
+            occurrence -= 1
+        return None
+
+    @staticmethod
+    def _build_response(prepared, metadata, body):
+        response = requests.Response()
+        response.status_code = metadata["status"]
+        response.reason = metadata["reason"]
+        response.headers = CaseInsensitiveDict(metadata["headers"])
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.elapsed = timedelta(seconds=metadata["elapsed"])
+        response.url = prepared.url
+        response.request = prepared
+        response._content = body
+        response._content_consumed = True
+        return response
+
+
+def fixture_scope(argname):
+    """Cassette.scope of requests made by session fixture ``argname``"""
+    return f"fixture:{argname}"
+
+
+class CassettePlugin:
+    """
+    Numbers a cassette's occurrences per test and per session fixture
+
+    Session fixtures run inside whichever test first needs them, which differs
+    between runs and xdist workers, so their requests and generated payloads
+    get a scope and a data seed of their own.
+
+    Args:
+        cassette: Cassette
+    """
+
+    def __init__(self, cassette):
+        self.cassette = cassette
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_protocol(self, item):
+        self.cassette.scope = stable_nodeid(item)
+        yield
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_fixture_setup(self, fixturedef):
+        if fixturedef.scope != "session":
+            yield
+            return
+        scope = fixture_scope(fixturedef.argname)
+        outer = []
+
+        def enter():
+            outer.append(self.cassette.scope)
+            self.cassette.scope = scope
+
+        def leave():
+            self.cassette.scope = outer.pop()
+
+        # Finalizers run last-added first; the fixture adds its own teardown while it is set
+        # up, so the teardown runs between enter and leave just as the setup does
+        fixturedef.addfinalizer(leave)
+        # Process-wide rather than scoped(): fixtures such as booking_pool send from threads
+        enter()
+        try:
+            with seeded(f"{Config.DATA_SEED}:{scope}"):
+                yield
+        finally:
+            leave()
+        fixturedef.addfinalizer(enter)
@@ -1,22 +1,157 @@
-from faker import Faker
-from datetime import datetime, timedelta
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from functools import lru_cache
 import random
 
-fake = Faker()
+ADDITIONAL_NEEDS = ["Breakfast", "Lunch", "Dinner", "Parking", None]
+NAME_POOL_SIZE = 1000
+NAME_POOL_SEED = 0   # pool generate_booking_data(name_pool=True) picks names from
+DEFAULT_CHUNK_SIZE = 10_000
 
-def generate_booking_data():
-    """Generate random booking data"""
+_fake = None
+
+
+def get_faker():
+    """Shared Faker instance, created on first use (building one loads every provider)"""
+    global _fake
+    if _fake is None:
+        from faker import Faker
+        _fake = Faker()
+    return _fake
+
+
+def __getattr__(name):
+    # Keeps ``from utils.data_generator import fake`` working without an import-time Faker()
+    if name == "fake":
+        return get_faker()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def seed_generators(seed):
+    """Seed random and Faker so generate_booking_data() output is reproducible"""
+    random.seed(seed)
+    get_faker().seed_instance(seed)
+
+
+@contextmanager
+def seeded(seed):
+    """Seed random and Faker inside the block, then put back the state they had before"""
+    faker = get_faker()
+    states = random.getstate(), faker.random.getstate()
+    seed_generators(seed)
+    try:
+        yield
+    finally:
+        random.setstate(states[0])
+        faker.random.setstate(states[1])
+
+
+def generate_booking_data(name_pool=False):
+    """
+    Generate random booking data
+
+    Args:
+        name_pool: Pick names from a fixed pre-sampled pool of NAME_POOL_SIZE
+            instead of calling Faker, about 20x cheaper; for load runs, which
+            generate thousands of payloads
+    """
     checkin = datetime.now() + timedelta(days=random.randint(1, 30))
     checkout = checkin + timedelta(days=random.randint(1, 14))
+    if name_pool:
+        first_names, last_names = _name_pools(NAME_POOL_SEED)
+        firstname, lastname = random.choice(first_names), random.choice(last_names)
+    else:
+        fake = get_faker()
+        firstname, lastname = fake.first_name(), fake.last_name()
 
     return {
-        "firstname": fake.first_name(),
-        "lastname": fake.last_name(),
+        "firstname": firstname,
+        "lastname": lastname,
         "totalprice": random.randint(100, 1000),
         "depositpaid": random.choice([True, False]),
         "bookingdates": {
             "checkin": checkin.strftime("%Y-%m-%d"),
             "checkout": checkout.strftime("%Y-%m-%d")
         },
-        "additionalneeds": random.choice(["Breakfast", "Lunch", "Dinner", "Parking", None])
-    }
\ No newline at end of file
+        "additionalneeds": random.choice(ADDITIONAL_NEEDS)
+    }
+
+
+@lru_cache(maxsize=8)
+def _name_pools(seed):
+    """Pre-sampled first/last name pools so bulk generation makes no per-record Faker calls"""
+    from faker import Faker
+
+    generator = Faker()
+    generator.seed_instance(seed)
+    first_names = [generator.first_name() for _ in range(NAME_POOL_SIZE)]
+    last_names = [generator.last_name() for _ in range(NAME_POOL_SIZE)]
+    return first_names, last_names
+
+
+def iter_bookings(n, seed=None, chunk_size=DEFAULT_CHUNK_SIZE, start_date=None):
+    """
+    Lazily generate ``n`` booking payloads, building each chunk's fields at once
+
+    Prices, deposit flags, date offsets and name choices are drawn as NumPy
+    arrays per chunk, so memory stays flat for very large ``n``.
+
+    Args:
+        n: Number of bookings to generate
+        seed: Seed for reproducible output (names and all numeric fields)
+        chunk_size: Records vectorized per chunk
+        start_date: Date check-in offsets are counted from, defaults to today
+
+    Yields:
+        dict: Booking payload in the same shape as generate_booking_data()
+    """
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    first_names, last_names = _name_pools(seed)
+    base = np.datetime64(start_date or date.today(), "D")
+
+    remaining = n
+    while remaining > 0:
+        size = min(chunk_size, remaining)
+        remaining -= size
+
+        checkin = base + rng.integers(1, 31, size=size)
+        checkout = checkin + rng.integers(1, 15, size=size)
+        columns = zip(
+            rng.integers(0, NAME_POOL_SIZE, size=size).tolist(),
+            rng.integers(0, NAME_POOL_SIZE, size=size).tolist(),
+            rng.integers(100, 1001, size=size).tolist(),
+            (rng.random(size) < 0.5).tolist(),
+            np.datetime_as_string(checkin, unit="D").tolist(),
+            np.datetime_as_string(checkout, unit="D").tolist(),
+            rng.integers(0, len(ADDITIONAL_NEEDS), size=size).tolist(),
+        )
+        for first, last, price, deposit, checkin_date, checkout_date, needs in columns:
+            yield {
+                "firstname": first_names[first],
+                "lastname": last_names[last],
+                "totalprice": price,
+                "depositpaid": deposit,
+                "bookingdates": {
+                    "checkin": checkin_date,
+                    "checkout": checkout_date
+                },
+                "additionalneeds": ADDITIONAL_NEEDS[needs]
+            }
+
+
+def generate_bookings(n, seed=None, chunk_size=DEFAULT_CHUNK_SIZE, start_date=None):
+    """
+    Generate ``n`` booking payloads in bulk
+
+    Args:
+        n: Number of bookings to generate
+        seed: Seed for reproducible output
+        chunk_size: Records vectorized per chunk
+        start_date: Date check-in offsets are counted from, defaults to today
+
+    Returns:
+        list: Booking payloads; use iter_bookings() to stream instead
+    """
+    return list(iter_bookings(n, seed, chunk_size, start_date))
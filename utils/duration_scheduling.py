@@ -0,0 +1,59 @@
+"""xdist ``--dist loadgroup`` scheduling balanced by predicted duration.
+
+LoadGroupScheduling hands out work units (an xdist_group, or a single
+ungrouped test) largest test count first, and lets each worker queue up
+more once it has two tests left. With a long performance group that leaves
+one worker finishing well after the others. DurationGroupScheduling hands
+out the unit with the longest predicted duration first (LPT). It also
+keeps workers from queueing a third test while their remaining predicted
+time is long, so whichever worker frees up first takes the next longest
+unit.
+
+Imported only from the ``pytest_xdist_make_scheduler`` hook.
+"""
+from xdist.scheduler import LoadGroupScheduling
+
+PREFETCH_SECONDS = 0.5   # queue the next unit once this much predicted work is left
+
+
+class DurationGroupScheduling(LoadGroupScheduling):
+    """
+    LoadGroupScheduling ordered and paced by predicted test duration
+
+    Args:
+        config: pytest config
+        log: xdist log producer
+        predict: ``predict(nodeid)`` -> predicted seconds
+    """
+
+    def __init__(self, config, log=None, predict=None):
+        super().__init__(config, log)
+        self.predict = predict
+        self._unit_seconds = {}
+
+    def _predicted(self, work_unit):
+        return sum(self.predict(nodeid) for nodeid, completed in work_unit.items() if not completed)
+
+    def _assign_work_unit(self, node):
+        # The parent pops the first unit; move the longest one there
+        scope = max(
+            self.workqueue,
+            key=lambda scope: self._unit_seconds.setdefault(scope, self._predicted(self.workqueue[scope])),
+        )
+        self.workqueue.move_to_end(scope, last=False)
+        super()._assign_work_unit(node)
+
+    def _reschedule(self, node):
+        if node.shutting_down:
+            return
+        if not self.workqueue:
+            node.shutdown()
+            return
+        assigned = self.assigned_work[node]
+        pending = self._pending_of(assigned)
+        if pending > 2:
+            return
+        # A worker only starts a test once it knows the next one, so never leave it with one
+        if pending >= 2 and sum(self._predicted(work_unit) for work_unit in assigned.values()) > PREFETCH_SECONDS:
+            return
+        self._assign_work_unit(node)
@@ -0,0 +1,144 @@
+from array import array
+
+# 2**SUB_BUCKET_BITS linear sub-buckets per power of two: ~1.6% worst-case relative error
+SUB_BUCKET_BITS = 6
+SUB_BUCKET_COUNT = 1 << SUB_BUCKET_BITS
+SUB_BUCKET_HALF = SUB_BUCKET_COUNT >> 1
+# Largest trackable latency: 2**40 us (~12.7 days); larger values are clamped
+MAX_VALUE_US = (1 << 40) - 1
+
+
+def bucket_index(value_us):
+    """Map a value in microseconds to its log-linear bucket"""
+    if value_us < SUB_BUCKET_COUNT:
+        return value_us
+    shift = value_us.bit_length() - SUB_BUCKET_BITS
+    return shift * SUB_BUCKET_HALF + (value_us >> shift)
+
+
+def bucket_bounds(index):
+    """Inclusive ``(low, high)`` microsecond range covered by a bucket"""
+    if index < SUB_BUCKET_COUNT:
+        return index, index
+    shift = index // SUB_BUCKET_HALF - 1
+    top = index - shift * SUB_BUCKET_HALF
+    return top << shift, ((top + 1) << shift) - 1
+
+
+BUCKET_COUNT = bucket_index(MAX_VALUE_US) + 1
+
+
+class LatencyHistogram:
+    """
+    Compact HDR-style latency histogram
+
+    Values are stored in microseconds in a fixed array of log-linear buckets,
+    so recording is O(1), memory does not grow with the sample count, and two
+    histograms merge by adding counts.
+    """
+
+    __slots__ = ("counts", "count", "total_us", "min_us", "max_us")
+
+    def __init__(self):
+        self.counts = array("q", bytes(8 * BUCKET_COUNT))
+        self.count = 0
+        self.total_us = 0
+        self.min_us = None
+        self.max_us = 0
+
+    def __len__(self):
+        return self.count
+
+    def record(self, seconds):
+        """Record one latency given in seconds"""
+        self.record_us(int(seconds * 1_000_000))
+
+    def record_us(self, value_us, count=1):
+        value_us = min(max(value_us, 0), MAX_VALUE_US)
+        self.counts[bucket_index(value_us)] += count
+        self.count += count
+        self.total_us += value_us * count
+        if self.min_us is None or value_us < self.min_us:
+            self.min_us = value_us
+        if value_us > self.max_us:
+            self.max_us = value_us
+
+    def _span(self):
+        """Indexes of the buckets that can be non-zero, from the min and max recorded"""
+        if not self.count:
+            return range(0)
+        return range(bucket_index(self.min_us), bucket_index(self.max_us) + 1)
+
+    def merge(self, other):
+        """Add another histogram's counts into this one"""
+        if not other.count:
+            return self
+        counts, other_counts = self.counts, other.counts
+        for index in other._span():
+            bucket = other_counts[index]
+            if bucket:
+                counts[index] += bucket
+        self.count += other.count
+        self.total_us += other.total_us
+        if self.min_us is None or other.min_us < self.min_us:
+            self.min_us = other.min_us
+        self.max_us = max(self.max_us, other.max_us)
+        return self
+
+    def percentile(self, pct):
+        """Latency in milliseconds at percentile ``pct`` (0-100)"""
+        if not self.count:
+            return 0.0
+        threshold = max(1, -(-self.count * pct // 100))
+        seen = 0
+        counts = self.counts
+        for index in self._span():
+            seen += counts[index]
+            if seen >= threshold:
+                _, high = bucket_bounds(index)
+                return min(high, self.max_us) / 1000
+        return self.max_us / 1000
+
+    @property
+    def mean(self):
+        """Mean latency in milliseconds"""
+        return self.total_us / self.count / 1000 if self.count else 0.0
+
+    @property
+    def max(self):
+        """Maximum latency in milliseconds"""
+        return self.max_us / 1000
+
+    @property
+    def min(self):
+        """Minimum latency in milliseconds"""
+        return (self.min_us or 0) / 1000
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "max": self.max,
+        }
+
+    def to_dict(self):
+        """Sparse, JSON-serializable form (survives pytest-xdist report transport)"""
+        return {
+            "counts": {str(index): self.counts[index] for index in self._span() if self.counts[index]},
+            "total_us": self.total_us,
+            "min_us": self.min_us,
+            "max_us": self.max_us,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        histogram = cls()
+        for index, bucket in data["counts"].items():
+            histogram.counts[int(index)] = bucket
+            histogram.count += bucket
+        histogram.total_us = data["total_us"]
+        histogram.min_us = data["min_us"]
+        histogram.max_us = data["max_us"]
+        return histogram
@@ -0,0 +1,72 @@
+import codecs
+import json
+import re
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+def iter_json_array(chunks):
+    """
+    Yield the elements of a top-level JSON array as its text arrives
+
+    Only the unparsed tail of the input is buffered, so memory is bounded by
+    the chunk size plus the largest single element, not by the array length.
+
+    Args:
+        chunks: Iterable of ``bytes`` (UTF-8) or ``str`` pieces of the document,
+            e.g. ``response.iter_content(65536)``
+
+    Yields:
+        Each decoded array element, in order
+
+    Raises:
+        ValueError: If the input is not a JSON array or ends early
+    """
+    decoder = json.JSONDecoder()
+    text = codecs.getincrementaldecoder("utf-8")()
+    chunks = iter(chunks)
+    buffer = ""
+    position = 0
+    finished = False
+    state = "open"   # open -> first -> (separator <-> value)
+
+    while True:
+        position = _WHITESPACE.match(buffer, position).end()
+        if position < len(buffer):
+            char = buffer[position]
+            if state == "open":
+                if char != "[":
+                    raise ValueError(f"Expected a JSON array, got {char!r}")
+                position += 1
+                state = "first"
+                continue
+            if char == "]" and state in ("first", "separator"):
+                return
+            if state == "separator":
+                if char != ",":
+                    raise ValueError(f"Expected ',' or ']' in JSON array, got {char!r}")
+                position += 1
+                state = "value"
+                continue
+
+            try:
+                element, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                end = None
+            # A value ending exactly at the buffer end may be a number cut mid-way
+            if end is not None and (end < len(buffer) or finished):
+                yield element
+                position = end
+                state = "separator"
+                continue
+
+        if finished:
+            raise ValueError("JSON array ended unexpectedly")
+        buffer = buffer[position:]
+        position = 0
+        chunk = next(chunks, None)
+        if chunk is None:
+            finished = True
+            buffer += text.decode(b"", final=True)
+        else:
+            buffer += text.decode(chunk) if isinstance(chunk, bytes) else chunk
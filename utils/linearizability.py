@@ -0,0 +1,346 @@
+"""Concurrent booking update histories and a linearizability checker.
+
+record_booking_history() drives concurrent PUT/PATCH/GET calls on one
+booking through APIClient. For each call it records the invoke and complete
+times, what the call wrote and the booking the response showed. Writes use
+values unique to the operation, so every observed value points at one write.
+
+check_linearizable() checks the history against a register model of the
+booking. It uses the Wing-Gong search with Lowe's memoization: a
+(linearized operations, state) pair that was already explored is never
+explored again, so thousands of operations with a handful of clients
+finish quickly. Each field is checked on its own first (P-compositionality),
+which is cheap and names the field that went wrong. The whole booking is
+checked last, which also catches torn reads that mix fields of different
+writes.
+
+Operations whose outcome is unknown (transport error, 5xx) are kept as
+writes that may take effect at any time after their invocation. Reads with
+an unknown outcome carry no information and are dropped.
+"""
+import itertools
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from config import Config
+
+REGISTER_FIELDS = ("firstname", "lastname", "totalprice", "depositpaid", "additionalneeds", "bookingdates")
+PATCH_FIELDS = ("firstname", "lastname", "totalprice", "depositpaid", "additionalneeds")
+OPERATION_MIX = {"put": 1, "patch": 2, "get": 3}
+EXPLAIN_OPERATIONS = 12
+NEVER = float("inf")
+
+
+def _freeze(value):
+    """Hashable form of a JSON value"""
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+class Operation:
+    """
+    One call in a history
+
+    ``writes`` holds the fields the call sets ({} for reads); ``observed``
+    holds the booking its response showed, or None when nothing was seen.
+    """
+
+    __slots__ = ("id", "process", "kind", "writes", "observed", "invoked", "completed")
+
+    def __init__(self, id, process, kind, writes, invoked):
+        self.id = id
+        self.process = process
+        self.kind = kind
+        self.writes = writes
+        self.observed = None
+        self.invoked = invoked
+        self.completed = None
+
+    def __repr__(self):
+        observed = "?" if self.observed is None else dict(self.observed)
+        return (
+            f"#{self.id} p{self.process} {self.kind.upper()} {dict(self.writes)} -> {observed} "
+            f"[{self.invoked:.6f}, {self.completed:.6f}]"
+        )
+
+
+class History:
+    """Thread-safe recorder of invoke/complete events"""
+
+    def __init__(self):
+        self.operations = []
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.operations)
+
+    def invoke(self, process, kind, writes):
+        operation = Operation(next(self._ids), process, kind, writes, time.monotonic())
+        with self._lock:
+            self.operations.append(operation)
+        return operation
+
+    def complete(self, operation, observed):
+        operation.completed = time.monotonic()
+        operation.observed = observed
+
+    def crash(self, operation):
+        """Outcome unknown: a write may take effect at any later time, a read is dropped"""
+        operation.completed = NEVER
+
+
+class CheckResult:
+    """Outcome of check_linearizable()"""
+
+    def __init__(self, ok, operations, explored, elapsed, field=None, stuck=None):
+        self.ok = ok
+        self.operations = operations
+        self.explored = explored
+        self.elapsed = elapsed
+        self.field = field   # field whose projection failed, "*" for the whole booking
+        self.stuck = stuck   # operations pending where the search got furthest
+
+    def __bool__(self):
+        return self.ok
+
+    def explain(self):
+        if self.ok:
+            return f"{self.operations} operations linearizable ({self.explored} states, {self.elapsed:.2f}s)"
+        scope = "the whole booking" if self.field == "*" else f"field {self.field!r}"
+        lines = [f"History of {self.operations} operations is not linearizable for {scope}; "
+                 f"no valid order for the operations pending at the furthest point reached:"]
+        lines += [f"  {operation!r}" for operation in self.stuck[:EXPLAIN_OPERATIONS]]
+        return "\n".join(lines)
+
+
+class _Entry:
+    """Call or return event in the doubly linked list walked by the search"""
+
+    __slots__ = ("operation", "match", "prev", "next")
+
+    def __init__(self, operation):
+        self.operation = operation
+        self.match = None   # return entry of a call entry, None on return entries
+        self.prev = None
+        self.next = None
+
+
+def _build_entries(operations):
+    events = []
+    for operation in operations:
+        call, ret = _Entry(operation), _Entry(operation)
+        call.match = ret
+        events.append((operation.invoked, 0, call))
+        events.append((operation.completed, 1, ret))
+    # Returns before calls at equal times keeps the real-time order strict
+    events.sort(key=lambda event: (event[0], -event[1]))
+    head = _Entry(None)
+    previous = head
+    for _, _, entry in events:
+        previous.next = entry
+        entry.prev = previous
+        previous = entry
+    return head
+
+
+def _lift(call):
+    call.prev.next = call.next
+    call.next.prev = call.prev
+    ret = call.match
+    ret.prev.next = ret.next
+    if ret.next is not None:
+        ret.next.prev = ret.prev
+
+
+def _unlift(call):
+    ret = call.match
+    ret.prev.next = ret
+    if ret.next is not None:
+        ret.next.prev = ret
+    call.prev.next = call
+    call.next.prev = call
+
+
+def wing_gong(operations, initial, step):
+    """
+    Wing-Gong linearizability search with memoization
+
+    Args:
+        operations: Operations, each with ``invoked`` and ``completed`` times
+        initial: Initial (hashable) model state
+        step: ``step(state, operation)`` -> new state, or None if the operation
+            cannot take effect in ``state``
+
+    Returns:
+        tuple: ``(ok, states explored, operations pending at the furthest point)``
+    """
+    head = _build_entries(operations)
+    index = {operation.id: position for position, operation in enumerate(operations)}
+    state = initial
+    linearized = 0
+    stack = []
+    seen = set()
+    furthest, stuck = -1, []
+    entry = head.next
+    while head.next is not None:
+        if entry.match is not None:
+            new_state = step(state, entry.operation)
+            if new_state is not None:
+                bits = linearized | (1 << index[entry.operation.id])
+                key = (bits, new_state)
+                if key not in seen:
+                    seen.add(key)
+                    stack.append((entry, state))
+                    state, linearized = new_state, bits
+                    _lift(entry)
+                    entry = head.next
+                    continue
+            entry = entry.next
+        else:
+            # Reached a return whose call is not linearized: undo the last choice
+            if len(stack) > furthest:
+                furthest = len(stack)
+                stuck = _pending(head, entry)
+            if not stack:
+                return False, len(seen), stuck
+            entry, state = stack.pop()
+            linearized &= ~(1 << index[entry.operation.id])
+            _unlift(entry)
+            entry = entry.next
+    return True, len(seen), []
+
+
+def _pending(head, until):
+    pending = []
+    entry = head.next
+    while entry is not None and entry is not until.next:
+        if entry.match is not None:
+            pending.append(entry.operation)
+        entry = entry.next
+    return pending
+
+
+def _register_step(fields):
+    """Model step for a register holding ``fields`` (a tuple of names), state in that order"""
+    def step(state, operation):
+        if operation.writes:
+            state = tuple(
+                _freeze(operation.writes[name]) if name in operation.writes else value
+                for name, value in zip(fields, state)
+            )
+        observed = operation.observed
+        if observed is not None and any(
+            _freeze(observed.get(name)) != value for name, value in zip(fields, state)
+        ):
+            return None
+        return state
+    return step
+
+
+def check_linearizable(history, initial, fields=REGISTER_FIELDS):
+    """
+    Check a booking history against a register model
+
+    Args:
+        history: History (or list of Operations)
+        initial: Booking before the first operation
+        fields: Fields of the booking that form the register
+
+    Returns:
+        CheckResult
+    """
+    start = time.perf_counter()
+    operations = [
+        operation for operation in getattr(history, "operations", history)
+        if operation.completed is not None and (operation.completed != NEVER or operation.writes)
+    ]
+    explored = 0
+    # P-compositionality: each field on its own first, the whole booking last
+    for projection in [(name,) for name in fields] + [tuple(fields)]:
+        relevant = [operation for operation in operations if _touches(operation, projection)]
+        ok, states, stuck = wing_gong(
+            relevant, tuple(_freeze(initial.get(name)) for name in projection), _register_step(projection)
+        )
+        explored += states
+        if not ok:
+            field = projection[0] if len(projection) == 1 else "*"
+            return CheckResult(False, len(operations), explored, time.perf_counter() - start, field, stuck)
+    return CheckResult(True, len(operations), explored, time.perf_counter() - start)
+
+
+def _touches(operation, fields):
+    return any(name in operation.writes for name in fields) or operation.observed is not None
+
+
+def record_booking_history(api_client, booking_id, initial, operations=None, workers=None, mix=None, seed=None):
+    """
+    Drive concurrent PUT/PATCH/GET calls on one booking and record them
+
+    Args:
+        api_client: APIClient with an auth token, built with ``cassette=False``
+            (replayed responses cannot show the effects of concurrent calls)
+        booking_id: Booking to update
+        initial: Current booking (PUTs keep its bookingdates)
+        operations: Number of calls
+        workers: Concurrent clients
+        mix: ``{"put" | "patch" | "get": weight}``
+        seed: Seed for the operation sequence
+
+    Returns:
+        History
+    """
+    operations = operations or Config.LINEARIZABILITY_OPERATIONS
+    workers = workers or Config.LINEARIZABILITY_WORKERS
+    kinds, weights = zip(*(mix or OPERATION_MIX).items())
+    endpoint = f"{Config.BOOKING_ENDPOINT}/{booking_id}"
+    history = History()
+    remaining = itertools.count(operations, -1)
+    tags = itertools.count(1)
+
+    def client(process):
+        rng = random.Random(f"{seed}:{process}")
+        while next(remaining) > 0:
+            kind = rng.choices(kinds, weights)[0]
+            # Unique values per write, so an observed value names the write it came from
+            tag = next(tags)
+            values = {
+                "firstname": f"W{tag}",
+                "lastname": f"P{process}",
+                "totalprice": tag,
+                "depositpaid": bool(tag % 2),
+                "additionalneeds": f"N{tag}",
+            }
+            if kind == "put":
+                writes = dict(values, bookingdates=initial["bookingdates"])
+            elif kind == "patch":
+                writes = {name: values[name] for name in rng.sample(PATCH_FIELDS, rng.randint(1, len(PATCH_FIELDS)))}
+            else:
+                writes = {}
+
+            operation = history.invoke(process, kind, writes)
+            try:
+                if kind == "get":
+                    response = api_client.get(endpoint)
+                else:
+                    response = getattr(api_client, kind)(endpoint, json=writes)
+            except Exception:
+                history.crash(operation)
+                continue
+            if response.status_code == 200:
+                history.complete(operation, response.json())
+            elif response.status_code >= 500:
+                history.crash(operation)
+            else:
+                # Rejected (4xx): the call had no effect
+                history.complete(operation, None)
+                operation.writes = {}
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(client, range(workers)))
+    return history
@@ -0,0 +1,32 @@
+from utils.load.mix import DEFAULT_WEIGHTS, OPERATIONS, EndpointMix
+from utils.load.models import ClosedLoopModel, OpenLoopModel
+from utils.load.recorder import LatencyRecorder, LoadResult
+from utils.load.monitor import RingBuffer, SoakMonitor, SoakReport, Trend
+from utils.load.multiprocess import SharedLoadStats, run_load_processes
+from utils.load.runner import LoadProfile, run_load
+from utils.load.schedule import Schedule, Stage, constant, ramp, soak, spike, stress
+
+__all__ = [
+    "DEFAULT_WEIGHTS",
+    "OPERATIONS",
+    "EndpointMix",
+    "ClosedLoopModel",
+    "OpenLoopModel",
+    "LatencyRecorder",
+    "LoadResult",
+    "RingBuffer",
+    "SoakMonitor",
+    "SoakReport",
+    "Trend",
+    "SharedLoadStats",
+    "run_load_processes",
+    "LoadProfile",
+    "run_load",
+    "Schedule",
+    "Stage",
+    "constant",
+    "ramp",
+    "soak",
+    "spike",
+    "stress",
+]
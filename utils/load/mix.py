@@ -0,0 +1,146 @@
+import bisect
+import itertools
+import random
+import threading
+
+from config import Config
+from utils.data_generator import generate_booking_data
+
+
+class BookingState:
+    """Thread-safe set of booking ids created during a load run"""
+
+    def __init__(self):
+        self._ids = []
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._ids)
+
+    def add(self, booking_id):
+        with self._lock:
+            self._ids.append(booking_id)
+
+    def pick(self, rng):
+        with self._lock:
+            return rng.choice(self._ids) if self._ids else None
+
+    def take(self, rng):
+        with self._lock:
+            if not self._ids:
+                return None
+            index = rng.randrange(len(self._ids))
+            self._ids[index], self._ids[-1] = self._ids[-1], self._ids[index]
+            return self._ids.pop()
+
+    def drain(self):
+        with self._lock:
+            ids, self._ids = self._ids, []
+            return ids
+
+
+def ping(client, state, rng):
+    return client.get(Config.PING_ENDPOINT)
+
+
+def auth(client, state, rng):
+    return client.post(Config.AUTH_ENDPOINT, json={
+        "username": Config.USERNAME,
+        "password": Config.PASSWORD
+    })
+
+
+def list_bookings(client, state, rng):
+    return client.get(Config.BOOKING_ENDPOINT)
+
+
+def create_booking(client, state, rng):
+    response = client.post(Config.BOOKING_ENDPOINT, json=generate_booking_data(name_pool=True))
+    if response.status_code == 200:
+        state.add(response.json()["bookingid"])
+    return response
+
+
+def get_booking(client, state, rng):
+    booking_id = state.pick(rng)
+    if booking_id is None:
+        return create_booking(client, state, rng)
+    return client.get(f"{Config.BOOKING_ENDPOINT}/{booking_id}")
+
+
+def update_booking(client, state, rng):
+    booking_id = state.pick(rng)
+    if booking_id is None:
+        return create_booking(client, state, rng)
+    client.get_auth_token()
+    return client.put(f"{Config.BOOKING_ENDPOINT}/{booking_id}", json=generate_booking_data(name_pool=True))
+
+
+def patch_booking(client, state, rng):
+    booking_id = state.pick(rng)
+    if booking_id is None:
+        return create_booking(client, state, rng)
+    client.get_auth_token()
+    return client.patch(
+        f"{Config.BOOKING_ENDPOINT}/{booking_id}",
+        json={"totalprice": rng.randint(100, 1000)},
+    )
+
+
+def delete_booking(client, state, rng):
+    booking_id = state.take(rng)
+    if booking_id is None:
+        return create_booking(client, state, rng)
+    client.get_auth_token()
+    return client.delete(f"{Config.BOOKING_ENDPOINT}/{booking_id}")
+
+
+OPERATIONS = {
+    "ping": ping,
+    "auth": auth,
+    "list_bookings": list_bookings,
+    "get_booking": get_booking,
+    "create_booking": create_booking,
+    "update_booking": update_booking,
+    "patch_booking": patch_booking,
+    "delete_booking": delete_booking,
+}
+
+DEFAULT_WEIGHTS = {
+    "ping": 5,
+    "auth": 5,
+    "list_bookings": 10,
+    "get_booking": 40,
+    "create_booking": 20,
+    "update_booking": 8,
+    "patch_booking": 8,
+    "delete_booking": 4,
+}
+
+
+class EndpointMix:
+    """
+    Weighted choice of operations over /ping, /auth and the /booking CRUD calls
+
+    Args:
+        weights: ``{operation_name: weight}``; names are keys of OPERATIONS
+        seed: Optional seed for reproducible operation sequences
+    """
+
+    def __init__(self, weights=None, seed=None):
+        weights = dict(DEFAULT_WEIGHTS if weights is None else weights)
+        unknown = set(weights) - set(OPERATIONS)
+        if unknown:
+            raise ValueError(f"Unknown operations in mix: {sorted(unknown)}")
+        weights = {name: weight for name, weight in weights.items() if weight > 0}
+        if not weights:
+            raise ValueError("Endpoint mix needs at least one positive weight")
+        self.names = list(weights)
+        self._cumulative = list(itertools.accumulate(weights.values()))
+        self.rng = random.Random(seed)
+
+    def choose(self):
+        """Return ``(name, operation)`` drawn according to the weights"""
+        point = self.rng.random() * self._cumulative[-1]
+        name = self.names[bisect.bisect_right(self._cumulative, point)]
+        return name, OPERATIONS[name]
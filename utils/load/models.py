@@ -0,0 +1,160 @@
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# How long an idle dispatcher/virtual user waits before re-reading the schedule
+IDLE_POLL = 0.05
+
+
+class OpenLoopModel:
+    """
+    Fixed-arrival-rate workload: requests are released on schedule whether or
+    not earlier ones have completed, so a slow server builds up a queue
+    instead of throttling the load generator.
+
+    Args:
+        schedule: Schedule whose targets are requests/second
+        max_workers: Threads available to send requests
+        phase: Fraction of an interval to wait before the first arrival, so
+            processes sharing one target rate interleave instead of firing together
+    """
+
+    def __init__(self, schedule, max_workers=64, phase=0.0):
+        self.schedule = schedule
+        self.max_workers = max_workers
+        self.phase = phase
+
+    def arrivals(self):
+        """Intended send offsets (seconds from start) for the whole schedule"""
+        elapsed = 0.0
+        phase = self.phase
+        duration = self.schedule.duration
+        while elapsed < duration:
+            rate = self.schedule.target_at(elapsed)
+            if rate <= 0:
+                elapsed += IDLE_POLL
+                continue
+            if phase:
+                elapsed += phase / rate
+                phase = 0.0
+                continue
+            yield elapsed
+            elapsed += 1.0 / rate
+
+    def run(self, execute, warm_up=None, ready=None):
+        """
+        Call ``execute(intended_start)`` for every arrival
+
+        Args:
+            execute: Sends one request
+            warm_up: Called once on every sender thread before the clock starts
+            ready: Called once all threads are warm, just before the clock starts
+
+        Returns:
+            float: Wall time in seconds, warm-up excluded
+        """
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="load") as executor:
+            if warm_up is not None:
+                # Held at the barrier, every call gets a thread of its own
+                barrier = threading.Barrier(self.max_workers)
+
+                def warm_thread():
+                    try:
+                        warm_up()
+                    finally:
+                        barrier.wait()
+
+                for future in [executor.submit(warm_thread) for _ in range(self.max_workers)]:
+                    future.result()
+            if ready is not None:
+                ready()
+            start = time.perf_counter()
+            for offset in self.arrivals():
+                intended = start + offset
+                delay = intended - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                executor.submit(execute, intended)
+        return time.perf_counter() - start
+
+
+class ClosedLoopModel:
+    """
+    N virtual users, each sending its next request after the previous one
+    completes. The number of active users follows the schedule.
+
+    Args:
+        schedule: Schedule whose targets are virtual users
+        pacing: Optional seconds between iteration starts per user; latency is
+            then measured from the paced start to keep coordinated omission out
+        think_time: Pause after each request when no pacing is set
+        users: Indices of the virtual users this model runs (default: all);
+            user ``i`` is active while the schedule's target is above ``i``
+    """
+
+    def __init__(self, schedule, pacing=None, think_time=0.0, users=None):
+        self.schedule = schedule
+        self.pacing = pacing
+        self.think_time = think_time
+        self.users = range(math.ceil(schedule.peak)) if users is None else users
+
+    def run(self, execute, warm_up=None, ready=None):
+        """
+        Drive ``execute(intended_start)`` from every virtual user
+
+        Args:
+            execute: Sends one request
+            warm_up: Called once on every virtual user's thread before the clock starts
+            ready: Called once all threads are warm, just before the clock starts
+
+        Returns:
+            float: Wall time in seconds, warm-up excluded
+        """
+        clock = []
+
+        def start_clock():
+            if ready is not None:
+                ready()
+            clock.append(time.perf_counter())
+
+        barrier = threading.Barrier(len(self.users) + 1, action=start_clock)
+
+        def virtual_user(index):
+            try:
+                if warm_up is not None:
+                    warm_up()
+            finally:
+                barrier.wait()
+            start = clock[0]
+            end = start + self.schedule.duration
+            intended = None
+            while True:
+                now = time.perf_counter()
+                if now >= end:
+                    return
+                if index >= self.schedule.target_at(now - start):
+                    intended = None
+                    time.sleep(IDLE_POLL)
+                    continue
+                if intended is None or not self.pacing:
+                    intended = now
+                execute(intended)
+                if self.pacing:
+                    intended += self.pacing
+                    delay = intended - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                elif self.think_time:
+                    time.sleep(self.think_time)
+
+        users = [
+            threading.Thread(target=virtual_user, args=(index,), name=f"vu-{index}", daemon=True)
+            for index in self.users
+        ]
+        for user in users:
+            user.start()
+        barrier.wait()
+        for user in users:
+            user.join()
+        return time.perf_counter() - clock[0]
@@ -0,0 +1,287 @@
+"""Resource and latency trends for soak runs.
+
+SoakMonitor wraps a LatencyRecorder and, from a background thread, samples
+at a fixed interval:
+
+* client RSS;
+* memory traced by tracemalloc, and (less often, as a snapshot is costly)
+  the lines allocating the most of it;
+* connections open in the load client's pools;
+* p99 latency per operation over the last interval.
+
+Each value goes into a fixed-size RingBuffer that overwrites its oldest
+samples, and interval latencies go into histograms that are reset on every
+sample, so memory stays flat however long the soak runs.
+SoakReport.trend() fits a least-squares line to a series. Steady growth in
+RSS, traced memory or open connections points at a client-side leak. A
+rising p99 points at the server degrading under sustained load.
+"""
+import collections
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from array import array
+
+from config import Config
+from utils.histogram import LatencyHistogram
+
+try:
+    import resource
+except ImportError:   # Windows
+    resource = None
+
+MIN_INTERVAL = 0.1       # seconds between samples, at the shortest
+WARMUP_FRACTION = 0.1    # share of the earliest samples left out of trend fits
+MIN_TREND_SAMPLES = 3
+MB = 1024 * 1024
+
+
+def rss_bytes():
+    """Resident set size of this process; peak RSS where the current value is not available"""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        if resource is None:
+            return None
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+class RingBuffer:
+    """
+    Fixed-capacity ``(time, value)`` series; the oldest samples are overwritten
+
+    Args:
+        capacity: Samples kept
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self._times = array("d", bytes(8 * capacity))
+        self._values = array("d", bytes(8 * capacity))
+        self._next = 0
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def append(self, timestamp, value):
+        self._times[self._next] = timestamp
+        self._values[self._next] = value
+        self._next = (self._next + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+
+    def items(self):
+        """Samples kept, oldest first"""
+        start = (self._next - self._size) % self.capacity
+        return [
+            (self._times[(start + offset) % self.capacity], self._values[(start + offset) % self.capacity])
+            for offset in range(self._size)
+        ]
+
+
+class Trend:
+    """
+    Least-squares line through a series
+
+    Args:
+        slope: Change per second
+        start: Fitted value at the first sample
+        end: Fitted value at the last sample
+        samples: Samples fitted
+    """
+
+    def __init__(self, slope, start, end, samples):
+        self.slope = slope
+        self.start = start
+        self.end = end
+        self.samples = samples
+
+    @classmethod
+    def fit(cls, samples):
+        """Trend of ``[(time, value)]``, or None with fewer than MIN_TREND_SAMPLES samples"""
+        if len(samples) < MIN_TREND_SAMPLES:
+            return None
+        count = len(samples)
+        mean_t = sum(t for t, _ in samples) / count
+        mean_v = sum(v for _, v in samples) / count
+        spread = sum((t - mean_t) ** 2 for t, _ in samples)
+        slope = sum((t - mean_t) * (v - mean_v) for t, v in samples) / spread if spread else 0.0
+        first, last = samples[0][0], samples[-1][0]
+        return cls(slope, mean_v + slope * (first - mean_t), mean_v + slope * (last - mean_t), count)
+
+    @property
+    def change(self):
+        """Fitted change from the first sample to the last"""
+        return self.end - self.start
+
+    @property
+    def per_hour(self):
+        return self.slope * 3600
+
+    def __repr__(self):
+        return f"Trend({self.start:.2f} -> {self.end:.2f}, {self.per_hour:+.2f}/h over {self.samples} samples)"
+
+
+class SoakReport:
+    """
+    Series sampled by a SoakMonitor
+
+    Series are ``rss_mb``, ``traced_mb``, ``open_connections`` and
+    ``p99_ms:<operation>``; values missing on a platform are left out.
+    """
+
+    def __init__(self, series, allocators, interval):
+        self.series = series
+        self.allocators = allocators
+        self.interval = interval
+
+    def trend(self, name):
+        """Trend of one series after warm-up, or None if it has too few samples"""
+        buffer = self.series.get(name)
+        if buffer is None:
+            return None
+        samples = buffer.items()
+        return Trend.fit(samples[int(len(samples) * WARMUP_FRACTION):])
+
+    def trends(self):
+        return {name: self.trend(name) for name in sorted(self.series)}
+
+    def allocator_growth(self):
+        """
+        Top allocating lines at the last sample with their growth in KiB
+
+        Growth is measured from the oldest sample kept in which the line was
+        among the top allocators.
+
+        Returns:
+            list: ``[(file:line, KiB now, KiB grown)]``, largest first
+        """
+        if not self.allocators:
+            return []
+        latest = self.allocators[-1]
+        growth = []
+        for site, size in latest:
+            first = next(
+                (earlier[site] for earlier in map(dict, self.allocators) if site in earlier), size
+            )
+            growth.append((site, size, size - first))
+        return growth
+
+    def summary(self):
+        """``{series: {"start", "end", "per_hour"}}`` of every fitted trend"""
+        return {
+            name: {"start": trend.start, "end": trend.end, "per_hour": trend.per_hour}
+            for name, trend in self.trends().items() if trend is not None
+        }
+
+
+class SoakMonitor:
+    """
+    LatencyRecorder wrapper that samples resources and interval p99 into ring buffers
+
+    Use as a context manager around the run.
+
+    Args:
+        recorder: LatencyRecorder every request is forwarded to
+        client: APIClient whose open connections are counted
+        duration: Planned run length; with no interval set, the samples are spread over it
+        interval: Seconds between samples (default Config.SOAK_SAMPLE_INTERVAL)
+        capacity: Samples kept per series (default Config.SOAK_SAMPLES)
+        top_allocators: tracemalloc lines kept per snapshot (default
+            Config.SOAK_TOP_ALLOCATORS; 0 leaves tracemalloc off)
+        allocator_interval: Seconds between tracemalloc snapshots (default
+            Config.SOAK_ALLOCATOR_INTERVAL); one is also taken at the end
+    """
+
+    def __init__(self, recorder, client=None, duration=None, interval=None, capacity=None,
+                 top_allocators=None, allocator_interval=None):
+        self.recorder = recorder
+        self.client = client
+        self.capacity = capacity or Config.SOAK_SAMPLES
+        interval = interval or Config.SOAK_SAMPLE_INTERVAL
+        if not interval:
+            interval = duration / self.capacity if duration else 1.0
+        self.interval = max(interval, MIN_INTERVAL)
+        self.top_allocators = Config.SOAK_TOP_ALLOCATORS if top_allocators is None else top_allocators
+        self.allocator_interval = allocator_interval or Config.SOAK_ALLOCATOR_INTERVAL
+        self._next_allocators = 0.0
+        self.series = {}
+        self.allocators = collections.deque(maxlen=self.capacity)
+        self._window = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._started_tracemalloc = False
+
+    def record(self, operation, intended_start, started, finished, ok):
+        self.recorder.record(operation, intended_start, started, finished, ok)
+        with self._lock:
+            histogram = self._window.get(operation)
+            if histogram is None:
+                histogram = self._window[operation] = LatencyHistogram()
+            histogram.record(finished - intended_start)
+
+    def __enter__(self):
+        if self.top_allocators and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        self._start = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="soak-monitor", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+        if self.top_allocators and tracemalloc.is_tracing():
+            self.allocators.append(self._top_allocators())
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def _append(self, name, timestamp, value):
+        if value is None:
+            return
+        buffer = self.series.get(name)
+        if buffer is None:
+            buffer = self.series[name] = RingBuffer(self.capacity)
+        buffer.append(timestamp, value)
+
+    def sample(self):
+        """Take one sample of every series"""
+        now = time.perf_counter() - self._start
+        with self._lock:
+            window, self._window = self._window, {}
+        for operation, histogram in window.items():
+            self._append(f"p99_ms:{operation}", now, histogram.percentile(99))
+
+        rss = rss_bytes()
+        self._append("rss_mb", now, None if rss is None else rss / MB)
+        if self.client is not None:
+            self._append("open_connections", now, self.client.open_connections())
+        if tracemalloc.is_tracing():
+            self._append("traced_mb", now, tracemalloc.get_traced_memory()[0] / MB)
+            if self.top_allocators and now >= self._next_allocators:
+                self.allocators.append(self._top_allocators())
+                self._next_allocators = now + self.allocator_interval
+
+    def _top_allocators(self):
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ))
+        return tuple(
+            (f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}", stat.size // 1024)
+            for stat in snapshot.statistics("lineno")[:self.top_allocators]
+        )
+
+    def report(self):
+        return SoakReport(self.series, list(self.allocators), self.interval)
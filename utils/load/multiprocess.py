@@ -0,0 +1,210 @@
+"""Process-pool load driver.
+
+One APIClient process caps client throughput: JSON encoding, header
+building and response parsing all hold the GIL. run_load_processes() starts
+one worker process per core (or ``profile.processes``), each with its own
+pooled sessions, and splits the schedule between them:
+
+* open model: every worker runs the schedule at 1/N of the target rate;
+* closed model: virtual user ``i`` runs on worker ``i % N``.
+
+Workers record into their own slab of a shared-memory block (latency and
+service-time histogram buckets, error counters, run duration). Nothing is
+pickled back. The parent merges the slabs into one LoadResult when the
+workers exit.
+"""
+import multiprocessing
+import threading
+from array import array
+from multiprocessing import connection, shared_memory
+
+from config import Config, env
+from utils.histogram import BUCKET_COUNT, MAX_VALUE_US, LatencyHistogram, bucket_index
+from utils.load.recorder import LoadResult
+
+# Histogram layout in shared memory: header slots, then bucket counts
+COUNT, TOTAL_US, MIN_US, MAX_US = range(4)
+HISTOGRAM_HEADER = 4
+HISTOGRAM_SIZE = HISTOGRAM_HEADER + BUCKET_COUNT
+NO_MIN = -1
+START_TIMEOUT = 60   # seconds for every worker to import and warm up
+
+
+class SharedLoadStats:
+    """
+    Per-worker latency histograms and error counters in one shared-memory block
+
+    Each worker only writes its own slab, so recording needs no
+    cross-process locking.
+
+    Args:
+        operations: Operation names, in a fixed order
+        workers: Number of worker slabs
+        name: Existing block to attach to; None creates a new one
+    """
+
+    def __init__(self, operations, workers, name=None):
+        self.operations = list(operations)
+        self.workers = workers
+        self.index = {operation: position for position, operation in enumerate(self.operations)}
+        # Per worker: duration (us), then per operation: latency histogram, service histogram, errors
+        self.operation_size = 2 * HISTOGRAM_SIZE + 1
+        self.slab_size = 1 + len(self.operations) * self.operation_size
+        size = 8 * self.slab_size * workers
+        if name is None:
+            self._memory = shared_memory.SharedMemory(create=True, size=size)
+            self._memory.buf[:size] = bytes(size)
+            self._owner = True
+        else:
+            self._memory = shared_memory.SharedMemory(name=name)
+            self._owner = False
+        self.values = self._memory.buf.cast("q")
+        if self._owner:
+            for worker in range(workers):
+                for operation in self.operations:
+                    for histogram in (0, 1):
+                        self.values[self._histogram(worker, operation, histogram) + MIN_US] = NO_MIN
+
+    @property
+    def name(self):
+        return self._memory.name
+
+    def _histogram(self, worker, operation, which):
+        return worker * self.slab_size + 1 + self.index[operation] * self.operation_size + which * HISTOGRAM_SIZE
+
+    def record_us(self, worker, operation, which, value_us):
+        values = self.values
+        offset = self._histogram(worker, operation, which)
+        value_us = min(max(value_us, 0), MAX_VALUE_US)
+        values[offset + HISTOGRAM_HEADER + bucket_index(value_us)] += 1
+        values[offset + COUNT] += 1
+        values[offset + TOTAL_US] += value_us
+        if values[offset + MIN_US] == NO_MIN or value_us < values[offset + MIN_US]:
+            values[offset + MIN_US] = value_us
+        if value_us > values[offset + MAX_US]:
+            values[offset + MAX_US] = value_us
+
+    def add_error(self, worker, operation):
+        self.values[self._histogram(worker, operation, 2)] += 1
+
+    def set_duration(self, worker, seconds):
+        self.values[worker * self.slab_size] = int(seconds * 1_000_000)
+
+    def histogram(self, worker, operation, which):
+        """LatencyHistogram copied out of a worker's slab"""
+        offset = self._histogram(worker, operation, which)
+        histogram = LatencyHistogram()
+        histogram.counts = array("q", self.values[offset + HISTOGRAM_HEADER:offset + HISTOGRAM_SIZE])
+        histogram.count = self.values[offset + COUNT]
+        histogram.total_us = self.values[offset + TOTAL_US]
+        histogram.min_us = None if self.values[offset + MIN_US] == NO_MIN else self.values[offset + MIN_US]
+        histogram.max_us = self.values[offset + MAX_US]
+        return histogram
+
+    def result(self):
+        """Merge every worker's slab into one LoadResult"""
+        latencies, service_times, errors = {}, {}, {}
+        for operation in self.operations:
+            latency, service = LatencyHistogram(), LatencyHistogram()
+            for worker in range(self.workers):
+                latency.merge(self.histogram(worker, operation, 0))
+                service.merge(self.histogram(worker, operation, 1))
+                error_count = self.values[self._histogram(worker, operation, 2)]
+                if error_count:
+                    errors[operation] = errors.get(operation, 0) + error_count
+            if latency.count:
+                latencies[operation] = latency
+                service_times[operation] = service
+        duration = max(self.values[worker * self.slab_size] for worker in range(self.workers)) / 1_000_000
+        return LoadResult(duration, latencies, service_times, errors)
+
+    def close(self):
+        self.values.release()
+        self._memory.close()
+        if self._owner:
+            self._memory.unlink()
+
+
+class SharedLatencyRecorder:
+    """LatencyRecorder interface writing into one worker's SharedLoadStats slab"""
+
+    def __init__(self, stats, worker):
+        self.stats = stats
+        self.worker = worker
+        self._lock = threading.Lock()   # the worker's own sender threads
+
+    def record(self, operation, intended_start, started, finished, ok):
+        with self._lock:
+            self.stats.record_us(self.worker, operation, 0, int((finished - intended_start) * 1_000_000))
+            self.stats.record_us(self.worker, operation, 1, int((finished - started) * 1_000_000))
+            if not ok:
+                self.stats.add_error(self.worker, operation)
+
+
+def config_snapshot():
+    """Config values resolved or overridden in this process, for spawned workers"""
+    return {
+        name: value for name, value in vars(Config).items()
+        if name.isupper() and not isinstance(value, env)
+    }
+
+
+def _worker(worker, workers, profile, config, stats_name, operations, barrier):
+    # Imported here so spawning starts from a light module
+    from utils.load.runner import execute_profile
+
+    for name, value in config.items():
+        setattr(Config, name, value)
+    stats = SharedLoadStats(operations, workers, stats_name)
+    try:
+        recorder = SharedLatencyRecorder(stats, worker)
+        model = profile.build_model(worker, workers)
+        seed = None if profile.seed is None else f"{profile.seed}:{worker}"
+        # Every worker warms up first, then all start the clock together
+        duration = execute_profile(profile, model, recorder, seed, ready=lambda: barrier.wait(START_TIMEOUT))
+        stats.set_duration(worker, duration)
+    finally:
+        stats.close()
+
+
+def run_load_processes(profile, processes):
+    """
+    Run a LoadProfile from ``processes`` worker processes
+
+    Returns:
+        LoadResult merged from every worker
+    """
+    from utils.load.mix import EndpointMix
+
+    operations = EndpointMix(profile.mix).names
+    stats = SharedLoadStats(operations, processes)
+    # spawn: the parent runs threads (stub server, thread pools) that fork would not carry over
+    context = multiprocessing.get_context("spawn")
+    barrier = context.Barrier(processes)
+    try:
+        workers = [
+            context.Process(
+                target=_worker,
+                args=(worker, processes, profile, config_snapshot(), stats.name, operations, barrier),
+                name=f"load-{worker}",
+                daemon=True,
+            )
+            for worker in range(processes)
+        ]
+        for process in workers:
+            process.start()
+        running = {process.sentinel: process for process in workers}
+        while running:
+            for sentinel in connection.wait(list(running)):
+                process = running.pop(sentinel)
+                process.join()
+                if process.exitcode != 0:
+                    # Release the others from the start barrier rather than let them time out
+                    barrier.abort()
+        failed = [process.name for process in workers if process.exitcode != 0]
+        if failed:
+            raise RuntimeError(f"Load worker processes failed: {', '.join(failed)}")
+        return stats.result()
+    finally:
+        stats.close()
+
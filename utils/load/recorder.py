@@ -0,0 +1,98 @@
+import threading
+
+from utils.histogram import LatencyHistogram
+
+
+class LatencyRecorder:
+    """
+    Thread-safe latency recorder that corrects for coordinated omission
+
+    Latency is measured from the *intended* start of each request (when the
+    schedule said it should be sent), not from when a worker got round to
+    sending it. Queueing delay caused by a slow server therefore shows up in
+    the percentiles instead of silently thinning out the samples. Service time
+    (actual send to completion) is kept separately. Samples go into fixed-size
+    histograms, so memory stays flat however long the run lasts.
+    """
+
+    def __init__(self):
+        self._latencies = {}
+        self._service_times = {}
+        self._errors = {}
+        self._lock = threading.Lock()
+
+    def record(self, operation, intended_start, started, finished, ok):
+        with self._lock:
+            if operation not in self._latencies:
+                self._latencies[operation] = LatencyHistogram()
+                self._service_times[operation] = LatencyHistogram()
+            self._latencies[operation].record(finished - intended_start)
+            self._service_times[operation].record(finished - started)
+            if not ok:
+                self._errors[operation] = self._errors.get(operation, 0) + 1
+
+    def result(self, duration):
+        with self._lock:
+            return LoadResult(
+                duration,
+                {name: LatencyHistogram().merge(histogram) for name, histogram in self._latencies.items()},
+                {name: LatencyHistogram().merge(histogram) for name, histogram in self._service_times.items()},
+                dict(self._errors),
+            )
+
+
+class LoadResult:
+    """Summary of a load run; latencies are reported in milliseconds"""
+
+    def __init__(self, duration, latencies, service_times, errors):
+        self.duration = duration
+        self.latencies = latencies
+        self.service_times = service_times
+        self.errors = errors
+        self.soak = None   # SoakReport when the profile was monitored
+
+    @property
+    def requests(self):
+        return sum(histogram.count for histogram in self.latencies.values())
+
+    @property
+    def error_count(self):
+        return sum(self.errors.values())
+
+    @property
+    def throughput(self):
+        """Completed requests per second"""
+        return self.requests / self.duration if self.duration else 0.0
+
+    @property
+    def success_rate(self):
+        return 1 - self.error_count / self.requests if self.requests else 0.0
+
+    def percentile(self, pct, operation=None):
+        """Coordinated-omission-corrected latency percentile in ms"""
+        return self._histogram(self.latencies, operation).percentile(pct)
+
+    def service_percentile(self, pct, operation=None):
+        """Service-time percentile in ms (excludes schedule lag)"""
+        return self._histogram(self.service_times, operation).percentile(pct)
+
+    def _histogram(self, source, operation):
+        if operation is not None:
+            return source.get(operation, LatencyHistogram())
+        combined = LatencyHistogram()
+        for histogram in source.values():
+            combined.merge(histogram)
+        return combined
+
+    def summary(self):
+        """Per-operation request count, errors and latency percentiles"""
+        return {
+            name: dict(histogram.summary(), errors=self.errors.get(name, 0))
+            for name, histogram in self.latencies.items()
+        }
+
+    def __repr__(self):
+        return (
+            f"LoadResult(requests={self.requests}, errors={self.error_count}, "
+            f"throughput={self.throughput:.1f}/s, p99={self.percentile(99):.1f}ms)"
+        )
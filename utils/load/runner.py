@@ -0,0 +1,137 @@
+import math
+import os
+import time
+
+from config import Config
+from utils.api_client import APIClient
+from utils.booking_pool import bulk_delete
+from utils.data_generator import generate_booking_data
+from utils.load.mix import BookingState, EndpointMix
+from utils.load.models import ClosedLoopModel, OpenLoopModel
+from utils.load.monitor import SoakMonitor
+from utils.load.multiprocess import run_load_processes
+from utils.load.recorder import LatencyRecorder
+
+
+class LoadProfile:
+    """
+    Declarative description of a load run
+
+    Args:
+        schedule: Schedule of arrival rates (open) or virtual users (closed)
+        model: "open" for a fixed arrival rate, "closed" for N virtual users
+        mix: ``{operation_name: weight}`` endpoint mix, defaults to DEFAULT_WEIGHTS
+        max_workers: Sender threads for the open-loop model
+        pacing: Seconds between iteration starts per virtual user (closed model)
+        think_time: Pause between requests per virtual user (closed model)
+        seed: Seed for the endpoint mix
+        processes: Worker processes to drive the load from; None uses
+            Config.LOAD_PROCESSES, 0 starts one per CPU core
+        monitor: Sample resource and latency trends into ``LoadResult.soak``;
+            a monitored run always stays in this process
+    """
+
+    def __init__(self, schedule, model="open", mix=None, max_workers=64,
+                 pacing=None, think_time=0.0, seed=None, processes=None, monitor=False):
+        if model not in ("open", "closed"):
+            raise ValueError(f"Unknown load model: {model!r}")
+        self.schedule = schedule
+        self.model = model
+        self.mix = mix
+        self.max_workers = max_workers
+        self.pacing = pacing
+        self.think_time = think_time
+        self.seed = seed
+        self.processes = processes
+        self.monitor = monitor
+
+    def build_model(self, worker=0, workers=1):
+        """Model for ``worker``'s share of the load when split across ``workers`` processes"""
+        if self.model == "open":
+            if workers == 1:
+                return OpenLoopModel(self.schedule, self.max_workers)
+            return OpenLoopModel(
+                self.schedule.scaled(1 / workers), math.ceil(self.max_workers / workers), phase=worker / workers
+            )
+        users = range(worker, math.ceil(self.schedule.peak), workers)
+        return ClosedLoopModel(self.schedule, self.pacing, self.think_time, users=users)
+
+
+def run_load(profile):
+    """
+    Execute a LoadProfile against Config.BASE_URL
+
+    Bookings created during the run are deleted afterwards. With more than
+    one process the load is split across worker processes (see
+    utils/load/multiprocess.py).
+
+    Returns:
+        LoadResult: Throughput, error counts and latency percentiles
+    """
+    processes = Config.LOAD_PROCESSES if profile.processes is None else profile.processes
+    processes = processes or os.cpu_count() or 1
+    if processes > 1 and not profile.monitor:
+        return run_load_processes(profile, processes)
+    recorder = LatencyRecorder()
+    if not profile.monitor:
+        return recorder.result(execute_profile(profile, profile.build_model(), recorder, profile.seed))
+
+    client = load_client()
+    monitor = SoakMonitor(recorder, client, duration=profile.schedule.duration)
+    with monitor:
+        duration = execute_profile(profile, profile.build_model(), monitor, profile.seed, client)
+    result = recorder.result(duration)
+    result.soak = monitor.report()
+    return result
+
+
+def load_client():
+    """
+    APIClient for load runs
+
+    Every request hits the server once: a session per thread, no response
+    cache, no cassette and no retries of throttled responses, so a 429 is
+    recorded as an error rather than as a slow success.
+    """
+    return APIClient(per_thread_session=True, response_cache=False, cassette=False, throttle_retries=0)
+
+
+def execute_profile(profile, model, recorder, seed, client=None, ready=None):
+    """
+    Run ``model``, recording every request into ``recorder``
+
+    One-off costs are paid before the clock starts: the payload generator is
+    built, the auth token fetched and every sender thread opens its
+    connection, so none of them lands in the first requests' latencies.
+
+    Args:
+        client: APIClient to send through (closed afterwards); default load_client()
+        ready: Called once warm, just before the clock starts
+
+    Returns:
+        float: Wall time of the run in seconds, warm-up excluded
+    """
+    client = client or load_client()
+    state = BookingState()
+    mix = EndpointMix(profile.mix, seed=seed)
+
+    def execute(intended_start):
+        name, operation = mix.choose()
+        started = time.perf_counter()
+        try:
+            ok = operation(client, state, mix.rng).status_code < 400
+        except Exception:
+            ok = False
+        recorder.record(name, intended_start, started, time.perf_counter(), ok)
+
+    def warm_up():
+        # Opens this thread's connection (sessions are per thread)
+        client.get(Config.PING_ENDPOINT)
+
+    try:
+        generate_booking_data(name_pool=True)   # builds the name pool, as the endpoint mix uses it
+        client.get_auth_token()
+        return model.run(execute, warm_up, ready)
+    finally:
+        bulk_delete(client, state.drain())
+        client.close()
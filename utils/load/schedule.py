@@ -0,0 +1,99 @@
+class Stage:
+    """
+    Linear transition to ``target`` over ``duration`` seconds
+
+    ``target`` is requests/second for open-loop models and virtual users for
+    closed-loop models.
+    """
+
+    def __init__(self, duration, target):
+        self.duration = float(duration)
+        self.target = float(target)
+
+    def __repr__(self):
+        return f"Stage(duration={self.duration}, target={self.target})"
+
+
+class Schedule:
+    """
+    Piecewise-linear load schedule built from stages (k6-style)
+
+    Args:
+        stages: List of Stage objects, each ramping from the previous target
+        start: Target at t=0
+    """
+
+    def __init__(self, stages, start=0.0):
+        self.stages = list(stages)
+        self.start = float(start)
+
+    @property
+    def duration(self):
+        return sum(stage.duration for stage in self.stages)
+
+    @property
+    def peak(self):
+        return max([self.start] + [stage.target for stage in self.stages])
+
+    def target_at(self, elapsed):
+        """Interpolated target ``elapsed`` seconds into the run"""
+        previous = self.start
+        for stage in self.stages:
+            if elapsed < stage.duration:
+                if stage.duration == 0:
+                    return stage.target
+                return previous + (stage.target - previous) * (elapsed / stage.duration)
+            elapsed -= stage.duration
+            previous = stage.target
+        return previous
+
+    def scaled(self, factor):
+        """Same shape with every target multiplied by ``factor``"""
+        return Schedule(
+            [Stage(stage.duration, stage.target * factor) for stage in self.stages],
+            start=self.start * factor,
+        )
+
+    def __repr__(self):
+        return f"Schedule(start={self.start}, stages={self.stages})"
+
+
+def constant(target, duration):
+    """Hold ``target`` for ``duration`` seconds"""
+    return Schedule([Stage(duration, target)], start=target)
+
+
+def ramp(start, end, duration):
+    """Ramp linearly from ``start`` to ``end``"""
+    return Schedule([Stage(duration, end)], start=start)
+
+
+def stress(start, step, steps, step_duration):
+    """Staircase that raises the load by ``step`` every ``step_duration`` seconds"""
+    stages = []
+    for index in range(steps):
+        level = start + step * index
+        stages.extend([Stage(0, level), Stage(step_duration, level)])
+    return Schedule(stages, start=start)
+
+
+def spike(base, peak, duration, spike_at, spike_duration, rise=0.5):
+    """Steady ``base`` load with a sudden jump to ``peak`` and a drop back"""
+    recovery = duration - spike_at - spike_duration - 2 * rise
+    if recovery < 0:
+        raise ValueError("Spike does not fit in the schedule duration")
+    return Schedule([
+        Stage(spike_at, base),
+        Stage(rise, peak),
+        Stage(spike_duration, peak),
+        Stage(rise, base),
+        Stage(recovery, base),
+    ], start=base)
+
+
+def soak(target, duration, ramp_up=0.0, ramp_down=0.0):
+    """Sustained ``target`` load for endurance runs"""
+    stages = [Stage(ramp_up, target), Stage(duration, target)]
+    if ramp_down:
+        stages.append(Stage(ramp_down, 0))
+    return Schedule(stages, start=0 if ramp_up else target)
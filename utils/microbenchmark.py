@@ -0,0 +1,216 @@
+"""Time and memory the harness itself spends per operation.
+
+measure() times an operation much as timeit does: the loop count is
+calibrated until one run takes at least MIN_RUN_NS, garbage collection is
+off while timing, and the fastest of several runs is kept. Time is the
+calling thread's CPU time, so other processes (xdist workers, a busy CI
+host) do not inflate it. The operations measured do no I/O. Then it runs the
+operation under tracemalloc, one call at a time, and records the peak memory
+allocated during each call and the blocks each call leaves allocated.
+CPython keeps no running count of allocations, so these two figures stand in
+for one.
+
+Budgets keeps the allowed time and KiB/op of every named hot path in a JSON
+file (Config.MICROBENCH_BUDGETS). Time is stored relative to
+reference_operation(), timed on the machine running the check, so a budget
+recorded on a fast workstation still holds on a slower CI runner.
+tests/unit/test_microbenchmarks.py, part of the harness unit tests,
+fails when a path goes over budget. Re-record the budgets after an
+intended change:
+
+    API_MICROBENCH_UPDATE=1 pytest tests/unit -m microbenchmark
+"""
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+from utils.file_lock import FileLock
+
+MIN_RUN_NS = 20_000_000
+RUNS = 5
+ALLOCATION_OPS = 50
+# Budgets are recorded with headroom; timings vary more between machines than allocations do
+TIME_HEADROOM = 3.0
+ALLOCATION_HEADROOM = 1.5
+MIN_ALLOCATION_BUDGET_KIB = 1.0
+
+_reference_ns = None
+
+
+class Measurement:
+    """
+    Cost of one operation
+
+    Args:
+        ns_per_op: Fastest run's CPU time per call
+        alloc_kib_per_op: Mean tracemalloc peak per call
+        retained_blocks_per_op: Memory blocks still allocated after each call, on average
+        ops: Calls timed per run
+    """
+
+    def __init__(self, ns_per_op, alloc_kib_per_op, retained_blocks_per_op, ops):
+        self.ns_per_op = ns_per_op
+        self.alloc_kib_per_op = alloc_kib_per_op
+        self.retained_blocks_per_op = retained_blocks_per_op
+        self.ops = ops
+
+    def __repr__(self):
+        return (
+            f"{self.ns_per_op:,.0f} ns/op, {self.alloc_kib_per_op:.2f} KiB/op, "
+            f"{self.retained_blocks_per_op:.2f} blocks kept/op"
+        )
+
+
+def _time_ns(operation, ops):
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        start = time.thread_time_ns()
+        for _ in range(ops):
+            operation()
+        return time.thread_time_ns() - start
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def measure_allocations(operation, ops=ALLOCATION_OPS):
+    """
+    Allocations of ``operation()``, called ``ops`` times one by one
+
+    Returns:
+        tuple: ``(mean tracemalloc peak KiB per call, blocks kept per call)``
+    """
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    try:
+        blocks = sys.getallocatedblocks()
+        peak_bytes = 0
+        for _ in range(ops):
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            operation()
+            peak_bytes += tracemalloc.get_traced_memory()[1] - before
+        retained = sys.getallocatedblocks() - blocks
+    finally:
+        if started:
+            tracemalloc.stop()
+    return peak_bytes / ops / 1024, retained / ops
+
+
+def time_per_op(operation, runs=RUNS, min_run_ns=MIN_RUN_NS):
+    """
+    CPU time per call of ``operation()``, timed like measure() but without allocations
+
+    Returns:
+        tuple: ``(fastest run's ns per call, calls per run)``
+    """
+    operation()   # warm caches and lazy imports
+    ops = 1
+    while True:
+        elapsed = _time_ns(operation, ops)
+        if elapsed >= min_run_ns:
+            break
+        ops = max(ops * 2, int(ops * min_run_ns / max(elapsed, 1)))
+    fastest = min([elapsed] + [_time_ns(operation, ops) for _ in range(runs - 1)])
+    return fastest / ops, ops
+
+
+def reference_operation():
+    """Fixed dict, string and JSON work that time budgets are expressed in"""
+    data = {f"field{index}": [index, str(index), index / 7] for index in range(16)}
+    return json.loads(json.dumps(data))
+
+
+def reference_ns():
+    """ns per reference_operation() call on this machine, timed on first use"""
+    global _reference_ns
+    if _reference_ns is None:
+        _reference_ns, _ = time_per_op(reference_operation)
+    return _reference_ns
+
+
+def measure(operation, runs=RUNS, min_run_ns=MIN_RUN_NS, allocation_ops=ALLOCATION_OPS):
+    """
+    Time and allocations per call of ``operation()``
+
+    Args:
+        operation: Callable taking no arguments
+        runs: Timed runs; the fastest is kept
+        min_run_ns: Shortest run the loop count is calibrated to
+        allocation_ops: Calls made under tracemalloc
+
+    Returns:
+        Measurement
+    """
+    ns_per_op, ops = time_per_op(operation, runs, min_run_ns)
+    alloc_kib, retained = measure_allocations(operation, allocation_ops)
+    return Measurement(ns_per_op, alloc_kib, retained, ops)
+
+
+class Budgets:
+    """
+    Stored per-operation budgets: ``{name: {"time_units": ..., "alloc_kib_per_op": ...}}``
+
+    ``time_units`` is the allowed time per call in reference_operation() calls,
+    so the ns budget follows the speed of the machine running the check.
+
+    Args:
+        path: JSON file
+        time_factor: Multiplier applied to time budgets when checking (noisy runners)
+    """
+
+    def __init__(self, path, time_factor=1.0):
+        self.path = str(path)
+        self.time_factor = time_factor
+
+    def load(self):
+        try:
+            with open(self.path, encoding="utf-8") as budget_file:
+                return json.load(budget_file)
+        except FileNotFoundError:
+            return {}
+
+    def check(self, name, measurement):
+        """
+        Ways ``measurement`` breaks the budget of ``name``
+
+        Returns:
+            list: Failure messages; empty when within budget
+        """
+        budget = self.load().get(name)
+        if budget is None:
+            return [f"{name}: no budget in {self.path} (record one with API_MICROBENCH_UPDATE=1)"]
+        failures = []
+        reference = reference_ns()
+        units_budget = budget["time_units"] * self.time_factor
+        if measurement.ns_per_op > units_budget * reference:
+            failures.append(
+                f"{name}: {measurement.ns_per_op:,.0f} ns/op ({measurement.ns_per_op / reference:.1f}x reference) "
+                f"over budget {units_budget:.1f}x ({units_budget * reference:,.0f} ns on this machine)"
+            )
+        if measurement.alloc_kib_per_op > budget["alloc_kib_per_op"]:
+            failures.append(
+                f"{name}: {measurement.alloc_kib_per_op:.2f} KiB/op over budget {budget['alloc_kib_per_op']:.2f}"
+            )
+        return failures
+
+    def record(self, name, measurement):
+        """Store a budget for ``name`` with headroom over ``measurement``"""
+        with FileLock(self.path + ".lock"):
+            budgets = self.load()
+            budgets[name] = {
+                "time_units": round(measurement.ns_per_op / reference_ns() * TIME_HEADROOM, 2),
+                "alloc_kib_per_op": round(
+                    max(measurement.alloc_kib_per_op * ALLOCATION_HEADROOM, MIN_ALLOCATION_BUDGET_KIB), 1
+                ),
+            }
+            temporary = self.path + ".tmp"
+            with open(temporary, "w", encoding="utf-8") as budget_file:
+                json.dump(dict(sorted(budgets.items())), budget_file, indent=2)
+                budget_file.write("\n")
+            os.replace(temporary, self.path)
@@ -0,0 +1,78 @@
+"""Helpers for running the suite under pytest-xdist.
+
+The controller process owns run-wide resources (the stand-in server and a
+shared scratch directory) and hands them to workers through ``workerinput``.
+Workers coordinate anything they create lazily (e.g. the booking pool) through
+lock-protected JSON files in that directory, so it is built once per run
+instead of once per worker.
+"""
+import json
+import os
+
+from utils.file_lock import FileLock
+
+# Marker -> xdist_group name. Tests in one group run on the same worker, one
+# after another; None leaves tests free to spread across workers.
+MARKER_GROUPS = {
+    "booking": "booking",          # stateful: create/update/delete shared bookings
+    "performance": "performance",  # load tests would skew each other's numbers
+    "smoke": "smoke",
+    "auth": None,                  # independent requests, spread freely
+}
+
+
+def is_worker(config):
+    return hasattr(config, "workerinput")
+
+
+def is_controller(config):
+    return not is_worker(config) and bool(getattr(config.option, "numprocesses", None))
+
+
+def worker_input(config, key, default=None):
+    if not is_worker(config):
+        return default
+    return config.workerinput.get(key, default)
+
+
+def xdist_group_for(item):
+    """xdist_group name for a test item from its first grouped marker, or None"""
+    for marker, group in MARKER_GROUPS.items():
+        if group and item.get_closest_marker(marker):
+            return group
+    return None
+
+
+def stable_nodeid(item):
+    """Nodeid without the "@group" suffix xdist adds under --dist loadgroup"""
+    marker = item.get_closest_marker("xdist_group")
+    group = marker.args[0] if marker and marker.args else None
+    if group and item.nodeid.endswith(f"@{group}"):
+        return item.nodeid[:-len(group) - 1]
+    return item.nodeid
+
+
+def run_once(path, factory):
+    """
+    Return the JSON value stored at ``path``, creating it with ``factory()`` first if needed
+
+    The first process to take the lock builds the value; every other process
+    waits for it and reads the stored copy.
+    """
+    with FileLock(f"{path}.lock"):
+        if os.path.exists(path):
+            with open(path) as stored:
+                return json.load(stored)
+        value = factory()
+        with open(path, "w") as stored:
+            json.dump(value, stored)
+        return value
+
+
+def read_shared(path, default=None):
+    """Read a value previously stored by run_once(), if any"""
+    try:
+        with open(path) as stored:
+            return json.load(stored)
+    except (OSError, ValueError):
+        return default
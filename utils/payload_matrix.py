@@ -0,0 +1,167 @@
+"""Data-driven payload matrices for security and boundary test families.
+
+A matrix sends one request per payload concurrently. Payloads that produce
+identical requests share one round-trip. The check runs for every payload,
+so one failing payload no longer hides the others.
+
+    result = payload_matrix.run(
+        "POST", Config.AUTH_ENDPOINT, load_corpus("sql_injection.txt"),
+        build=lambda payload: {"data": {"username": payload, "password": Config.PASSWORD}},
+        check=assert_rejected_without_token,
+    )
+    result.assert_all_passed()
+"""
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from config import Config
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tests", "data", "payloads")
+LABEL_LENGTH = 60
+
+
+def load_corpus(path):
+    """
+    Load payloads from a corpus file
+
+    ``.json`` files hold a JSON array. Any other file holds one payload per
+    line, taken verbatim (no comment syntax, since payloads may contain ``#``);
+    blank lines are skipped.
+
+    Args:
+        path: File path, or a file name inside tests/data/payloads
+
+    Returns:
+        list: Payloads in file order
+    """
+    if not os.path.isabs(path) and not os.path.exists(path):
+        path = os.path.join(CORPUS_DIR, path)
+    with open(path, encoding="utf-8") as corpus:
+        if path.endswith(".json"):
+            return json.load(corpus)
+        return [line.rstrip("\r\n") for line in corpus if line.strip()]
+
+
+def payload_label(payload):
+    """Short printable form of a payload for messages and reports"""
+    if isinstance(payload, str) and len(payload) > LABEL_LENGTH:
+        return f"{payload[:LABEL_LENGTH // 2]!r}... ({len(payload)} chars)"
+    return repr(payload)
+
+
+class PayloadResult:
+    """Outcome of one payload: the (possibly shared) response and the check's verdict"""
+
+    def __init__(self, payload, response=None, error=None, elapsed=None, shared=False):
+        self.payload = payload
+        self.response = response
+        self.error = error
+        self.elapsed = elapsed
+        self.shared = shared
+
+    @property
+    def passed(self):
+        return self.error is None
+
+    def to_dict(self):
+        """JSON-serializable summary (travels with the test report under xdist)"""
+        return {
+            "payload": payload_label(self.payload),
+            "status": self.response.status_code if self.response is not None else None,
+            "passed": self.passed,
+            "error": self.error,
+            "elapsed_ms": self.elapsed * 1000 if self.elapsed is not None else None,
+            "shared": self.shared,
+        }
+
+
+class MatrixResult:
+    """Per-payload results of one PayloadMatrix.run()"""
+
+    def __init__(self, results, requests_sent):
+        self.results = results
+        self.requests_sent = requests_sent
+
+    def __iter__(self):
+        return iter(self.results)
+
+    def __len__(self):
+        return len(self.results)
+
+    @property
+    def failures(self):
+        return [result for result in self.results if not result.passed]
+
+    def assert_all_passed(self, message=""):
+        failures = self.failures
+        assert not failures, (
+            f"{message}{len(failures)} of {len(self.results)} payloads failed:\n"
+            + "\n".join(f"  {payload_label(result.payload)}: {result.error}" for result in failures)
+        )
+
+
+class PayloadMatrix:
+    """
+    Runs payload corpora against an endpoint concurrently
+
+    Args:
+        api_client: APIClient instance
+        workers: Maximum concurrent requests
+    """
+
+    def __init__(self, api_client, workers=None):
+        self.api_client = api_client
+        self.workers = workers or Config.PAYLOAD_MATRIX_WORKERS
+        self.results = []   # every PayloadResult of every run, for the report
+
+    def run(self, method, endpoint, payloads, build, check):
+        """
+        Send one request per payload and check each response
+
+        Args:
+            method: HTTP method
+            endpoint: Endpoint path
+            payloads: Iterable of payloads (list, generator, load_corpus() output)
+            build: ``build(payload)`` -> request kwargs, e.g. ``{"data": {...}}``
+            check: Assertion helper called as ``check(response)``, e.g.
+                assert_bad_credentials_response
+
+        Returns:
+            MatrixResult
+        """
+        payloads = list(payloads)
+        requests = {}   # request key -> kwargs; identical requests are sent once
+        keys = []
+        for payload in payloads:
+            kwargs = build(payload)
+            key = json.dumps([method, endpoint, kwargs], sort_keys=True, default=repr)
+            requests.setdefault(key, kwargs)
+            keys.append(key)
+
+        def send(kwargs):
+            start_time = time.perf_counter()
+            try:
+                response = getattr(self.api_client, method.lower())(endpoint, **kwargs)
+            except Exception as exc:
+                return None, f"Request failed: {exc!r}", time.perf_counter() - start_time
+            return response, None, time.perf_counter() - start_time
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            sent = dict(zip(requests, executor.map(send, requests.values())))
+
+        results = []
+        seen = set()
+        for payload, key in zip(payloads, keys):
+            response, error, elapsed = sent[key]
+            if error is None:
+                try:
+                    check(response)
+                except AssertionError as exc:
+                    error = str(exc)
+            results.append(PayloadResult(payload, response, error, elapsed, shared=key in seen))
+            seen.add(key)
+
+        self.results.extend(results)
+        return MatrixResult(results, len(requests))
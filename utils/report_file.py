@@ -1,28 +1,227 @@
-import pytest
+"""Streaming JSONL test report with an HTML summary rendered from it.
 
-@pytest.hookimpl(hookwrapper=True)
-def pytest_runtest_make_report(item):
-    outcome = yield
-    report = outcome.get_result()
+JsonlReporter appends one compact JSON record per finished test (case_id,
+title, outcome, duration, request latency and, where present, the baseline
+verdict and per-payload results) and flushes each line. Memory does not
+grow with the number of tests, and a killed run still leaves every
+finished test on disk. render_html() streams that file into a summary
+page, so the whole report never has to be held in memory:
 
-    # Add custom markers to the report
-    if report.when == 'call':
-        case_id = item.get_closest_marker('case_id')
-        title = item.get_closest_marker('title')
+    python -m utils.report_file reports/results.jsonl -o reports/summary.html
+"""
+import argparse
+import html
+import json
+import os
+import time
+from collections import Counter
 
-        if case_id:
-            report.case_id = case_id.args[0] if case_id.args else 'N/A'
-        if title:
-            report.title = title.args[0] if title.args else 'N/A'
+MESSAGE_LIMIT = 2000
+LATENCY_COLUMNS = ("p50", "p90", "p99", "max")
 
-def pytest_html_results_table_header(cells):
-    cells.insert(1, '<th>Test Case ID</th>')
-    cells.insert(2, '<th>Title</th>')
 
+class JsonlReporter:
+    """
+    pytest plugin writing one JSON line per test as it finishes
 
-def pytest_html_results_table_row(report, cells):
-    case_id = getattr(report, 'case_id', 'N/A')
-    title = getattr(report, 'title', 'N/A')
+    Registered by conftest on the process that receives every test report
+    (the controller under xdist).
 
-    cells.insert(1, f'<td>{case_id}</td>')
-    cells.insert(2, f'<td>{title}</td>')
\ No newline at end of file
+    Args:
+        path: JSONL file, truncated at session start
+        html_path: Summary page rendered from ``path`` at session end, or None
+        request_metrics: RequestMetrics whose per-endpoint latencies close the file
+        request_profile: RequestProfile whose phase timings close the file, or None
+    """
+
+    def __init__(self, path, html_path=None, request_metrics=None, request_profile=None):
+        self.path = str(path)
+        self.html_path = html_path
+        self.request_metrics = request_metrics
+        self.request_profile = request_profile
+        self.started = None
+        self._pending = {}
+        self._file = None
+
+    def _write(self, record):
+        self._file.write(json.dumps(record, separators=(",", ":"), default=str) + "\n")
+        self._file.flush()
+
+    def pytest_sessionstart(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(self.path, "w", encoding="utf-8")
+        self.started = time.time()
+        self._write({"type": "session", "started": self.started})
+
+    def pytest_runtest_logreport(self, report):
+        record = self._pending.setdefault(report.nodeid, {
+            "type": "test", "nodeid": report.nodeid, "outcome": "passed", "duration": 0.0,
+        })
+        record["duration"] += report.duration
+        if report.when == "call":
+            for field in ("case_id", "title", "latency", "baseline", "payload_results"):
+                value = getattr(report, field, None)
+                if value is not None:
+                    record[field] = value
+        if report.failed:
+            record["outcome"] = "failed" if report.when == "call" else "error"
+            record.setdefault("message", report.longreprtext[-MESSAGE_LIMIT:])
+        elif report.skipped and record["outcome"] == "passed":
+            record["outcome"] = "skipped"
+            if isinstance(report.longrepr, tuple):
+                record["message"] = report.longrepr[2]
+
+        if report.when == "teardown":
+            record["duration"] = round(record["duration"], 4)
+            self._write(self._pending.pop(report.nodeid))
+
+    def pytest_sessionfinish(self, exitstatus):
+        if self._file is None:
+            return
+        endpoints = {}
+        if self.request_metrics is not None:
+            endpoints = {key: histogram.summary() for key, histogram in self.request_metrics.histograms.items()}
+        summary = {
+            "type": "summary",
+            "duration": time.time() - self.started,
+            "exitstatus": int(exitstatus),
+            "endpoints": endpoints,
+        }
+        if self.request_profile is not None:
+            summary["request_phases"] = self.request_profile.summary()
+            summary["slowest_requests"] = self.request_profile.slowest
+        self._write(summary)
+        self._file.close()
+        self._file = None
+        if self.html_path:
+            render_html(self.path, self.html_path)
+
+    def pytest_terminal_summary(self, terminalreporter):
+        terminalreporter.write_sep("-", f"Streaming report: {self.path}")
+        if self.html_path:
+            terminalreporter.write_sep("-", f"Summary: {self.html_path}")
+
+
+def iter_records(path):
+    """Yield records from a JSONL report, skipping a line cut short by a killed run"""
+    with open(path, encoding="utf-8") as report:
+        for line in report:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+
+def render_html(path, html_path):
+    """
+    Render a summary page from a JSONL report
+
+    Reads the file twice (totals first, then rows) and writes rows as they
+    are read, so memory stays flat however many tests the run had.
+    """
+    outcomes = Counter()
+    summary = None
+    for record in iter_records(path):
+        if record["type"] == "test":
+            outcomes[record["outcome"]] += 1
+        elif record["type"] == "summary":
+            summary = record
+
+    directory = os.path.dirname(str(html_path))
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(html_path, "w", encoding="utf-8") as page:
+        page.write(
+            "<!DOCTYPE html><html><head><meta charset='utf-8'><title>Test summary</title>"
+            "<style>body{font-family:sans-serif}table{border-collapse:collapse}"
+            "td,th{border:1px solid #ccc;padding:2px 6px;vertical-align:top}"
+            ".failed,.error{background:#fdd}.skipped{background:#ffd}</style></head><body>"
+            "<h1>Test summary</h1>"
+        )
+        totals = ", ".join(f"{count} {outcome}" for outcome, count in sorted(outcomes.items()))
+        if summary is None:
+            page.write(f"<p>{totals or 'no tests'} (run did not finish)</p>")
+        else:
+            page.write(f"<p>{totals or 'no tests'} in {summary['duration']:.1f}s</p>")
+
+        header = "".join(f"<th>{column} (ms)</th>" for column in LATENCY_COLUMNS)
+        page.write(
+            "<table><tr><th>Result</th><th>Test Case ID</th><th>Title</th><th>Test</th>"
+            f"<th>Duration (s)</th>{header}<th>Baseline</th><th>Details</th></tr>"
+        )
+        for record in iter_records(path):
+            if record["type"] == "test":
+                page.write(_test_row(record))
+        page.write("</table>")
+
+        if summary and summary["endpoints"]:
+            page.write(
+                "<h2>Request latency by endpoint</h2>"
+                f"<table><tr><th>Endpoint</th><th>Requests</th>{header}</tr>"
+            )
+            for key, stats in sorted(summary["endpoints"].items()):
+                page.write(
+                    f"<tr><td>{html.escape(key)}</td><td>{stats['count']}</td>"
+                    + "".join(f"<td>{stats[column]:.1f}</td>" for column in LATENCY_COLUMNS)
+                    + "</tr>"
+                )
+            page.write("</table>")
+
+        if summary and summary.get("request_phases"):
+            from utils.request_profiler import html_table   # pulls in urllib3; only --profile-requests runs need it
+            page.write(html_table(summary["request_phases"]))
+        for entry in (summary or {}).get("slowest_requests", ()):
+            page.write(
+                f"<details><summary>{html.escape(entry['endpoint'])} {entry['total_ms']:.1f} ms "
+                f"({html.escape(entry['test'])})</summary><pre>{html.escape(entry['stats'])}</pre></details>"
+            )
+        page.write("</body></html>")
+    return html_path
+
+
+def _test_row(record):
+    latency = record.get("latency")
+    cells = [
+        record["outcome"],
+        record.get("case_id", "N/A"),
+        record.get("title", "N/A"),
+        record["nodeid"],
+        f"{record['duration']:.3f}",
+    ]
+    cells += [f"{latency[column]:.1f}" if latency else "-" for column in LATENCY_COLUMNS]
+    cells.append(record.get("baseline", "-"))
+
+    details = ""
+    if record.get("message"):
+        details += f"<pre>{html.escape(record['message'])}</pre>"
+    payloads = record.get("payload_results")
+    if payloads:
+        failed = sum(1 for result in payloads if not result["passed"])
+        details += f"<details><summary>{len(payloads)} payloads, {failed} failed</summary><ul>"
+        details += "".join(
+            f"<li>{html.escape(result['payload'])}: {result['status'] or '-'} "
+            f"{'passed' if result['passed'] else html.escape(result['error'] or 'failed')}</li>"
+            for result in payloads
+        )
+        details += "</ul></details>"
+
+    return (
+        f"<tr class='{record['outcome']}'>"
+        + "".join(f"<td>{html.escape(str(cell))}</td>" for cell in cells)
+        + f"<td>{details}</td></tr>"
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render the HTML summary of a JSONL test report")
+    parser.add_argument("path", help="JSONL report written by --jsonl-report")
+    parser.add_argument("-o", "--output", default=None, help="HTML file (default: next to the report)")
+    args = parser.parse_args(argv)
+    output = args.output or os.path.splitext(args.path)[0] + ".html"
+    print(render_html(args.path, output))
+
+
+if __name__ == "__main__":
+    main()
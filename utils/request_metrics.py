@@ -0,0 +1,91 @@
+import re
+import threading
+from contextlib import contextmanager
+
+from utils.histogram import LatencyHistogram
+
+_ID_SEGMENT = re.compile(r"/\d+(?=/|$)")
+
+_active = []
+_active_lock = threading.Lock()
+
+
+def endpoint_template(endpoint):
+    """Normalize an endpoint to its template, e.g. ``/booking/42?x=1`` -> ``/booking/{id}``"""
+    return _ID_SEGMENT.sub("/{id}", endpoint.split("?", 1)[0])
+
+
+class RequestMetrics:
+    """Latency histograms keyed by ``"METHOD /endpoint/template"``"""
+
+    def __init__(self):
+        self.histograms = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return sum(histogram.count for histogram in self.histograms.values())
+
+    def record(self, key, seconds):
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = LatencyHistogram()
+            histogram.record(seconds)
+
+    def merge(self, histograms):
+        """Merge ``{key: LatencyHistogram}`` into this collection"""
+        with self._lock:
+            for key, histogram in histograms.items():
+                self.histograms.setdefault(key, LatencyHistogram()).merge(histogram)
+
+    def total(self):
+        """Single histogram over every endpoint"""
+        combined = LatencyHistogram()
+        for histogram in self.histograms.values():
+            combined.merge(histogram)
+        return combined
+
+    def to_dict(self):
+        return {key: histogram.to_dict() for key, histogram in self.histograms.items()}
+
+    @classmethod
+    def from_dict(cls, data):
+        metrics = cls()
+        metrics.histograms = {key: LatencyHistogram.from_dict(value) for key, value in data.items()}
+        return metrics
+
+
+def record_request(method, endpoint, seconds):
+    """Record a finished request into every active RequestMetrics"""
+    if not _active:
+        return
+    key = f"{method} {endpoint_template(endpoint)}"
+    for metrics in list(_active):
+        metrics.record(key, seconds)
+
+
+@contextmanager
+def collecting(metrics=None):
+    """Collect every request made inside the block into ``metrics``"""
+    metrics = RequestMetrics() if metrics is None else metrics
+    with _active_lock:
+        _active.append(metrics)
+    try:
+        yield metrics
+    finally:
+        with _active_lock:
+            _active.remove(metrics)
+
+
+@contextmanager
+def isolated(metrics=None):
+    """Like collecting(), but requests made inside the block reach no other collector (stubbed requests)"""
+    metrics = RequestMetrics() if metrics is None else metrics
+    with _active_lock:
+        enclosing = _active[:]
+        _active[:] = [metrics]
+    try:
+        yield metrics
+    finally:
+        with _active_lock:
+            _active[:] = enclosing
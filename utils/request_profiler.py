@@ -0,0 +1,301 @@
+"""Per-request phase timings for ``pytest --profile-requests``.
+
+With Config.PROFILE_REQUESTS set, APIClient sessions open connections
+through ProfiledHTTPConnection / ProfiledHTTPSConnection, which time DNS
+resolution, TCP connect and the TLS handshake of every new connection.
+RequestProfiler.measure() adds time-to-first-byte (from sending the request
+until the response headers are parsed, connection setup excluded) and body
+download, and files the phases under the request's ``METHOD /template``.
+Requests sent on a kept-alive connection have no dns/connect/tls phase; the
+``new_connections`` count shows how often those were paid.
+
+With ``slowest`` > 0 every request also runs under cProfile, and the
+client-side stacks of the N slowest requests are kept.
+"""
+import cProfile
+import heapq
+import html
+import io
+import itertools
+import os
+import pstats
+import socket
+import threading
+import time
+
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NameResolutionError
+from urllib3.util.connection import allowed_gai_family
+
+from config import Config
+from utils.histogram import LatencyHistogram
+from utils.request_metrics import endpoint_template
+
+PHASES = ("dns", "connect", "tls", "ttfb", "body", "total")
+SETUP_PHASES = ("dns", "connect", "tls")
+# (column label, summary field) for reports
+COLUMNS = (
+    ("requests", "requests"),
+    ("new conns", "new_connections"),
+    ("dns", "dns_mean"),
+    ("connect", "connect_mean"),
+    ("tls", "tls_mean"),
+    ("ttfb p50", "ttfb_p50"),
+    ("ttfb p90", "ttfb_p90"),
+    ("body p50", "body_p50"),
+    ("body p90", "body_p90"),
+    ("total p90", "total_p90"),
+)
+STATS_LINES = 15   # cProfile entries kept per slow request
+
+_local = threading.local()
+
+
+class _PhaseTimingMixin:
+    """Records dns/connect/tls into the calling thread's timing dict, if any"""
+
+    def _new_conn(self):
+        timing = getattr(_local, "timing", None)
+        if timing is None:
+            return super()._new_conn()
+
+        start = time.perf_counter()
+        host = self._dns_host
+        try:
+            infos = socket.getaddrinfo(host.strip("[]"), self.port, allowed_gai_family(), socket.SOCK_STREAM)
+        except socket.gaierror as e:
+            raise NameResolutionError(self.host, self, e) from e
+        resolved = time.perf_counter()
+        timing["dns"] = resolved - start
+
+        # Connect to the resolved addresses in order, as create_connection() would
+        error = None
+        try:
+            for address in dict.fromkeys(info[4][0] for info in infos):
+                self._dns_host = address
+                try:
+                    sock = super()._new_conn()
+                    break
+                except ConnectTimeoutError as exc:   # NewConnectionError included
+                    error = exc
+            else:
+                raise error
+        finally:
+            self._dns_host = host
+        timing["connect"] = time.perf_counter() - resolved
+        return sock
+
+    def connect(self):
+        start = time.perf_counter()
+        super().connect()
+        timing = getattr(_local, "timing", None)
+        if timing is not None and isinstance(self, HTTPSConnection) and "connect" in timing:
+            timing["tls"] = max(0.0, time.perf_counter() - start - timing["dns"] - timing["connect"])
+
+
+class ProfiledHTTPConnection(_PhaseTimingMixin, HTTPConnection):
+    pass
+
+
+class ProfiledHTTPSConnection(_PhaseTimingMixin, HTTPSConnection):
+    pass
+
+
+class ProfiledHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = ProfiledHTTPConnection
+
+
+class ProfiledHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = ProfiledHTTPSConnection
+
+
+# PoolManager.pool_classes_by_scheme for profiled sessions
+POOL_CLASSES = {"http": ProfiledHTTPConnectionPool, "https": ProfiledHTTPSConnectionPool}
+
+
+class RequestProfile:
+    """
+    Phase histograms per endpoint plus the slowest profiled requests
+
+    Args:
+        slowest: Number of slowest requests whose cProfile stacks are kept
+    """
+
+    def __init__(self, slowest=0):
+        self.slowest_limit = slowest
+        self.phases = {}    # "METHOD /template" -> {phase: LatencyHistogram}
+        self._slowest = []  # min-heap of (total seconds, sequence, entry)
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return sum(phases["total"].count for phases in self.phases.values())
+
+    def record(self, key, timing):
+        """Record one request's ``{phase: seconds}``"""
+        with self._lock:
+            histograms = self.phases.get(key)
+            if histograms is None:
+                histograms = self.phases[key] = {phase: LatencyHistogram() for phase in PHASES}
+            for phase, seconds in timing.items():
+                histograms[phase].record(seconds)
+
+    def wants(self, seconds):
+        """Whether a request taking ``seconds`` would be among the slowest kept"""
+        return len(self._slowest) < self.slowest_limit or seconds > self._slowest[0][0]
+
+    def add_slow(self, seconds, entry):
+        with self._lock:
+            item = (seconds, next(self._sequence), entry)
+            if len(self._slowest) < self.slowest_limit:
+                heapq.heappush(self._slowest, item)
+            elif self.slowest_limit and seconds > self._slowest[0][0]:
+                heapq.heapreplace(self._slowest, item)
+
+    @property
+    def slowest(self):
+        """Kept slow requests, slowest first"""
+        return [entry for _, _, entry in sorted(self._slowest, key=lambda item: item[0], reverse=True)]
+
+    def merge(self, data):
+        """Merge the to_dict() form of another profile (e.g. from an xdist worker's report)"""
+        with self._lock:
+            for key, phases in data["phases"].items():
+                histograms = self.phases.setdefault(key, {phase: LatencyHistogram() for phase in PHASES})
+                for phase, histogram in phases.items():
+                    histograms[phase].merge(LatencyHistogram.from_dict(histogram))
+        for entry in data["slowest"]:
+            self.add_slow(entry["total_ms"] / 1000, entry)
+
+    def to_dict(self):
+        with self._lock:
+            return self._to_dict()
+
+    def _to_dict(self):
+        return {
+            "phases": {
+                key: {phase: histogram.to_dict() for phase, histogram in phases.items() if histogram.count}
+                for key, phases in self.phases.items()
+            },
+            "slowest": self.slowest,
+        }
+
+    def drain(self):
+        """Return to_dict() and start over, so each test report carries only its own requests"""
+        with self._lock:
+            data = self._to_dict()
+            self.phases = {}
+            self._slowest = []
+        return data
+
+    def summary(self):
+        """``{key: {field: value}}`` with the fields named in COLUMNS; times in ms, None if unseen"""
+        summary = {}
+        for key, phases in sorted(self.phases.items()):
+            row = {"requests": phases["total"].count, "new_connections": phases["connect"].count}
+            for phase in SETUP_PHASES:
+                row[f"{phase}_mean"] = phases[phase].mean if phases[phase].count else None
+            for phase in ("ttfb", "body", "total"):
+                for pct in (50, 90):
+                    row[f"{phase}_p{pct}"] = phases[phase].percentile(pct) if phases[phase].count else None
+            summary[key] = row
+        return summary
+
+
+def format_cell(value):
+    if value is None:
+        return "-"
+    if isinstance(value, float):
+        return f"{value:.2f}"
+    return str(value)
+
+
+def html_table(summary):
+    """HTML table of a RequestProfile.summary()"""
+    header = "".join(f"<th>{html.escape(label)}</th>" for label, _ in COLUMNS)
+    rows = "".join(
+        f"<tr><td>{html.escape(key)}</td>"
+        + "".join(f"<td>{format_cell(row[field])}</td>" for _, field in COLUMNS)
+        + "</tr>"
+        for key, row in summary.items()
+    )
+    return (
+        "<h2>Request timing breakdown (ms)</h2>"
+        f"<table><tr><th>Endpoint</th>{header}</tr>{rows}</table>"
+    )
+
+
+class RequestProfiler:
+    """
+    Times requests phase by phase; use shared() for the process-wide instance
+
+    Args:
+        slowest: Keep cProfile stacks of this many slowest requests (0 = no cProfile)
+    """
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, slowest=0):
+        self.profile = RequestProfile(slowest)
+
+    @classmethod
+    def shared(cls):
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls(Config.PROFILE_SLOWEST)
+            return cls._shared
+
+    def measure(self, method, endpoint, send, read_body=True):
+        """
+        Send a request and record its phases
+
+        Args:
+            method: HTTP method
+            endpoint: Endpoint path
+            send: Callable sending the request with ``stream=True`` and returning the response
+            read_body: Download the body here (timed as "body"); False leaves
+                it to the caller, as for streamed requests
+
+        Returns:
+            The response
+        """
+        timing = _local.timing = {}
+        profiler = None
+        if self.profile.slowest_limit:
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:   # Python 3.12+: another thread's profiler is active
+                profiler = None
+        start = time.perf_counter()
+        try:
+            response = send()
+            headers_received = time.perf_counter()
+            if read_body:
+                response.content
+                timing["body"] = time.perf_counter() - headers_received
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            _local.timing = None
+        end = time.perf_counter()
+
+        setup = sum(timing.get(phase, 0.0) for phase in SETUP_PHASES)
+        timing["ttfb"] = max(0.0, headers_received - start - setup)
+        timing["total"] = end - start
+        key = f"{method} {endpoint_template(endpoint)}"
+        self.profile.record(key, timing)
+
+        if profiler is not None and self.profile.wants(timing["total"]):
+            stream = io.StringIO()
+            pstats.Stats(profiler, stream=stream).sort_stats("cumulative").print_stats(STATS_LINES)
+            self.profile.add_slow(timing["total"], {
+                "endpoint": key,
+                "test": os.environ.get("PYTEST_CURRENT_TEST", ""),
+                "total_ms": timing["total"] * 1000,
+                "phases_ms": {phase: seconds * 1000 for phase, seconds in timing.items() if phase != "total"},
+                "stats": stream.getvalue().strip("\n"),
+            })
+        return response
@@ -0,0 +1,178 @@
+"""Opt-in cache of GET responses for APIClient.
+
+With Config.RESPONSE_CACHE set to ``test``, ``module`` or ``session``,
+APIClient.get() serves repeated reads of unchanged data from a
+process-wide ResponseCache. The cache key is the endpoint path, the
+normalized query (from the endpoint and ``params``, sorted) and the request
+headers. Only plain, non-streamed 200 responses are stored.
+
+Writes go through and invalidate what they may change, both when they are
+sent and when they complete:
+
+* PUT/PATCH/DELETE ``/booking/42`` affects ``/booking/42`` (and anything
+  below it) plus the ``/booking`` collection, since a search may match it;
+* POST ``/booking`` affects the ``/booking`` collection only.
+
+While a write is in flight, reads it affects bypass the cache. Another
+client may already see the write's effect, so a cached copy from before it
+must not be served, and a response read meanwhile must not be stored.
+
+ResponseCachePlugin empties the cache at the end of each test or module,
+following the configured scope. Writes made by another process or by
+AsyncAPIClient are not seen, so only opt in where each test owns the data
+it writes.
+"""
+import collections
+import threading
+from urllib.parse import parse_qsl
+
+import pytest
+
+SCOPES = ("off", "test", "module", "session")
+CACHEABLE_KWARGS = frozenset(("params", "headers", "timeout"))
+
+
+def _path(endpoint):
+    return endpoint.split("?", 1)[0].rstrip("/") or "/"
+
+
+def _affects(method, path, cached_path):
+    """Whether a ``method`` write to ``path`` may change a GET of ``cached_path``"""
+    return (
+        cached_path == path
+        or path.startswith(cached_path + "/")                              # collection it belongs to
+        or (method != "POST" and cached_path.startswith(path + "/"))      # resources below it
+    )
+
+
+class ResponseCache:
+    """Thread-safe GET response cache with write-through invalidation"""
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self):
+        self._entries = {}       # key -> response; key[0] is the path
+        self._generation = 0     # bumped by every invalidation
+        self._writes = collections.Counter()   # (method, path) of writes in flight
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def shared(cls):
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def key(endpoint, **kwargs):
+        """Cache key of a GET, or None if the request is not cacheable (streamed, cookies, ...)"""
+        if not CACHEABLE_KWARGS.issuperset(kwargs):
+            return None
+        path, _, query = endpoint.partition("?")
+        params = kwargs.get("params") or {}
+        pairs = parse_qsl(query, keep_blank_values=True)
+        pairs += params.items() if isinstance(params, dict) else params
+        headers = kwargs.get("headers") or {}
+        return (
+            _path(path),
+            tuple(sorted((str(name), str(value)) for name, value in pairs if value is not None)),
+            tuple(sorted((name.lower(), str(value)) for name, value in headers.items())),
+        )
+
+    def lookup(self, key):
+        """
+        Cached response for ``key``
+
+        Returns:
+            tuple: ``(response or None, generation)``; pass the generation to
+            store(), which skips it when it is None (a write in flight affects the key)
+        """
+        with self._lock:
+            if any(_affects(method, path, key[0]) for method, path in self._writes):
+                self.misses += 1
+                return None, None
+            response = self._entries.get(key)
+            if response is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return response, self._generation
+
+    def store(self, key, response, generation):
+        """Keep a fresh response, unless a write invalidated the cache since lookup()"""
+        if generation is None or response.status_code != 200:
+            return
+        with self._lock:
+            if generation == self._generation:
+                self._entries[key] = response
+
+    def begin_write(self, method, endpoint):
+        """Drop what a ``method`` request to ``endpoint`` may change and bypass it until end_write()"""
+        with self._lock:
+            self._invalidate(method, _path(endpoint))
+            self._writes[(method, _path(endpoint))] += 1
+
+    def end_write(self, method, endpoint):
+        with self._lock:
+            key = (method, _path(endpoint))
+            self._writes[key] -= 1
+            if not self._writes[key]:
+                del self._writes[key]
+            self._invalidate(*key)
+
+    def _invalidate(self, method, path):
+        self._generation += 1
+        stale = [key for key in self._entries if _affects(method, path, key[0])]
+        for key in stale:
+            del self._entries[key]
+        self.invalidations += len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "entries": len(self._entries),
+            }
+
+
+class ResponseCachePlugin:
+    """
+    Empties a ResponseCache when its scope ends
+
+    Args:
+        cache: ResponseCache
+        scope: "test", "module" or "session"
+    """
+
+    def __init__(self, cache, scope):
+        self.cache = cache
+        self.scope = scope
+
+    @pytest.hookimpl(trylast=True)
+    def pytest_runtest_teardown(self, item, nextitem):
+        if self.scope == "test" or (
+            self.scope == "module" and (nextitem is None or nextitem.module is not item.module)
+        ):
+            self.cache.clear()
+
+    def pytest_terminal_summary(self, terminalreporter):
+        stats = self.cache.stats()
+        if stats["hits"] or stats["misses"]:
+            terminalreporter.line(
+                f"response cache ({self.scope}): {stats['hits']} hits, {stats['misses']} misses, "
+                f"{stats['invalidations']} invalidated"
+            )
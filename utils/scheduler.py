@@ -0,0 +1,277 @@
+"""Rate-limit-aware request scheduling underneath APIClient.
+
+Every request passes through the state of its endpoint (``/booking/{id}``
+style template), which is shared by all clients in the process:
+
+* an optional token bucket caps the request rate;
+* an AIMD limiter caps requests in flight, adding roughly one slot per
+  round-trip while responses are healthy and halving on 429/503;
+* ``Retry-After`` (or exponential backoff) pauses the whole endpoint
+  before a throttled request is retried, for clients that opt into
+  retries (none do by default);
+* a deadline budget per endpoint bounds the total time spent, throttling
+  and retries included, instead of one global timeout.
+
+Counters record the time requests spent throttled versus in flight.
+"""
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+import requests
+
+from config import Config
+from utils.request_metrics import endpoint_template
+
+THROTTLE_STATUSES = (429, 503)
+# 503 may mean the request was processed; only retry it when repeating is safe
+IDEMPOTENT_METHODS = frozenset(("GET", "HEAD", "OPTIONS", "PUT", "DELETE"))
+
+
+class DeadlineExceeded(requests.Timeout):
+    """Raised when a request's endpoint deadline runs out while it is throttled"""
+
+
+def retry_after_seconds(response):
+    """Seconds requested by a ``Retry-After`` header (delta or HTTP date), or None"""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket
+
+    Args:
+        rate: Tokens added per second
+        burst: Bucket capacity
+    """
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """Take a token, going into debt if needed; returns the seconds to wait before using it"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def refund(self):
+        with self._lock:
+            self._tokens = min(self.burst, self._tokens + 1)
+
+
+class AIMDLimiter:
+    """
+    Concurrency limit with additive increase / multiplicative decrease
+
+    Args:
+        limit: Starting limit
+        minimum: Lowest limit after decreases
+        maximum: Highest limit after increases
+        decrease: Factor applied on congestion
+    """
+
+    def __init__(self, limit, minimum=1, maximum=None, decrease=0.5):
+        self.maximum = maximum or limit
+        self.minimum = minimum
+        self.decrease = decrease
+        self.limit = float(min(limit, self.maximum))
+        self.in_flight = 0
+        self._last_decrease = 0.0
+        self._condition = threading.Condition()
+
+    def acquire(self, deadline):
+        """Wait for a free slot; returns False if ``deadline`` (monotonic) passes first"""
+        with self._condition:
+            while self.in_flight >= int(self.limit):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+            self.in_flight += 1
+            return True
+
+    def release(self, started, congested):
+        with self._condition:
+            self.in_flight -= 1
+            if congested:
+                # Requests sent before the last decrease saw the old limit; count one cut per round
+                if started >= self._last_decrease:
+                    self.limit = max(self.minimum, self.limit * self.decrease)
+                    self._last_decrease = time.monotonic()
+            else:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self._condition.notify()
+
+
+class EndpointState:
+    """Bucket, limiter, pause and counters for one endpoint template"""
+
+    def __init__(self, rate, burst, max_concurrency):
+        self.bucket = TokenBucket(rate, burst) if rate else None
+        self.limiter = AIMDLimiter(max_concurrency)
+        self.paused_until = 0.0
+        self.requests = 0
+        self.retries = 0
+        self.throttled_responses = 0
+        self.throttled_seconds = 0.0
+        self.in_flight_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def pause(self, seconds):
+        with self._lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    def enter(self, deadline):
+        """Wait out the pause, the bucket and the limiter; returns seconds spent waiting"""
+        start = time.monotonic()
+        wait = self.paused_until - start
+        if self.bucket is not None:
+            wait = max(wait, self.bucket.reserve())
+        if wait > 0:
+            if start + wait >= deadline:
+                if self.bucket is not None:
+                    self.bucket.refund()
+                raise DeadlineExceeded(f"Endpoint deadline would pass while throttled ({wait:.2f}s)")
+            time.sleep(wait)
+        if not self.limiter.acquire(deadline):
+            raise DeadlineExceeded("Endpoint deadline passed waiting for a concurrency slot")
+        return time.monotonic() - start
+
+    def stats(self):
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "retries": self.retries,
+                "throttled_responses": self.throttled_responses,
+                "throttled_seconds": self.throttled_seconds,
+                "in_flight_seconds": self.in_flight_seconds,
+                "concurrency_limit": int(self.limiter.limit),
+            }
+
+
+class RequestScheduler:
+    """
+    Schedules requests per endpoint; use shared() for the process-wide instance
+
+    Args:
+        rate: Requests per second per endpoint, or None for no rate cap
+        burst: Token bucket capacity
+        max_concurrency: AIMD ceiling (and starting point) per endpoint
+        retries: Retries of throttled (429/503) responses
+        backoff: Base delay when a throttled response has no Retry-After
+        deadlines: ``{"/template" or "METHOD /template": seconds}``
+    """
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, rate=None, burst=None, max_concurrency=None, retries=None,
+                 backoff=None, deadlines=None):
+        self.rate = rate
+        self.burst = burst or Config.RATE_BURST
+        self.max_concurrency = max_concurrency or Config.MAX_CONCURRENCY_PER_ENDPOINT
+        self.retries = Config.THROTTLE_RETRIES if retries is None else retries
+        self.backoff = Config.RETRY_BACKOFF if backoff is None else backoff
+        self.deadlines = Config.ENDPOINT_TIMEOUTS if deadlines is None else deadlines
+        self._endpoints = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def shared(cls):
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls(rate=Config.RATE_LIMIT)
+            return cls._shared
+
+    def endpoint(self, template):
+        state = self._endpoints.get(template)
+        if state is None:
+            with self._lock:
+                state = self._endpoints.setdefault(
+                    template, EndpointState(self.rate, self.burst, self.max_concurrency)
+                )
+        return state
+
+    def deadline(self, method, template):
+        """Time budget in seconds for ``method`` on ``template``"""
+        return self.deadlines.get(f"{method} {template}", self.deadlines.get(template, Config.TIMEOUT))
+
+    def send(self, method, endpoint, attempt, timeout=None, retries=None):
+        """
+        Run ``attempt(timeout)`` under the endpoint's limits, retrying throttled responses
+
+        Args:
+            method: HTTP method
+            endpoint: Endpoint path (ids are folded into the template)
+            attempt: Callable sending the request once with the given timeout
+            timeout: Overall budget in seconds; defaults to the endpoint deadline
+            retries: Retries of throttled responses; None uses ``self.retries``
+
+        Returns:
+            The last response
+        """
+        template = endpoint_template(endpoint)
+        state = self.endpoint(template)
+        deadline = time.monotonic() + (timeout if timeout is not None else self.deadline(method, template))
+        max_retries = self.retries if retries is None else retries
+        retries = 0
+        while True:
+            waited = state.enter(deadline)
+            started = time.monotonic()
+            congested = False
+            try:
+                response = attempt(max(deadline - started, 0.001))
+                congested = response.status_code in THROTTLE_STATUSES
+            finally:
+                state.limiter.release(started, congested)
+                with state._lock:
+                    state.requests += 1
+                    state.throttled_seconds += waited
+                    state.in_flight_seconds += time.monotonic() - started
+                    state.throttled_responses += congested
+
+            if not congested or retries >= max_retries:
+                return response
+            if response.status_code == 503 and method not in IDEMPOTENT_METHODS:
+                return response
+            delay = retry_after_seconds(response)
+            if delay is None:
+                delay = self.backoff * 2 ** retries
+            if time.monotonic() + delay >= deadline:
+                return response
+            state.pause(delay)
+            retries += 1
+            with state._lock:
+                state.retries += 1
+
+    def stats(self):
+        """``{endpoint template: counters}`` for every endpoint used so far"""
+        with self._lock:
+            endpoints = dict(self._endpoints)
+        return {template: state.stats() for template, state in sorted(endpoints.items())}
+
+    def totals(self):
+        totals = {"requests": 0, "retries": 0, "throttled_responses": 0,
+                  "throttled_seconds": 0.0, "in_flight_seconds": 0.0}
+        for stats in self.stats().values():
+            for key in totals:
+                totals[key] += stats[key]
+        return totals
@@ -0,0 +1,269 @@
+"""Response schemas compiled once into validator callables.
+
+Schemas use a small JSON-Schema subset: ``type`` (name or list of names),
+``properties``, ``required``, ``additionalProperties: False``, ``items``,
+``enum``, ``pattern``, ``minLength``, ``maxLength``, ``minimum`` and
+``format: "date"``. compile_schema() turns a schema into nested closures
+once, with property paths resolved at compile time, so validating a value
+does no schema interpretation. response_json() parses a response body
+once and caches the result on the response for later checks.
+"""
+import re
+
+_PY_TYPES = {
+    "object": (dict,),
+    "array": (list,),
+    "string": (str,),
+    "integer": (int,),
+    "number": (int, float),
+    "boolean": (bool,),
+    "null": (type(None),),
+}
+_JSON_NAMES = {dict: "object", list: "array", str: "string", int: "integer",
+               float: "number", bool: "boolean", type(None): "null"}
+_FORMATS = {
+    "date": re.compile(r"^\d{4}-\d{2}-\d{2}$"),
+}
+_INDEX = "[*]"
+
+
+def response_json(response):
+    """Parsed JSON body of ``response``, decoded once and cached on the response"""
+    try:
+        return response._parsed_json
+    except AttributeError:
+        value = response._parsed_json = response.json()
+        return value
+
+
+def compile_schema(schema, path="$"):
+    """
+    Compile ``schema`` into ``check(value, errors)``, which appends error strings
+
+    Args:
+        schema: Schema dict
+        path: JSON path of the value, used in error messages
+
+    Returns:
+        callable: ``check(value, errors)``
+    """
+    checks = []
+
+    if "enum" in schema:
+        allowed_values = list(schema["enum"])
+
+        def check_enum(value, errors):
+            if value not in allowed_values:
+                errors.append(f"{path}: {value!r} is not one of {allowed_values!r}")
+        checks.append(check_enum)
+
+    if "pattern" in schema:
+        search = re.compile(schema["pattern"]).search
+        pattern = schema["pattern"]
+
+        def check_pattern(value, errors):
+            if type(value) is str and not search(value):
+                errors.append(f"{path}: {value!r} does not match {pattern!r}")
+        checks.append(check_pattern)
+
+    if "format" in schema:
+        fmt = schema["format"]
+        match = _FORMATS[fmt].match
+
+        def check_format(value, errors):
+            if type(value) is str and not match(value):
+                errors.append(f"{path}: {value!r} is not a valid {fmt}")
+        checks.append(check_format)
+
+    if "minLength" in schema or "maxLength" in schema:
+        min_length = schema.get("minLength", 0)
+        max_length = schema.get("maxLength")
+
+        def check_length(value, errors):
+            if type(value) is str and (
+                len(value) < min_length or (max_length is not None and len(value) > max_length)
+            ):
+                errors.append(f"{path}: length {len(value)} outside [{min_length}, {max_length}]")
+        checks.append(check_length)
+
+    if "minimum" in schema:
+        minimum = schema["minimum"]
+
+        def check_minimum(value, errors):
+            if type(value) in (int, float) and value < minimum:
+                errors.append(f"{path}: {value!r} is less than {minimum!r}")
+        checks.append(check_minimum)
+
+    if "properties" in schema or "required" in schema:
+        properties = tuple(
+            (name, compile_schema(subschema, f"{path}.{name}"))
+            for name, subschema in schema.get("properties", {}).items()
+        )
+        required = tuple(schema.get("required", ()))
+        known = frozenset(schema.get("properties", {}))
+        closed = schema.get("additionalProperties", True) is False
+
+        def check_object(value, errors):
+            if type(value) is not dict:
+                return
+            for name in required:
+                if name not in value:
+                    errors.append(f"{path}: missing required field '{name}'")
+            for name, check in properties:
+                if name in value:
+                    check(value[name], errors)
+            if closed and not known.issuperset(value):
+                errors.append(f"{path}: unexpected fields {sorted(set(value) - known)!r}")
+        checks.append(check_object)
+
+    if "items" in schema:
+        check_item = compile_schema(schema["items"], path + _INDEX)
+        item_path = path + _INDEX
+
+        def check_items(value, errors):
+            if type(value) is not list:
+                return
+            for index, item in enumerate(value):
+                item_errors = []
+                check_item(item, item_errors)
+                if item_errors:
+                    # Item paths are compiled as "[*]"; fill in the index only on failure
+                    errors.extend(
+                        error.replace(item_path, f"{path}[{index}]", 1) for error in item_errors
+                    )
+        checks.append(check_items)
+
+    types = schema.get("type")
+    if types is None:
+        allowed = None
+    else:
+        names = [types] if isinstance(types, str) else list(types)
+        allowed = frozenset(py_type for name in names for py_type in _PY_TYPES[name])
+        expected = " or ".join(names)
+    checks = tuple(checks)
+
+    def check(value, errors):
+        if allowed is not None and type(value) not in allowed:
+            errors.append(f"{path}: expected {expected}, got {_JSON_NAMES.get(type(value), type(value).__name__)}")
+            return
+        for sub_check in checks:
+            sub_check(value, errors)
+
+    return check
+
+
+class Validator:
+    """
+    A named schema compiled into a validator
+
+    Calling the validator returns True/False; errors() lists what failed.
+    """
+
+    def __init__(self, name, schema):
+        self.name = name
+        self.schema = schema
+        self._check = compile_schema(schema)
+
+    def __call__(self, value):
+        errors = []
+        self._check(value, errors)
+        return not errors
+
+    def errors(self, value):
+        errors = []
+        self._check(value, errors)
+        return errors
+
+    def assert_valid(self, value, message=""):
+        errors = self.errors(value)
+        assert not errors, f"{message}Response does not match {self.name} schema: " + "; ".join(errors)
+        return value
+
+    def assert_response(self, response, message=""):
+        """Validate a response's (cached) JSON body; returns the parsed body"""
+        try:
+            value = response_json(response)
+        except ValueError:
+            raise AssertionError(f"{message}Response is not valid JSON")
+        return self.assert_valid(value, message)
+
+    def validate_responses(self, responses):
+        """
+        Validate many responses, e.g. every detail fetched during a load run
+
+        Returns:
+            dict: ``{index: errors}`` for the responses that failed
+        """
+        failures = {}
+        check = self._check
+        for index, response in enumerate(responses):
+            errors = []
+            try:
+                check(response_json(response), errors)
+            except ValueError:
+                errors.append("response is not valid JSON")
+            if errors:
+                failures[index] = errors
+        return failures
+
+
+"""SCHEMAS"""
+
+AUTH_TOKEN = Validator("auth token", {
+    "type": "object",
+    "required": ["token"],
+    "properties": {
+        "token": {"type": "string", "minLength": 1},
+    },
+})
+
+BAD_CREDENTIALS = Validator("bad credentials", {
+    "type": "object",
+    "required": ["reason"],
+    "properties": {
+        "reason": {"enum": ["Bad credentials"]},
+        "token": {"type": "null"},
+    },
+})
+
+_BOOKING_SCHEMA = {
+    "type": "object",
+    "required": ["firstname", "lastname", "totalprice", "depositpaid", "bookingdates"],
+    "properties": {
+        "firstname": {"type": "string"},
+        "lastname": {"type": "string"},
+        "totalprice": {"type": "integer"},
+        "depositpaid": {"type": "boolean"},
+        "bookingdates": {
+            "type": "object",
+            "required": ["checkin", "checkout"],
+            "properties": {
+                "checkin": {"type": "string", "format": "date"},
+                "checkout": {"type": "string", "format": "date"},
+            },
+        },
+        "additionalneeds": {"type": "string"},
+    },
+}
+
+BOOKING = Validator("booking", _BOOKING_SCHEMA)
+
+BOOKING_CREATED = Validator("created booking", {
+    "type": "object",
+    "required": ["bookingid", "booking"],
+    "properties": {
+        "bookingid": {"type": "integer", "minimum": 1},
+        "booking": _BOOKING_SCHEMA,
+    },
+})
+
+BOOKING_ID_LIST = Validator("booking id list", {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "required": ["bookingid"],
+        "properties": {
+            "bookingid": {"type": "integer", "minimum": 1},
+        },
+    },
+})
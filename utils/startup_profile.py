@@ -0,0 +1,153 @@
+"""Import and collection timing for ``pytest --startup-profile``.
+
+conftest installs the import profiler before its own imports, so every module
+first loaded by the harness is timed. Without ``--startup-profile`` the hook
+is removed again in pytest_configure; with it, it stays until collection
+finishes and a breakdown of the slowest imports and test modules is printed.
+"""
+import builtins
+import importlib.util
+import sys
+import threading
+import time
+
+import pytest
+
+
+class ImportProfiler:
+    """Times first-time imports through ``builtins.__import__``"""
+
+    def __init__(self):
+        self.timings = []   # (module, self seconds, cumulative seconds)
+        self.started = None
+        self.cpu_before = None
+        self._original = None
+        self._stack = []
+        self._thread = None
+
+    @property
+    def installed(self):
+        return self._original is not None
+
+    def install(self):
+        if self.installed:
+            return self
+        self.started = time.perf_counter()
+        self.cpu_before = time.process_time()
+        self._thread = threading.get_ident()
+        self._original = builtins.__import__
+        builtins.__import__ = self._import
+        return self
+
+    def uninstall(self):
+        if self.installed:
+            builtins.__import__ = self._original
+            self._original = None
+
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        original = self._original
+        if original is None or threading.get_ident() != self._thread:
+            return (original or builtins.__import__)(name, globals, locals, fromlist, level)
+
+        absolute = name
+        if level:
+            try:
+                absolute = importlib.util.resolve_name("." * level + name, (globals or {}).get("__package__"))
+            except (ImportError, ValueError):
+                return original(name, globals, locals, fromlist, level)
+        # "from pkg import sub" loads pkg.sub even when pkg is already imported
+        candidates = [absolute] + [f"{absolute}.{item}" for item in fromlist or () if item != "*"]
+        new = [candidate for candidate in candidates if candidate not in sys.modules]
+        if not new:
+            return original(name, globals, locals, fromlist, level)
+
+        self._stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            return original(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.perf_counter() - start
+            children = self._stack.pop()
+            if self._stack:
+                self._stack[-1] += elapsed
+            loaded = [candidate for candidate in new if candidate in sys.modules]
+            if loaded:
+                self.timings.append((", ".join(loaded), elapsed - children, elapsed))
+
+    def slowest(self, limit=20):
+        return sorted(self.timings, key=lambda timing: timing[1], reverse=True)[:limit]
+
+
+profiler = ImportProfiler()
+
+
+def install():
+    """Start timing imports; called at the top of conftest"""
+    return profiler.install()
+
+
+class StartupProfilePlugin:
+    """
+    Reports import and collection time by module
+
+    Args:
+        profiler: ImportProfiler installed before the harness imports
+        budget_ms: Fail the run when conftest imports plus collection take
+            longer than this; 0 only reports
+        limit: Number of imports and test modules listed
+    """
+
+    def __init__(self, profiler, budget_ms=0, limit=20):
+        self.profiler = profiler
+        self.budget_ms = budget_ms
+        self.limit = limit
+        self.conftest_ms = None
+        self.collect_ms = {}
+        self.total_ms = None
+
+    def pytest_sessionstart(self):
+        self.conftest_ms = sum(timing[1] for timing in self.profiler.timings) * 1000
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_make_collect_report(self, collector):
+        start = time.perf_counter()
+        yield
+        if isinstance(collector, pytest.Module):
+            self.collect_ms[collector.nodeid] = (time.perf_counter() - start) * 1000
+
+    def pytest_collection_finish(self):
+        self.profiler.uninstall()
+        self.total_ms = (time.perf_counter() - self.profiler.started) * 1000
+
+    @property
+    def over_budget(self):
+        return bool(self.budget_ms) and self.total_ms is not None and self.total_ms > self.budget_ms
+
+    def pytest_sessionfinish(self, session):
+        # The xdist controller never collects; stop timing there too
+        self.profiler.uninstall()
+        if self.over_budget and session.exitstatus == pytest.ExitCode.OK:
+            session.exitstatus = pytest.ExitCode.TESTS_FAILED
+
+    def pytest_terminal_summary(self, terminalreporter):
+        if self.total_ms is None:
+            return
+        write = terminalreporter.line
+        terminalreporter.section("startup profile")
+        write(f"before conftest: {self.profiler.cpu_before * 1000:.0f} ms CPU (interpreter and pytest)")
+        write(f"conftest imports: {self.conftest_ms:.0f} ms")
+        write(f"collection: {sum(self.collect_ms.values()):.0f} ms in {len(self.collect_ms)} modules")
+        budget = f" (budget {self.budget_ms:.0f} ms)" if self.budget_ms else ""
+        write(f"startup total: {self.total_ms:.0f} ms{budget}")
+        if self.over_budget:
+            write("startup budget exceeded", red=True)
+
+        write("")
+        write(f"{'self ms':>9} {'cum ms':>9}  slowest imports")
+        for module, self_time, cumulative in self.profiler.slowest(self.limit):
+            write(f"{self_time * 1000:9.1f} {cumulative * 1000:9.1f}  {module}")
+
+        write("")
+        write(f"{'ms':>9}  slowest test modules (import + collection)")
+        for nodeid, elapsed in sorted(self.collect_ms.items(), key=lambda item: item[1], reverse=True)[:self.limit]:
+            write(f"{elapsed:9.1f}  {nodeid}")
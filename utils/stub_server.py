@@ -0,0 +1,490 @@
+"""In-process stand-in for the Restful-Booker API.
+
+Implements /ping, /auth and /booking (CRUD, filters, cookie/basic auth) on an
+asyncio server backed by an in-memory indexed booking store, so the suite can
+run offline and perf checks have a known-fast baseline.
+
+Run standalone with: python -m utils.stub_server --port 3001
+"""
+import argparse
+import asyncio
+import base64
+import bisect
+import itertools
+import json
+import secrets
+import threading
+from datetime import datetime
+from email.utils import formatdate
+from http import HTTPStatus
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+from config import Config
+
+REQUIRED_FIELDS = ("firstname", "lastname", "totalprice", "depositpaid", "bookingdates")
+REQUIRED_DATES = ("checkin", "checkout")
+
+SEED_BOOKINGS = [
+    ("Jim", "Brown", 111, True, "2018-01-01", "2019-01-01", "Breakfast"),
+    ("Mary", "Smith", 647, False, "2017-03-14", "2017-03-21", "Lunch"),
+    ("Sally", "Jones", 345, True, "2019-05-01", "2019-05-09", None),
+    ("Eric", "Wilson", 912, True, "2020-08-12", "2020-08-15", "Dinner"),
+    ("Susan", "Ericsson", 203, False, "2021-11-02", "2021-11-04", "Parking"),
+    ("Mark", "Jackson", 578, True, "2022-02-20", "2022-02-27", "Breakfast"),
+    ("Jim", "Smith", 150, False, "2023-06-30", "2023-07-07", None),
+    ("Sally", "Brown", 799, True, "2024-01-15", "2024-01-19", "Lunch"),
+    ("Mary", "Jones", 432, False, "2024-09-09", "2024-09-16", "Dinner"),
+    ("Eric", "Jackson", 265, True, "2025-04-04", "2025-04-11", "Breakfast"),
+]
+
+
+class BadRequest(Exception):
+    """Raised when a booking payload fails validation"""
+
+
+class BookingStore:
+    """In-memory booking store with name and date indexes for filtered lookups"""
+
+    def __init__(self):
+        self._bookings = {}
+        self._ids = itertools.count(1)
+        self._by_firstname = {}
+        self._by_lastname = {}
+        self._by_checkin = []
+        self._by_checkout = []
+
+    def __len__(self):
+        return len(self._bookings)
+
+    def get(self, booking_id):
+        return self._bookings.get(booking_id)
+
+    def ids(self):
+        return list(self._bookings)
+
+    def create(self, data):
+        booking = normalize_booking(data)
+        booking_id = next(self._ids)
+        self._bookings[booking_id] = booking
+        self._index(booking_id, booking)
+        return booking_id, booking
+
+    def replace(self, booking_id, data):
+        booking = normalize_booking(data)
+        self._unindex(booking_id, self._bookings[booking_id])
+        self._bookings[booking_id] = booking
+        self._index(booking_id, booking)
+        return booking
+
+    def update(self, booking_id, data):
+        merged = dict(self._bookings[booking_id])
+        for key, value in data.items():
+            if key == "bookingdates" and isinstance(value, dict):
+                merged["bookingdates"] = {**merged["bookingdates"], **value}
+            elif key in merged or key == "additionalneeds":
+                merged[key] = value
+        return self.replace(booking_id, merged)
+
+    def delete(self, booking_id):
+        booking = self._bookings.pop(booking_id, None)
+        if booking is None:
+            return False
+        self._unindex(booking_id, booking)
+        return True
+
+    def search(self, firstname=None, lastname=None, checkin=None, checkout=None):
+        """Return booking ids matching every given filter"""
+        candidates = []
+        if firstname is not None:
+            candidates.append(self._by_firstname.get(firstname, set()))
+        if lastname is not None:
+            candidates.append(self._by_lastname.get(lastname, set()))
+        if checkin is not None:
+            candidates.append(_since(self._by_checkin, checkin))
+        if checkout is not None:
+            candidates.append(_since(self._by_checkout, checkout))
+        if not candidates:
+            return self.ids()
+
+        candidates.sort(key=len)
+        matches = set(candidates[0]).intersection(*candidates[1:])
+        return sorted(matches)
+
+    def _index(self, booking_id, booking):
+        self._by_firstname.setdefault(booking["firstname"], set()).add(booking_id)
+        self._by_lastname.setdefault(booking["lastname"], set()).add(booking_id)
+        dates = booking["bookingdates"]
+        bisect.insort(self._by_checkin, (dates["checkin"], booking_id))
+        bisect.insort(self._by_checkout, (dates["checkout"], booking_id))
+
+    def _unindex(self, booking_id, booking):
+        self._by_firstname[booking["firstname"]].discard(booking_id)
+        self._by_lastname[booking["lastname"]].discard(booking_id)
+        dates = booking["bookingdates"]
+        _remove_sorted(self._by_checkin, (dates["checkin"], booking_id))
+        _remove_sorted(self._by_checkout, (dates["checkout"], booking_id))
+
+
+def _since(index, date):
+    """Ids whose indexed date is on or after ``date``"""
+    start = bisect.bisect_left(index, (date,))
+    return {booking_id for _, booking_id in index[start:]}
+
+
+def _remove_sorted(index, entry):
+    position = bisect.bisect_left(index, entry)
+    if position < len(index) and index[position] == entry:
+        del index[position]
+
+
+def _parse_date(value):
+    if not isinstance(value, str):
+        raise BadRequest(f"Invalid date: {value!r}")
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").strftime("%Y-%m-%d")
+    except ValueError:
+        raise BadRequest(f"Invalid date: {value!r}")
+
+
+def normalize_booking(data):
+    """
+    Validate a booking payload and return it in the API's canonical shape
+
+    Raises:
+        BadRequest: If a required field is missing or has the wrong type
+    """
+    if not isinstance(data, dict):
+        raise BadRequest("Booking payload must be an object")
+    for field in REQUIRED_FIELDS:
+        if data.get(field) is None:
+            raise BadRequest(f"Missing field: {field}")
+    dates = data["bookingdates"]
+    if not isinstance(dates, dict) or any(dates.get(key) is None for key in REQUIRED_DATES):
+        raise BadRequest("Missing booking dates")
+    if not isinstance(data["firstname"], str) or not isinstance(data["lastname"], str):
+        raise BadRequest("Names must be strings")
+    if isinstance(data["totalprice"], bool) or not isinstance(data["totalprice"], (int, float)):
+        raise BadRequest("totalprice must be a number")
+    if not isinstance(data["depositpaid"], bool):
+        raise BadRequest("depositpaid must be a boolean")
+
+    booking = {
+        "firstname": data["firstname"],
+        "lastname": data["lastname"],
+        "totalprice": int(data["totalprice"]),
+        "depositpaid": data["depositpaid"],
+        "bookingdates": {
+            "checkin": _parse_date(dates["checkin"]),
+            "checkout": _parse_date(dates["checkout"]),
+        },
+    }
+    if data.get("additionalneeds") is not None:
+        booking["additionalneeds"] = data["additionalneeds"]
+    return booking
+
+
+class Request:
+    """Parsed HTTP request"""
+
+    __slots__ = ("method", "path", "query", "headers", "body")
+
+    def __init__(self, method, path, query, headers, body):
+        self.method = method
+        self.path = path
+        self.query = query
+        self.headers = headers
+        self.body = body
+
+    @property
+    def content_type(self):
+        return self.headers.get("content-type", "").split(";")[0].strip().lower()
+
+    def form(self):
+        """Decode a JSON or urlencoded body; anything else is treated as empty"""
+        if not self.body:
+            return {}
+        if self.content_type == "application/json":
+            try:
+                return json.loads(self.body)
+            except ValueError:
+                raise BadRequest("Malformed JSON body")
+        if self.content_type == "application/x-www-form-urlencoded":
+            return dict(parse_qsl(self.body.decode("utf-8", "replace"), keep_blank_values=True))
+        return {}
+
+    def cookie(self, name):
+        for part in self.headers.get("cookie", "").split(";"):
+            key, _, value = part.strip().partition("=")
+            if key == name:
+                return value
+        return None
+
+
+class RestfulBookerApp:
+    """Request router implementing the Restful-Booker endpoints"""
+
+    def __init__(self, seed=True):
+        self.store = BookingStore()
+        self.tokens = set()
+        credentials = f"{Config.USERNAME}:{Config.PASSWORD}".encode()
+        self._basic_auth = "Basic " + base64.b64encode(credentials).decode()
+        if seed:
+            for first, last, price, paid, checkin, checkout, needs in SEED_BOOKINGS:
+                self.store.create({
+                    "firstname": first,
+                    "lastname": last,
+                    "totalprice": price,
+                    "depositpaid": paid,
+                    "bookingdates": {"checkin": checkin, "checkout": checkout},
+                    "additionalneeds": needs,
+                })
+
+    def handle(self, request):
+        """Dispatch a request and return ``(status, content_type, body)``"""
+        try:
+            return self.route(request)
+        except Exception:
+            # Restful-Booker answers any unhandled error with a 500, never a dropped connection
+            return _text(HTTPStatus.INTERNAL_SERVER_ERROR)
+
+    def route(self, request):
+        path = request.path.rstrip("/") or "/"
+        if path == Config.PING_ENDPOINT:
+            if request.method == "GET":
+                return _text(HTTPStatus.CREATED)
+        elif path == Config.AUTH_ENDPOINT:
+            if request.method == "POST":
+                return self.auth(request)
+        elif path == Config.BOOKING_ENDPOINT:
+            if request.method == "GET":
+                return self.list_bookings(request)
+            if request.method == "POST":
+                return self.create_booking(request)
+        elif path.startswith(Config.BOOKING_ENDPOINT + "/"):
+            booking_id = _booking_id(path[len(Config.BOOKING_ENDPOINT) + 1:])
+            if request.method == "GET":
+                return self.get_booking(booking_id)
+            if request.method in ("PUT", "PATCH", "DELETE"):
+                if not self.authorized(request):
+                    return _text(HTTPStatus.FORBIDDEN)
+                if booking_id is None or self.store.get(booking_id) is None:
+                    return _text(HTTPStatus.METHOD_NOT_ALLOWED)
+                if request.method == "DELETE":
+                    self.store.delete(booking_id)
+                    return _text(HTTPStatus.CREATED)
+                return self.update_booking(request, booking_id)
+        return _text(HTTPStatus.NOT_FOUND)
+
+    def authorized(self, request):
+        if request.headers.get("authorization") == self._basic_auth:
+            return True
+        return request.cookie("token") in self.tokens
+
+    def auth(self, request):
+        try:
+            form = request.form()
+        except BadRequest:
+            form = {}
+        if (isinstance(form, dict)
+                and form.get("username") == Config.USERNAME
+                and form.get("password") == Config.PASSWORD):
+            token = secrets.token_hex(8)[:15]
+            self.tokens.add(token)
+            return _json({"token": token})
+        return _json({"reason": "Bad credentials"})
+
+    def list_bookings(self, request):
+        filters = {key: request.query[key] for key in ("firstname", "lastname", "checkin", "checkout")
+                   if key in request.query}
+        ids = self.store.search(**filters)
+        return _json([{"bookingid": booking_id} for booking_id in ids])
+
+    def get_booking(self, booking_id):
+        booking = self.store.get(booking_id) if booking_id is not None else None
+        if booking is None:
+            return _text(HTTPStatus.NOT_FOUND)
+        return _json(booking)
+
+    def create_booking(self, request):
+        try:
+            booking_id, booking = self.store.create(request.form())
+        except BadRequest:
+            return _text(HTTPStatus.INTERNAL_SERVER_ERROR)
+        return _json({"bookingid": booking_id, "booking": booking})
+
+    def update_booking(self, request, booking_id):
+        try:
+            data = request.form()
+            if request.method == "PUT":
+                booking = self.store.replace(booking_id, data)
+            else:
+                if not isinstance(data, dict):
+                    raise BadRequest("Booking payload must be an object")
+                booking = self.store.update(booking_id, data)
+        except BadRequest:
+            return _text(HTTPStatus.BAD_REQUEST)
+        return _json(booking)
+
+
+def _booking_id(raw):
+    return int(raw) if raw.isdigit() else None
+
+
+def _text(status):
+    return status, "text/plain; charset=utf-8", status.phrase.encode()
+
+
+def _json(payload):
+    body = json.dumps(payload, separators=(",", ":")).encode()
+    return HTTPStatus.OK, "application/json; charset=utf-8", body
+
+
+class StubServer:
+    """
+    Runs :class:`RestfulBookerApp` on a background asyncio event loop
+
+    Usage:
+        with StubServer() as server:
+            Config.BASE_URL = server.url
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, seed=True):
+        self.host = host
+        self.port = port
+        self.app = RestfulBookerApp(seed=seed)
+        self.requests_served = 0
+        self._loop = None
+        self._server = None
+        self._thread = None
+        self._ready = threading.Event()
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}"
+
+    def start(self):
+        """Start serving in a daemon thread and block until the socket is bound"""
+        self._thread = threading.Thread(target=self._run, name="stub-server", daemon=True)
+        self._thread.start()
+        self._ready.wait(Config.TIMEOUT)
+        if self._server is None:
+            raise RuntimeError("Stub server failed to start")
+        return self
+
+    def stop(self):
+        if self._loop is None:
+            return
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(Config.TIMEOUT)
+        self._loop = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._server = self._loop.run_until_complete(
+                asyncio.start_server(self._serve_connection, self.host, self.port, backlog=1024)
+            )
+            self.port = self._server.sockets[0].getsockname()[1]
+        finally:
+            self._ready.set()
+        try:
+            self._loop.run_forever()
+        finally:
+            self._server.close()
+            connections = asyncio.all_tasks(self._loop)
+            for task in connections:
+                task.cancel()
+            self._loop.run_until_complete(asyncio.gather(*connections, return_exceptions=True))
+            self._loop.run_until_complete(self._server.wait_closed())
+            self._loop.close()
+
+    async def _serve_connection(self, reader, writer):
+        try:
+            while True:
+                request = await _read_request(reader)
+                if request is None:
+                    break
+                status, content_type, body = self.app.handle(request)
+                self.requests_served += 1
+                keep_alive = request.headers.get("connection", "").lower() != "close"
+                writer.write(_encode_response(status, content_type, body, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError):
+            pass
+        except asyncio.CancelledError:
+            # Server shutdown; end the connection quietly
+            pass
+        finally:
+            writer.close()
+
+
+async def _read_request(reader):
+    """Read one HTTP/1.1 request; returns None when the client closed the connection"""
+    try:
+        head = await reader.readuntil(b"\r\n\r\n")
+    except asyncio.IncompleteReadError:
+        return None
+    lines = head.decode("latin-1").split("\r\n")
+    method, target, _ = lines[0].split(" ", 2)
+    headers = {}
+    for line in lines[1:]:
+        if line:
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+    if headers.get("transfer-encoding", "").lower() == "chunked":
+        body = bytearray()
+        while True:
+            size = int((await reader.readline()).split(b";")[0], 16)
+            if size == 0:
+                await reader.readline()
+                break
+            body += await reader.readexactly(size)
+            await reader.readexactly(2)
+        body = bytes(body)
+    else:
+        body = await reader.readexactly(int(headers.get("content-length", 0)))
+
+    url = urlsplit(target)
+    query = dict(parse_qsl(url.query, keep_blank_values=True))
+    return Request(method.upper(), unquote(url.path), query, headers, body)
+
+
+def _encode_response(status, content_type, body, keep_alive):
+    head = (
+        f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+        f"Content-Type: {content_type}\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Date: {formatdate(usegmt=True)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+        "\r\n"
+    )
+    return head.encode("latin-1") + body
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the Restful-Booker stand-in server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=3001)
+    parser.add_argument("--no-seed", action="store_true", help="Start with an empty booking store")
+    args = parser.parse_args()
+
+    server = StubServer(args.host, args.port, seed=not args.no_seed).start()
+    print(f"Restful-Booker stub listening on {server.url}")
+    try:
+        server._thread.join()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
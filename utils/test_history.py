@@ -0,0 +1,147 @@
+"""Run-over-run test durations and failure rates, and the test order built from them.
+
+CaseHistory keeps an exponentially weighted duration and failure rate for
+each case_id (nodeid for tests without one) in the pytest cache.
+HistoryOrderPlugin sorts collected tests by expected duration divided by
+failure probability. That is Smith's rule, the order with the shortest
+expected time to the first failure: fast tests and tests that failed
+recently run first, and slow, stable tests such as AUTH-012/018/023 run
+last. Under xdist, utils/duration_scheduling.py uses the same predictions
+to balance workers by duration.
+"""
+import statistics
+
+import pytest
+
+CACHE_KEY = "restful-booker/test-history"
+DECAY = 0.8              # weight kept by older runs at each update
+PRIOR_RUNS = 4.0         # pseudo-runs blended into every failure rate...
+PRIOR_FAILURES = 0.4     # ...so tests without history count as 10% likely to fail
+DEFAULT_DURATION = 1.0   # seconds, until any test has history
+
+
+def plain_nodeid(nodeid):
+    """Nodeid without the ``@group`` suffix xdist adds under ``--dist loadgroup``"""
+    at = nodeid.rfind("@")
+    return nodeid[:at] if at > nodeid.rfind("]") else nodeid
+
+
+def case_key(case_id, nodeid):
+    """History key: the case_id (plus parameter id for parametrized cases), else the nodeid"""
+    nodeid = plain_nodeid(nodeid)
+    if not case_id:
+        return nodeid
+    name = nodeid.rsplit("::", 1)[-1]
+    bracket = name.find("[")
+    return case_id + name[bracket:] if bracket != -1 else case_id
+
+
+def item_case_key(item):
+    marker = item.get_closest_marker("case_id")
+    return case_key(marker.args[0] if marker and marker.args else None, item.nodeid)
+
+
+class CaseHistory:
+    """
+    Durations and failure rates by case key
+
+    Args:
+        cases: ``{key: {"nodeid", "duration", "runs", "failures"}}`` as stored in the cache
+    """
+
+    def __init__(self, cases=None):
+        self.cases = dict(cases or {})
+        self._by_nodeid = {case["nodeid"]: case for case in self.cases.values()}
+        durations = [case["duration"] for case in self.cases.values()]
+        self.default_duration = statistics.median(durations) if durations else DEFAULT_DURATION
+
+    @classmethod
+    def load(cls, cache):
+        return cls(cache.get(CACHE_KEY, {}))
+
+    def save(self, cache):
+        cache.set(CACHE_KEY, self.cases)
+
+    def known(self, key):
+        return key in self.cases
+
+    def duration(self, key=None, nodeid=None):
+        """Predicted call duration in seconds by key or, failing that, by nodeid"""
+        case = self.cases.get(key) or self._by_nodeid.get(plain_nodeid(nodeid or ""))
+        return case["duration"] if case else self.default_duration
+
+    def failure_probability(self, key):
+        case = self.cases.get(key, {"runs": 0.0, "failures": 0.0})
+        return (case["failures"] + PRIOR_FAILURES) / (case["runs"] + PRIOR_RUNS)
+
+    def rank(self, key, nodeid):
+        """Sort key: expected seconds spent per expected failure"""
+        return self.duration(key, nodeid) / self.failure_probability(key)
+
+    def record(self, key, nodeid, duration, failed):
+        case = self.cases.get(key)
+        if case is None:
+            case = self.cases[key] = {"nodeid": nodeid, "duration": duration, "runs": 0.0, "failures": 0.0}
+        else:
+            case["duration"] = DECAY * case["duration"] + (1 - DECAY) * duration
+        case["nodeid"] = nodeid
+        case["runs"] = DECAY * case["runs"] + 1
+        case["failures"] = DECAY * case["failures"] + (1 if failed else 0)
+        self._by_nodeid[nodeid] = case
+
+
+class HistoryOrderPlugin:
+    """
+    Reorders collected tests from their history and records this run's results
+
+    Args:
+        cache: ``config.cache``
+        reorder: Sort collected tests (False keeps file order, history is still kept)
+        record: Record results; only the process receiving every report should
+    """
+
+    def __init__(self, cache, reorder=True, record=True):
+        self.cache = cache
+        self.history = CaseHistory.load(cache)
+        self.reorder = reorder
+        self.record = record
+        self.ordered = None   # (tests with history, tests collected) once reordered
+        self._runs = {}       # nodeid -> [call duration, failed, skipped, case_id]
+
+    @pytest.hookimpl(trylast=True)
+    def pytest_collection_modifyitems(self, items):
+        if not self.reorder:
+            return
+        keys = [item_case_key(item) for item in items]
+        order = sorted(range(len(items)), key=lambda index: (self.history.rank(keys[index], items[index].nodeid), index))
+        items[:] = [items[index] for index in order]
+        self.ordered = (sum(1 for key in keys if self.history.known(key)), len(items))
+
+    def pytest_runtest_logreport(self, report):
+        if not self.record:
+            return
+        run = self._runs.setdefault(report.nodeid, [0.0, False, False, None])
+        run[1] = run[1] or report.failed
+        run[2] = run[2] or (report.skipped and report.when == "setup")
+        if report.when == "call":
+            # Setup time is left out: the first test to request a session fixture pays for it
+            run[0] = report.duration
+            run[3] = getattr(report, "case_id", None)
+        if report.when == "teardown":
+            duration, failed, skipped, case_id = self._runs.pop(report.nodeid)
+            # A skipped test's duration says nothing about the next run
+            if not skipped:
+                self.history.record(
+                    case_key(case_id, report.nodeid), plain_nodeid(report.nodeid), duration, failed
+                )
+
+    def pytest_sessionfinish(self):
+        if self.record:
+            self.history.save(self.cache)
+
+    def pytest_terminal_summary(self, terminalreporter):
+        if self.ordered:
+            known, total = self.ordered
+            terminalreporter.line(
+                f"test order: shortest expected time to first failure ({known} of {total} tests with history)"
+            )
@@ -0,0 +1,120 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+from config import Config
+from utils.file_lock import FileLock
+
+
+class TokenManager:
+    """
+    Caches the auth token with a TTL and refreshes it at most once at a time
+
+    Concurrent callers that find the token missing or expired wait on a single
+    refresh instead of each POSTing /auth. shared() keeps one manager per base
+    URL and credentials, so every client in the process reuses one token. When
+    ``cache_file`` is set the token is also shared with other processes (e.g.
+    pytest-xdist workers) through a lock-protected JSON file.
+
+    Args:
+        fetch: Zero-argument callable that POSTs /auth and returns a token or None;
+            optional when every get() passes its own
+        ttl: Seconds a token is reused before refreshing
+        cache_file: Optional path of the cross-process token cache
+        key: What the token is valid for (base URL, credentials, ...); each key
+            has its own entry in the shared cache file
+    """
+
+    _shared = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, fetch=None, ttl=None, cache_file=None, key=None):
+        self._fetch = fetch
+        key = (Config.BASE_URL,) if key is None else key
+        # Credentials are part of the key; the shared file only holds a digest
+        self._entry_key = hashlib.sha256(json.dumps(key).encode()).hexdigest()[:16]
+        self.ttl = Config.TOKEN_TTL if ttl is None else ttl
+        self.cache_file = cache_file or Config.TOKEN_CACHE_FILE
+        self.refreshes = 0
+        self._lock = threading.Lock()
+        self._token = None
+        self._expires_at = 0.0
+
+    @classmethod
+    def shared(cls, *key):
+        """The process-wide manager for ``key``"""
+        with cls._shared_lock:
+            manager = cls._shared.get(key)
+            if manager is None:
+                manager = cls._shared[key] = cls(key=key)
+            return manager
+
+    def get(self, fetch=None):
+        """
+        Return a valid token, refreshing it if it is missing or expired
+
+        Args:
+            fetch: Callable used if a refresh is needed (default: the manager's own)
+        """
+        token = self._cached()
+        if token:
+            return token
+        with self._lock:
+            token = self._cached()
+            if token:
+                return token
+            if self.cache_file:
+                with FileLock(f"{self.cache_file}.lock"):
+                    token, expires_at = self._read_shared()
+                    if not token:
+                        token, expires_at = self._refresh(fetch or self._fetch)
+                        self._write_shared(token, expires_at)
+            else:
+                token, expires_at = self._refresh(fetch or self._fetch)
+            if token:
+                self._token, self._expires_at = token, expires_at
+            return token
+
+    def invalidate(self, token=None):
+        """Drop ``token`` (or whatever is cached) so the next get() refreshes"""
+        with self._lock:
+            if token is None or token == self._token:
+                self._token, self._expires_at = None, 0.0
+            if self.cache_file:
+                with FileLock(f"{self.cache_file}.lock"):
+                    shared, _ = self._read_shared()
+                    if shared and (token is None or shared == token):
+                        self._write_shared(None, 0.0)
+
+    def _cached(self):
+        if self._token and time.time() < self._expires_at:
+            return self._token
+        return None
+
+    def _refresh(self, fetch):
+        self.refreshes += 1
+        return fetch(), time.time() + self.ttl
+
+    def _read_entries(self):
+        try:
+            with open(self.cache_file) as cache:
+                return json.load(cache)
+        except (OSError, ValueError):
+            return {}
+
+    def _read_shared(self):
+        entry = self._read_entries().get(self._entry_key) or {}
+        if time.time() >= entry.get("expires_at", 0):
+            return None, 0.0
+        return entry.get("token"), entry["expires_at"]
+
+    def _write_shared(self, token, expires_at):
+        # One entry per key: cassette and live managers in other processes share the file
+        entries = self._read_entries()
+        entries[self._entry_key] = {"token": token, "expires_at": expires_at}
+        tmp_path = f"{self.cache_file}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as cache:
+            json.dump(entries, cache)
+        os.replace(tmp_path, self.cache_file)
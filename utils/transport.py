@@ -0,0 +1,633 @@
+"""HTTP transports underneath APIClient.
+
+APIClient hands every request (method, URL and requests-style ``params``,
+``data``, ``json``, ``headers``, ``timeout``, ``stream`` arguments) to the
+transport named by Config.TRANSPORT:
+
+* ``requests``: a requests.Session per client, or per thread (default);
+* ``urllib3``: one shared PoolManager. It skips requests' per-request
+  session merging, hooks and PreparedRequest building;
+* ``asyncio``: HTTP/1.1 over asyncio streams (h11 for the protocol) on a
+  private event-loop thread. Calling threads wait on futures, so any number
+  of threads share one loop and one keep-alive pool.
+
+All three use the same pool sizing, retries (502/504) and keep-alive
+settings. The urllib3 and asyncio backends return TransportResponse, which
+has the parts of the requests.Response API the suite uses. They raise
+requests' exception types, so callers work the same on every backend.
+"""
+import asyncio
+import json as complexjson
+import socket
+import ssl
+import threading
+import time
+import weakref
+from datetime import timedelta
+from http import HTTPStatus
+from urllib.parse import urlencode, urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import default_headers, get_encoding_from_headers
+from urllib3 import PoolManager, exceptions as urllib3_exceptions
+from urllib3.connection import HTTPConnection
+from urllib3.util.retry import Retry
+
+from config import Config
+from utils.request_profiler import POOL_CLASSES
+
+RETRY_STATUSES = (502, 504)   # 429/503 are left to the RequestScheduler
+READ_SIZE = 64 * 1024
+
+
+def _retries():
+    return Retry(
+        total=Config.MAX_RETRIES,
+        backoff_factor=Config.RETRY_BACKOFF,
+        status_forcelist=RETRY_STATUSES,
+        raise_on_status=False,
+    )
+
+
+def _socket_options():
+    if not Config.TCP_KEEPALIVE:
+        return None
+    return HTTPConnection.default_socket_options + [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+
+
+def _pool_connections(manager):
+    """Connections open in a PoolManager's pools, idle or in use"""
+    count = 0
+    for key in manager.pools.keys():
+        pool = manager.pools.get(key)
+        queue = pool and pool.pool
+        if queue is None:
+            continue
+        with queue.mutex:
+            idle = list(queue.queue)
+        # The queue starts full of None placeholders; missing entries are checked out
+        count += queue.maxsize - len(idle)
+        count += sum(1 for conn in idle if conn is not None and conn.sock is not None)
+    return count
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter with Config-driven pool sizing, retries and TCP keep-alive"""
+
+    def __init__(self):
+        super().__init__(
+            pool_connections=Config.POOL_CONNECTIONS,
+            pool_maxsize=Config.POOL_MAXSIZE,
+            pool_block=Config.POOL_BLOCK,
+            max_retries=_retries(),
+        )
+
+    def init_poolmanager(self, *args, **kwargs):
+        if Config.TCP_KEEPALIVE:
+            kwargs["socket_options"] = _socket_options()
+        super().init_poolmanager(*args, **kwargs)
+        if Config.PROFILE_REQUESTS:
+            # Connections that time DNS, connect and TLS for RequestProfiler
+            self.poolmanager.pool_classes_by_scheme = POOL_CLASSES
+
+
+class RequestsTransport:
+    """
+    requests.Session transport
+
+    Args:
+        per_thread_session: Give every calling thread its own session
+    """
+
+    name = "requests"
+
+    def __init__(self, per_thread_session=False):
+        self.per_thread_session = per_thread_session
+        self._local = threading.local()
+        self._sessions = weakref.WeakSet()
+        self._shared_session = None if per_thread_session else self._create_session()
+
+    @property
+    def session(self):
+        """Shared session, or the calling thread's own session in per-thread mode"""
+        if not self.per_thread_session:
+            return self._shared_session
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = self._create_session()
+        return session
+
+    def _create_session(self):
+        session = requests.Session()
+        adapter = PooledHTTPAdapter()
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        session.headers["Connection"] = "keep-alive"
+        session.verify = Config.VERIFY_SSL
+        self._sessions.add(session)
+        return session
+
+    def request(self, method, url, **kwargs):
+        return self.session.request(method, url, **kwargs)
+
+    def open_connections(self):
+        return sum(
+            _pool_connections(adapter.poolmanager)
+            for session in list(self._sessions)
+            for adapter in set(session.adapters.values())
+            if getattr(adapter, "poolmanager", None) is not None
+        )
+
+    def close(self):
+        for session in list(self._sessions):
+            session.close()
+
+
+def encode_request(method, url, params=None, data=None, json=None, headers=None):
+    """
+    URL, body and headers of a request, encoded as requests would
+
+    Returns:
+        tuple: ``(url, body bytes or None, CaseInsensitiveDict headers)``
+    """
+    if params:
+        items = params.items() if isinstance(params, dict) else params
+        query = urlencode([(key, value) for key, value in items if value is not None], doseq=True)
+        if query:
+            url += ("&" if "?" in url else "?") + query
+    merged = default_headers()
+    body = None
+    if json is not None:
+        body = complexjson.dumps(json, allow_nan=False).encode("utf-8")
+        merged["Content-Type"] = "application/json"
+    elif isinstance(data, (dict, list, tuple)):
+        body = urlencode(data, doseq=True).encode("utf-8")
+        merged["Content-Type"] = "application/x-www-form-urlencoded"
+    elif data is not None:
+        body = data.encode("utf-8") if isinstance(data, str) else data
+    for name, value in (headers or {}).items():
+        if value is None:
+            merged.pop(name, None)
+        else:
+            merged[name] = value
+    if body is not None or method not in ("GET", "HEAD", "OPTIONS"):
+        merged["Content-Length"] = str(len(body or b""))
+    return url, body, merged
+
+
+class TransportResponse:
+    """
+    The parts of requests.Response the suite uses, for the urllib3 and asyncio transports
+
+    Args:
+        status_code: HTTP status
+        reason: Reason phrase
+        headers: Response headers
+        url: Requested URL
+        elapsed: Seconds from sending until the headers arrived
+        content: Body bytes; None while it is still to be read from ``stream``
+        stream: ``stream(chunk_size)`` -> iterator of body chunks
+        release: Returns the connection to its pool once the body is read
+    """
+
+    def __init__(self, status_code, reason, headers, url, elapsed, content=None, stream=None, release=None):
+        self.status_code = status_code
+        self.reason = reason
+        self.headers = CaseInsensitiveDict(headers)
+        self.url = url
+        self.elapsed = timedelta(seconds=elapsed)
+        self.encoding = get_encoding_from_headers(self.headers)
+        self.request = None
+        self._content = content
+        self._stream = stream
+        self._release = release
+
+    def __repr__(self):
+        return f"<Response [{self.status_code}]>"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+    @property
+    def content(self):
+        if self._content is None:
+            self._content = b"".join(self.iter_content(READ_SIZE))
+        return self._content
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding or "utf-8", errors="replace")
+
+    def json(self, **kwargs):
+        try:
+            return complexjson.loads(self.content, **kwargs)
+        except ValueError as e:
+            raise requests.JSONDecodeError(e.msg, e.doc, e.pos) from e
+
+    def iter_content(self, chunk_size=1):
+        if self._content is not None:
+            size = chunk_size or len(self._content) or 1
+            for start in range(0, len(self._content), size):
+                yield self._content[start:start + size]
+            return
+        try:
+            yield from self._stream(chunk_size or READ_SIZE)
+        finally:
+            self.close()
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            kind = "Client" if self.status_code < 500 else "Server"
+            raise requests.HTTPError(
+                f"{self.status_code} {kind} Error: {self.reason} for url: {self.url}", response=self
+            )
+
+    def close(self):
+        if self._release is not None:
+            release, self._release = self._release, None
+            release()
+
+
+class Urllib3Transport:
+    """urllib3 PoolManager transport, shared by every calling thread"""
+
+    name = "urllib3"
+
+    def __init__(self):
+        self.retries = _retries()
+        kwargs = {
+            "num_pools": Config.POOL_CONNECTIONS,
+            "maxsize": Config.POOL_MAXSIZE,
+            "block": Config.POOL_BLOCK,
+            "cert_reqs": "CERT_REQUIRED" if Config.VERIFY_SSL else "CERT_NONE",
+            "ca_certs": requests.certs.where() if Config.VERIFY_SSL else None,
+        }
+        if Config.TCP_KEEPALIVE:
+            kwargs["socket_options"] = _socket_options()
+        self.manager = PoolManager(**kwargs)
+        if Config.PROFILE_REQUESTS:
+            self.manager.pool_classes_by_scheme = POOL_CLASSES
+
+    def request(self, method, url, params=None, data=None, json=None, headers=None,
+                timeout=None, stream=False, allow_redirects=True):
+        url, body, headers = encode_request(method, url, params, data, json, headers)
+        start = time.perf_counter()
+        try:
+            response = self.manager.urlopen(
+                method, url, body=body, headers=dict(headers), timeout=timeout, retries=self.retries,
+                redirect=allow_redirects, preload_content=not stream,
+            )
+        except urllib3_exceptions.HTTPError as e:
+            raise _requests_error(e) from e
+        elapsed = time.perf_counter() - start
+        if not stream:
+            return TransportResponse(response.status, response.reason, response.headers, url, elapsed, response.data)
+
+        def chunks(chunk_size):
+            try:
+                yield from response.stream(chunk_size, decode_content=True)
+            except urllib3_exceptions.HTTPError as e:
+                raise _requests_error(e) from e
+
+        return TransportResponse(
+            response.status, response.reason, response.headers, url, elapsed,
+            stream=chunks, release=response.release_conn,
+        )
+
+    def open_connections(self):
+        return _pool_connections(self.manager)
+
+    def close(self):
+        self.manager.clear()
+
+
+def _requests_error(error):
+    """requests exception matching a urllib3 one, as HTTPAdapter.send() maps them"""
+    reason = getattr(error, "reason", None) or error
+    if isinstance(reason, urllib3_exceptions.ConnectTimeoutError):
+        return requests.ConnectTimeout(error)
+    if isinstance(reason, urllib3_exceptions.ReadTimeoutError):
+        return requests.ReadTimeout(error)
+    if isinstance(reason, urllib3_exceptions.SSLError):
+        return requests.exceptions.SSLError(error)
+    if isinstance(reason, urllib3_exceptions.ResponseError):
+        return requests.exceptions.RetryError(error)
+    return requests.ConnectionError(error)
+
+
+class _Connection:
+    """One keep-alive HTTP/1.1 connection driven by h11"""
+
+    def __init__(self, origin, reader, writer):
+        import h11
+
+        self.origin = origin
+        self.reader = reader
+        self.writer = writer
+        self.protocol = h11.Connection(h11.CLIENT)
+        self.reused = False
+        self.in_use = False
+
+    async def send(self, *events):
+        for event in events:
+            data = self.protocol.send(event)
+            if data:
+                self.writer.write(data)
+        await self.writer.drain()
+
+    async def next_event(self, timeout):
+        import h11
+
+        while True:
+            event = self.protocol.next_event()
+            if event is not h11.NEED_DATA:
+                return event
+            data = await asyncio.wait_for(self.reader.read(READ_SIZE), timeout)
+            self.protocol.receive_data(data)   # b"" marks the end of the stream
+
+    def reusable(self):
+        import h11
+
+        if self.protocol.our_state is h11.DONE and self.protocol.their_state is h11.DONE:
+            self.protocol.start_next_cycle()
+            self.reused = True
+            return True
+        return False
+
+    async def close(self):
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except OSError:
+            pass
+
+
+class AsyncioTransport:
+    """
+    HTTP/1.1 over asyncio streams on a private event-loop thread
+
+    Keeps up to Config.POOL_MAXSIZE connections per host. With
+    Config.POOL_BLOCK, requests wait for a free connection instead of
+    opening more. Redirects are not followed and bodies are not decompressed.
+    """
+
+    name = "asyncio"
+
+    def __init__(self):
+        import h11  # noqa: F401 - deferred, only this backend needs it; fail early if missing
+
+        self.loop = asyncio.new_event_loop()
+        self._idle = {}    # origin -> [_Connection], touched on the loop only
+        self._slots = {}   # origin -> asyncio.Semaphore
+        self._open = 0
+        self._ssl = None
+        self._thread = threading.Thread(target=self.loop.run_forever, name="asyncio-transport", daemon=True)
+        self._thread.start()
+
+    def _run(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
+
+    def request(self, method, url, params=None, data=None, json=None, headers=None,
+                timeout=None, stream=False, allow_redirects=True):
+        url, body, headers = encode_request(method, url, params, data, json, headers)
+        headers["Accept-Encoding"] = "identity"
+        start = time.perf_counter()
+        connection, response = self._run(self._send(method, url, body, headers, timeout))
+        elapsed = time.perf_counter() - start
+        reason = response.reason.decode("latin-1")
+        response_headers = CaseInsensitiveDict()
+        for name, value in response.headers:
+            name = name.decode("latin-1")
+            value = value.decode("latin-1")
+            response_headers[name] = f"{response_headers[name]}, {value}" if name in response_headers else value
+
+        def chunks(chunk_size):
+            while True:
+                data = self._run(self._read(connection, timeout))
+                if data is None:
+                    return
+                yield data
+
+        def release():
+            self._run(self._release(connection))
+
+        if not stream:
+            content = self._run(self._read_all(connection, timeout))
+            return TransportResponse(response.status_code, reason, response_headers, url, elapsed, content)
+        return TransportResponse(
+            response.status_code, reason, response_headers, url, elapsed, stream=chunks, release=release
+        )
+
+    async def _send(self, method, url, body, headers, timeout):
+        import h11
+
+        parts = urlsplit(url)
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+        origin = (parts.scheme, parts.hostname, port)
+        target = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        headers.setdefault("Host", parts.netloc)
+        events = [h11.Request(method=method, target=target, headers=list(headers.items()))]
+        if body:
+            events.append(h11.Data(data=body))
+        events.append(h11.EndOfMessage())
+
+        for attempt in range(Config.MAX_RETRIES + 1):
+            connection = await self._acquire(origin, timeout)
+            try:
+                await connection.send(*events)
+                response = await connection.next_event(timeout)
+                while isinstance(response, h11.InformationalResponse):
+                    response = await connection.next_event(timeout)
+                if not isinstance(response, h11.Response):
+                    raise h11.RemoteProtocolError("Connection closed before a response")
+            except asyncio.TimeoutError as e:
+                await self._discard(connection)
+                raise requests.ReadTimeout(f"Read timed out ({timeout}s) for url: {url}") from e
+            except (OSError, h11.ProtocolError) as e:
+                await self._discard(connection)
+                # A kept-alive connection the server closed meanwhile; retry on a new one
+                if connection.reused:
+                    continue
+                raise requests.ConnectionError(f"{e} for url: {url}") from e
+
+            if response.status_code in RETRY_STATUSES and attempt < Config.MAX_RETRIES:
+                await self._read_all(connection, timeout)
+                await asyncio.sleep(Config.RETRY_BACKOFF * (2 ** attempt))
+                continue
+            return connection, response
+        raise requests.ConnectionError(f"Connection reset on every attempt for url: {url}")
+
+    async def _acquire(self, origin, timeout):
+        slot = self._slots.get(origin)
+        if slot is None:
+            slot = self._slots[origin] = asyncio.Semaphore(Config.POOL_MAXSIZE)
+        if Config.POOL_BLOCK:
+            await slot.acquire()
+        idle = self._idle.get(origin)
+        try:
+            connection = idle.pop() if idle else await self._connect(origin, timeout)
+        except BaseException:
+            if Config.POOL_BLOCK:
+                slot.release()
+            raise
+        connection.in_use = True
+        return connection
+
+    async def _connect(self, origin, timeout):
+        scheme, host, port = origin
+        context = None
+        if scheme == "https":
+            if self._ssl is None:
+                self._ssl = ssl.create_default_context(cafile=requests.certs.where())
+                if not Config.VERIFY_SSL:
+                    self._ssl.check_hostname = False
+                    self._ssl.verify_mode = ssl.CERT_NONE
+            context = self._ssl
+        try:
+            reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port, ssl=context), timeout)
+        except asyncio.TimeoutError as e:
+            raise requests.ConnectTimeout(f"Connection to {host}:{port} timed out ({timeout}s)") from e
+        except OSError as e:
+            raise requests.ConnectionError(f"Failed to connect to {host}:{port}: {e}") from e
+        sock = writer.get_extra_info("socket")
+        for level, option, value in _socket_options() or ():
+            sock.setsockopt(level, option, value)
+        self._open += 1
+        return _Connection(origin, reader, writer)
+
+    async def _read(self, connection, timeout):
+        """Next body chunk, or None at the end of the response"""
+        import h11
+
+        try:
+            event = await connection.next_event(timeout)
+        except asyncio.TimeoutError as e:
+            await self._discard(connection)
+            raise requests.ReadTimeout(f"Read timed out ({timeout}s)") from e
+        except (OSError, h11.ProtocolError) as e:
+            await self._discard(connection)
+            raise requests.ConnectionError(str(e)) from e
+        if isinstance(event, h11.Data):
+            return bytes(event.data)
+        await self._release(connection)
+        return None
+
+    async def _read_all(self, connection, timeout):
+        body = []
+        while True:
+            data = await self._read(connection, timeout)
+            if data is None:
+                return b"".join(body)
+            body.append(data)
+
+    async def _release(self, connection):
+        """Return a connection whose response was read to its pool, or close it"""
+        if not connection.in_use:
+            return
+        connection.in_use = False
+        idle = self._idle.setdefault(connection.origin, [])
+        if connection.reusable() and len(idle) < Config.POOL_MAXSIZE:
+            idle.append(connection)
+        else:
+            await self._close(connection)
+        if Config.POOL_BLOCK:
+            self._slots[connection.origin].release()
+
+    async def _discard(self, connection):
+        if not connection.in_use:
+            return
+        connection.in_use = False
+        await self._close(connection)
+        if Config.POOL_BLOCK:
+            self._slots[connection.origin].release()
+
+    async def _close(self, connection):
+        self._open -= 1
+        await connection.close()
+
+    def open_connections(self):
+        return self._open
+
+    def close(self):
+        if self.loop.is_closed():
+            return
+
+        async def close_all():
+            for idle in self._idle.values():
+                for connection in idle:
+                    await self._close(connection)
+            self._idle.clear()
+
+        self._run(close_all())
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+        self.loop.close()
+
+
+class StubTransport:
+    """
+    Answers every request in memory with one fixed response
+
+    Requests are still encoded as the urllib3 and asyncio transports encode
+    them, so the client-side work per request is measured without a network
+    (utils/microbenchmark.py). Pass an instance as APIClient's ``transport``.
+
+    Args:
+        status_code: Status of every response
+        body: Response body; anything but bytes is sent as JSON
+        headers: Response headers
+    """
+
+    name = "stub"
+
+    def __init__(self, status_code=200, body=b"", headers=None):
+        headers = dict(headers or {})
+        if not isinstance(body, bytes):
+            body = complexjson.dumps(body).encode("utf-8")
+            headers.setdefault("Content-Type", "application/json")
+        self.status_code = status_code
+        self.reason = HTTPStatus(status_code).phrase
+        self.body = body
+        self.headers = headers
+
+    def request(self, method, url, params=None, data=None, json=None, headers=None,
+                timeout=None, stream=False, allow_redirects=True):
+        url, _, _ = encode_request(method, url, params, data, json, headers)
+        return TransportResponse(self.status_code, self.reason, self.headers, url, 0.0, self.body)
+
+    def open_connections(self):
+        return 0
+
+    def close(self):
+        pass
+
+
+TRANSPORTS = {
+    "requests": RequestsTransport,
+    "urllib3": Urllib3Transport,
+    "asyncio": AsyncioTransport,
+}
+
+
+def create_transport(name, per_thread_session=False):
+    """
+    Transport by name
+
+    Args:
+        name: One of TRANSPORTS
+        per_thread_session: A session per calling thread (requests transport only)
+    """
+    if name not in TRANSPORTS:
+        raise ValueError(f"Unknown transport: {name!r} (expected one of {', '.join(TRANSPORTS)})")
+    if name == "requests":
+        return RequestsTransport(per_thread_session)
+    return TRANSPORTS[name]()
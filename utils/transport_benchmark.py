@@ -0,0 +1,131 @@
+"""Throughput, CPU and allocations per request for each APIClient transport.
+
+    python -m utils.transport_benchmark --requests 2000 --threads 8
+
+Without --base-url the stand-in server runs in a subprocess, so the CPU
+time measured is the client's alone. For each transport the same GETs are
+sent through APIClient from a thread pool, which gives requests/s and
+process CPU per request. A second, sequential pass measures allocations
+per request with utils.microbenchmark.measure_allocations().
+"""
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from config import Config
+from utils.api_client import APIClient
+from utils.microbenchmark import measure_allocations
+from utils.transport import TRANSPORTS
+
+# (column label, result field, format)
+COLUMNS = (
+    ("req/s", "requests_per_second", "{:.0f}"),
+    ("CPU ms/req", "cpu_ms_per_request", "{:.3f}"),
+    ("alloc KiB/req", "alloc_kib_per_request", "{:.1f}"),
+    ("blocks kept/req", "retained_blocks_per_request", "{:.2f}"),
+    ("errors", "errors", "{}"),
+)
+
+
+def benchmark_transport(name, requests=1000, threads=8, endpoint=None, alloc_requests=200):
+    """
+    Benchmark one transport against Config.BASE_URL
+
+    Args:
+        name: Transport name (utils/transport.py)
+        requests: GETs sent for the throughput and CPU figures
+        threads: Concurrent sender threads
+        endpoint: Endpoint to GET (default: the first booking)
+        alloc_requests: Sequential GETs sent under tracemalloc
+
+    Returns:
+        dict: Result fields named in COLUMNS, plus ``transport`` and ``requests``
+    """
+    endpoint = endpoint or f"{Config.BOOKING_ENDPOINT}/1"
+    client = APIClient(response_cache=False, transport=name, cassette=False)
+
+    def send(_):
+        return client.get(endpoint).status_code == 200
+
+    try:
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            list(executor.map(send, range(threads)))   # open the pooled connections
+            cpu, wall = time.process_time(), time.perf_counter()
+            succeeded = sum(executor.map(send, range(requests)))
+            wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+
+        alloc_kib, retained = measure_allocations(lambda: send(None), alloc_requests)
+    finally:
+        client.close()
+
+    return {
+        "transport": name,
+        "requests": requests,
+        "errors": requests - succeeded,
+        "requests_per_second": requests / wall,
+        "cpu_ms_per_request": cpu * 1000 / requests,
+        "alloc_kib_per_request": alloc_kib,
+        "retained_blocks_per_request": retained,
+    }
+
+
+def start_stub_server():
+    """Start utils.stub_server in a subprocess; returns ``(process, base URL)``"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    process = subprocess.Popen(
+        [sys.executable, "-m", "utils.stub_server", "--port", str(port)],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        env=dict(os.environ, PYTHONUNBUFFERED="1"),
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    process.stdout.readline()   # printed once the socket is bound
+    return process, f"http://127.0.0.1:{port}"
+
+
+def format_table(results):
+    widths = [max(len(label), 10) for label, _, _ in COLUMNS]
+    lines = ["transport".ljust(10) + "".join(label.rjust(width + 2) for (label, _, _), width in zip(COLUMNS, widths))]
+    for result in results:
+        lines.append(result["transport"].ljust(10) + "".join(
+            fmt.format(result[field]).rjust(width + 2) for (_, field, fmt), width in zip(COLUMNS, widths)
+        ))
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare APIClient transports")
+    parser.add_argument("--transport", action="append", choices=list(TRANSPORTS),
+                        help="Transport to benchmark (repeatable; default: all)")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--endpoint", default=None, help="Endpoint to GET (default: /booking/1)")
+    parser.add_argument("--base-url", default=None, help="Benchmark this server instead of a local stub")
+    args = parser.parse_args()
+
+    server = None
+    if args.base_url:
+        Config.BASE_URL = args.base_url
+    else:
+        server, Config.BASE_URL = start_stub_server()
+    try:
+        results = [
+            benchmark_transport(name, args.requests, args.threads, args.endpoint)
+            for name in args.transport or TRANSPORTS
+        ]
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+    print(f"{args.requests} GET {args.endpoint or '/booking/1'} from {args.threads} threads against {Config.BASE_URL}")
+    print(format_table(results))
+
+
+if __name__ == "__main__":
+    main()